@@ -12,12 +12,17 @@ import polars as pl
 import xarray as xr
 
 from rainfallqc.core.all_qc_checks import qc_check
-from rainfallqc.utils import data_readers, data_utils, neighbourhood_utils, stats
+from rainfallqc.utils import data_utils, gauge_climatology, stats
 
 
-@qc_check("check_annual_exceedance_etccdi_r99p", require_non_negative=True)
+@qc_check("check_annual_exceedance_etccdi_r99p", require_non_negative=True, supports_lazy=True)
 def check_annual_exceedance_etccdi_r99p(
-    data: pl.DataFrame, target_gauge_col: str, gauge_lat: int | float, gauge_lon: int | float
+    data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
+    annual_statistics: pl.DataFrame = None,
 ) -> list:
     """
     Check annual exceedance of maximum R99p from ETCCDI dataset.
@@ -34,6 +39,10 @@ def check_annual_exceedance_etccdi_r99p(
         latitude of the rain gauge
     gauge_lon :
         longitude of the rain gauge
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
+    annual_statistics :
+        Annual statistics of target_gauge_col from 'data_utils.get_annual_statistics' (default: None, so computed)
 
     Returns
     -------
@@ -41,30 +50,33 @@ def check_annual_exceedance_etccdi_r99p(
         List of values per year where the sum of the 99th percentile is above annual max R99p
 
     """
-    # 1. Load R99p data
-    etccdi_r99p = data_readers.load_etccdi_data(etccdi_var="R99p")
-
-    # 2. Get nearest local R99p value to the gauge coordinates
-    nearby_etccdi_r99p = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
-        etccdi_r99p, etccdi_name="R99p", gauge_lat=gauge_lat, gauge_lon=gauge_lon
-    )
+    # 1. Get local maximum R99p value nearest to the gauge coordinates
+    if climatology is None:
+        climatology = gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon)
+    max_etccdi_r99p = climatology.get_etccdi_value("R99p")
 
-    # 3. Get sum of rainfall above the 99th percentile per year
+    # 2. Get sum of rainfall above the 99th percentile per year
     sum_rainfall_above_99percentile_per_year = get_sum_rainfall_above_percentile_per_year(
-        data, target_gauge_col, percentile=99
+        data, target_gauge_col, percentile=99, annual_statistics=annual_statistics
     )
 
-    # 4. Get flags of exceedance for R99p variable where the 99th percentile sum is more than ETCCDI max
-    list_of_years_where_sum_99_percentile_above_max_R99p = flag_exceedance_of_max_etccdi_variable(
-        sum_rainfall_above_99percentile_per_year, target_gauge_col, nearby_etccdi_r99p, etccdi_var="R99p"
-    )
+    # 3. Get flags of exceedance for R99p variable where the 99th percentile sum is more than ETCCDI max
+    list_of_years_where_sum_99_percentile_above_max_R99p = [
+        flag_exceedance_of_ref_val(val=yr, ref_val=max_etccdi_r99p)
+        for yr in sum_rainfall_above_99percentile_per_year[target_gauge_col]
+    ]
 
     return list_of_years_where_sum_99_percentile_above_max_R99p
 
 
-@qc_check("check_annual_exceedance_etccdi_prcptot", require_non_negative=True)
+@qc_check("check_annual_exceedance_etccdi_prcptot", require_non_negative=True, supports_lazy=True)
 def check_annual_exceedance_etccdi_prcptot(
-    data: pl.DataFrame, target_gauge_col: str, gauge_lat: int | float, gauge_lon: int | float
+    data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
+    annual_statistics: pl.DataFrame = None,
 ) -> list:
     """
     Check years with exceedances of maximum PRCPTOT from ETCCDI dataset.
@@ -81,6 +93,10 @@ def check_annual_exceedance_etccdi_prcptot(
         latitude of the rain gauge
     gauge_lon :
         longitude of the rain gauge
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
+    annual_statistics :
+        Annual statistics of target_gauge_col from 'data_utils.get_annual_statistics' (default: None, so computed)
 
     Returns
     -------
@@ -88,29 +104,29 @@ def check_annual_exceedance_etccdi_prcptot(
         List of values per year where the sum of the 99th percentile is above annual max PRCPTOT
 
     """
-    # 1. Load PRCPTOT data
-    etccdi_prcptot = data_readers.load_etccdi_data(etccdi_var="PRCPTOT")
+    # 1. Get local maximum PRCPTOT value nearest to the gauge coordinates
+    if climatology is None:
+        climatology = gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon)
+    max_etccdi_prcptot = climatology.get_etccdi_value("PRCPTOT")
 
-    # 2. Get nearest local PRCPTOT value to the gauge coordinates
-    nearby_etccdi_prcptot = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
-        etccdi_prcptot, etccdi_name="PRCPTOT", gauge_lat=gauge_lat, gauge_lon=gauge_lon
-    )
-
-    # 3. Get sum of rainfall above the 99th percentile per year
+    # 2. Get sum of rainfall above the 99th percentile per year
     sum_rainfall_above_99percentile_per_year = get_sum_rainfall_above_percentile_per_year(
-        data, target_gauge_col, percentile=99
+        data, target_gauge_col, percentile=99, annual_statistics=annual_statistics
     )
 
-    # 4. Get flags of exceedance for PRCPTOT variable where the 99 percentile sum is more than ETCCDI max
-    list_of_years_where_sum_99_percentile_above_max_PRCPTOT = flag_exceedance_of_max_etccdi_variable(
-        sum_rainfall_above_99percentile_per_year, target_gauge_col, nearby_etccdi_prcptot, etccdi_var="PRCPTOT"
-    )
+    # 3. Get flags of exceedance for PRCPTOT variable where the 99 percentile sum is more than ETCCDI max
+    list_of_years_where_sum_99_percentile_above_max_PRCPTOT = [
+        flag_exceedance_of_ref_val(val=yr, ref_val=max_etccdi_prcptot)
+        for yr in sum_rainfall_above_99percentile_per_year[target_gauge_col]
+    ]
 
     return list_of_years_where_sum_99_percentile_above_max_PRCPTOT
 
 
-@qc_check("check_exceedance_of_rainfall_world_record", require_non_negative=True)
-def check_exceedance_of_rainfall_world_record(data: pl.DataFrame, target_gauge_col: str, time_res: str) -> pl.DataFrame:
+@qc_check("check_exceedance_of_rainfall_world_record", require_non_negative=True, supports_lazy=True)
+def check_exceedance_of_rainfall_world_record(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, time_res: str, durations: list = None
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Check exceedance of rainfall world record.
 
@@ -126,20 +142,42 @@ def check_exceedance_of_rainfall_world_record(data: pl.DataFrame, target_gauge_c
         Column with rainfall data
     time_res :
         Time resolution
+    durations :
+        Durations of rolling totals to compare with the world record of each duration i.e. ['15m', '1h', '1d']
+        (default: None, so only values of each time step are compared with the world record of time_res)
 
     Returns
     -------
     data_w_flags:
-        Rainfall data with exceedance of World Record (see `flag_exceedance_of_ref_val_as_col` function)
+        Rainfall data with exceedance of World Record (see `flag_exceedance_of_ref_val_as_col` function and
+        `flag_exceedance_of_ref_vals_over_durations` if durations are given)
+
+    Raises
+    ------
+    ValueError :
+        If there is no world record for a duration.
 
     """
     # 1. Get rainfall world records
     rainfall_world_records = stats.get_rainfall_world_records()
 
     # 2. Flag exceedance of world record value
-    data_w_flags = flag_exceedance_of_ref_val_as_col(
-        data, target_gauge_col, ref_val=rainfall_world_records[time_res], new_col_name="world_record_check"
-    )
+    if durations is None:
+        data_w_flags = flag_exceedance_of_ref_val_as_col(
+            data, target_gauge_col, ref_val=rainfall_world_records[time_res], new_col_name="world_record_check"
+        )
+    else:
+        unknown_durations = [duration for duration in durations if duration not in rainfall_world_records]
+        if unknown_durations:
+            raise ValueError(
+                f"No rainfall world record for durations {unknown_durations}. Use {list(rainfall_world_records)}"
+            )
+        data_w_flags = flag_exceedance_of_ref_vals_over_durations(
+            data,
+            target_gauge_col,
+            ref_vals={duration: rainfall_world_records[duration] for duration in durations},
+            new_col_name="world_record_check",
+        )
     return data_w_flags.select(["time", "world_record_check"])
 
 
@@ -147,8 +185,10 @@ def check_exceedance_of_rainfall_world_record(data: pl.DataFrame, target_gauge_c
 def check_hourly_exceedance_etccdi_rx1day(
     data: pl.DataFrame,
     target_gauge_col: str,
-    gauge_lat: int | float,
-    gauge_lon: int | float,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    durations: list = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> pl.DataFrame:
     """
     Check exceedance of hourly day rainfall 1-day record.
@@ -165,40 +205,48 @@ def check_hourly_exceedance_etccdi_rx1day(
         latitude of the rain gauge
     gauge_lon :
         longitude of the rain gauge
+    durations :
+        Durations of rolling totals (at the time step of data) to compare with Rx1day i.e. ['1h', '24h']
+        (default: None, so hourly values are compared)
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
     data_w_flags:
-        Rainfall data with exceedance of Rx1day Record (see `flag_exceedance_of_ref_val_as_col` function)
+        Rainfall data with exceedance of Rx1day Record (see `flag_exceedance_of_ref_val_as_col` function and
+        `flag_exceedance_of_ref_vals_over_durations` if durations are given)
 
     """
     # 0. Check data can be resampled to hourly
     data_utils.check_data_is_specific_time_res(data, time_res=["15m", "1h"])
 
-    # 1. Resample into hourly
+    # 1. Resample into hourly (unless rolling totals are used)
     data_hourly = data
     time_step = data_utils.get_data_timestep_as_str(data)
-    if time_step == "15m":
+    if time_step == "15m" and durations is None:
         data_hourly = data_utils.resample_data_by_time_step(
             data, rain_cols=[target_gauge_col], time_col="time", time_step="1h", min_count=2, hour_offset=0
         )
 
-    # 2. Load Rx1day data
-    etccdi_rx1day = data_readers.load_etccdi_data(etccdi_var="Rx1day")
-
-    # 3. Get nearest local Rx1day value to the gauge coordinates
-    nearby_etccdi_rx1day = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
-        etccdi_rx1day, etccdi_name="Rx1day", gauge_lat=gauge_lat, gauge_lon=gauge_lon
-    )
-
-    # 4. Get local maximum ETCCDI value
-    max_nearby_etccdi_rx1day = np.max(nearby_etccdi_rx1day["Rx1day"])
-
-    # 5. Flag exceedance of max ETCCDI value
+    # 2. Get local maximum Rx1day value nearest to the gauge coordinates
+    if climatology is None:
+        climatology = gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon)
+    max_nearby_etccdi_rx1day = climatology.get_etccdi_value("Rx1day")
+
+    # 3. Flag exceedance of max ETCCDI value
+    if durations is not None:
+        data_w_flags = flag_exceedance_of_ref_vals_over_durations(
+            data,
+            target_gauge_col,
+            ref_vals=dict.fromkeys(durations, max_nearby_etccdi_rx1day),
+            new_col_name="rx1day_check",
+        )
+        return data_w_flags.select(["time", "rx1day_check"])
     data_w_flags = flag_exceedance_of_ref_val_as_col(
         data_hourly, target_gauge_col, ref_val=max_nearby_etccdi_rx1day, new_col_name="rx1day_check"
     )
-    # 6. Return data (backward fill if 15 min resolution)
+    # 4. Return data (backward fill if 15 min resolution)
     if time_step == "15m":
         data_w_flags = data_utils.downsample_and_fill_columns(
             high_res_data=data,
@@ -212,12 +260,16 @@ def check_hourly_exceedance_etccdi_rx1day(
 
 
 def get_sum_rainfall_above_percentile_per_year(
-    data: pl.DataFrame,
+    data: pl.DataFrame | pl.LazyFrame,
     target_gauge_col: str,
     percentile: float,
+    annual_statistics: pl.DataFrame = None,
 ) -> pl.DataFrame:
     """
-    Check annual exceedance of maximum PRCPTOT from ETCCDI dataset.
+    Get sum of rainfall above the nth percentile of each year.
+
+    Values are taken on a daily time grid (see 'add_daily_year_col') and the sums are read from the annual statistics
+    of the data (see 'data_utils.get_annual_statistics'), so they are shared between QC8 and QC9.
 
     Parameters
     ----------
@@ -227,34 +279,27 @@ def get_sum_rainfall_above_percentile_per_year(
         Column with rainfall data
     percentile :
         nth percentile to check for values above (between 1-100)
+    annual_statistics :
+        Annual statistics of target_gauge_col from 'data_utils.get_annual_statistics' (default: None, so computed)
 
     Returns
     -------
     list_of_nth_percentile_exceedances_by_year :
-        List of values per year above the nth_percentile
+        Sum of values above the nth percentile for each year with values above it (start of year as 'time')
 
     """
-    # 1. Add a daily year column to the data
-    data = add_daily_year_col(data)
-
-    # 2. Calculate percentiles
+    # 1. Get annual sums of rainfall above the nth percentile
     assert percentile > 1 and percentile <= 100, f"percentile needs to be between 1-100. Currently {percentile}"
-    quantile = percentile / 100
-    data_percentiles = data.group_by("year").agg(
-        pl.col(target_gauge_col).fill_nan(0.0).quantile(quantile).alias("percentile")
+    annual_statistics = data_utils.get_annual_statistics(
+        data, target_gauge_col, sum_above_percentiles=[percentile], annual_statistics=annual_statistics
     )
 
-    # 3. Join percentiles back to the main DataFrame
-    data_yearly_percentiles = data.join(data_percentiles, on="year").fill_nan(0.0)
-
-    # 4. Filter values above the nth percentile
-    data_above_annual_percentile = data_yearly_percentiles.filter(pl.col(target_gauge_col) > pl.col("percentile"))
-
-    # 5. Get number of values per year above nth percentile
-    list_of_nth_percentile_exceedances_by_year = data_above_annual_percentile.group_by_dynamic("time", every="1y").agg(
-        pl.col(target_gauge_col).sum()
+    # 2. Keep years with values above the nth percentile
+    sum_col = f"sum_above_percentile_{percentile}"
+    list_of_nth_percentile_exceedances_by_year = annual_statistics.filter(pl.col(sum_col).is_not_null()).select(
+        pl.datetime(pl.col("year"), 1, 1).cast(data.collect_schema()["time"]).alias("time"),
+        pl.col(sum_col).alias(target_gauge_col),
     )
-
     return list_of_nth_percentile_exceedances_by_year
 
 
@@ -342,8 +387,8 @@ def flag_exceedance_of_ref_val(val: int | float, ref_val: int | float) -> int:
 
 
 def flag_exceedance_of_ref_val_as_col(
-    data: pl.DataFrame, target_gauge_col: str, ref_val: int | float, new_col_name: str
-) -> pl.DataFrame:
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, ref_val: int | float, new_col_name: str
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Flag exceedance of maximum reference value and return as column.
 
@@ -380,3 +425,47 @@ def flag_exceedance_of_ref_val_as_col(
         .otherwise(0)
         .alias(new_col_name)
     )
+
+
+def flag_exceedance_of_ref_vals_over_durations(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, ref_vals: dict, new_col_name: str
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Flag exceedance of reference values by rolling totals of several durations and return as column.
+
+    Rolling totals of all durations are computed in one pass (see 'data_utils.get_rolling_totals'). Each time step gets
+    the highest flag of the windows containing it, so all time steps of a window exceeding its reference are flagged.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with a consistent time step.
+    target_gauge_col :
+        Column with rainfall data
+    ref_vals :
+        Reference value of each duration i.e. {'1h': 401.0, '1d': 1825.0}.
+    new_col_name :
+        New column name.
+
+    Returns
+    -------
+    data_w_flags :
+        Time and exceedance flags between 0-4 (NaN where no complete window contains the time step).
+
+    """
+    # 1. Get rolling totals of each duration
+    rolling_totals = data_utils.get_rolling_totals(data, target_gauge_col, list(ref_vals))
+    time_step = data_utils.get_data_timesteps(data)[0]
+
+    # 2. Flag each duration and spread the flag of each window (at its end) back over the window
+    duration_flags = []
+    for duration, ref_val in ref_vals.items():
+        total_col = f"{target_gauge_col}_{duration}"
+        rolling_totals = flag_exceedance_of_ref_val_as_col(rolling_totals, total_col, ref_val, f"{total_col}_flag")
+        window_steps = data_utils.convert_duration_str_to_timedelta(duration) // time_step
+        duration_flags.append(
+            pl.col(f"{total_col}_flag").fill_nan(None).reverse().rolling_max(window_steps, min_samples=1).reverse()
+        )
+
+    # 3. Highest flag of all durations
+    return rolling_totals.select("time", pl.max_horizontal(duration_flags).fill_null(np.nan).alias(new_col_name))
@@ -7,15 +7,24 @@ Gauge checks are defined as QC checks that: "detect abnormalities in summary and
 Classes and functions ordered by appearance in IntenseQC framework.
 """
 
+import numpy as np
 import polars as pl
-import scipy.stats
 
 from rainfallqc.core.all_qc_checks import qc_check
 from rainfallqc.utils import data_utils, stats
 
+BREAKPOINT_AGGREGATION_PERIODS = {"monthly": "1mo", "annual": "1y"}
+TEMPORAL_BIAS_GRANULARITIES = {
+    "weekday": pl.col("time").dt.weekday(),
+    "hour": pl.col("time").dt.hour(),
+    "month": pl.col("time").dt.month(),
+}
 
-@qc_check("check_years_where_nth_percentile_is_zero", require_non_negative=True)
-def check_years_where_nth_percentile_is_zero(data: pl.DataFrame, target_gauge_col: str, percentile: float) -> list:
+
+@qc_check("check_years_where_nth_percentile_is_zero", require_non_negative=True, supports_lazy=True)
+def check_years_where_nth_percentile_is_zero(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, percentile: float, annual_statistics: pl.DataFrame = None
+) -> list:
     """
     Return years where the n-th percentiles is zero.
 
@@ -29,6 +38,8 @@ def check_years_where_nth_percentile_is_zero(data: pl.DataFrame, target_gauge_co
         Column with rainfall data
     percentile :
         Between 1 & 100
+    annual_statistics :
+        Annual statistics of target_gauge_col from 'data_utils.get_annual_statistics' (default: None, so computed)
 
     Returns
     -------
@@ -37,13 +48,16 @@ def check_years_where_nth_percentile_is_zero(data: pl.DataFrame, target_gauge_co
 
     """
     assert percentile > 1 and percentile <= 100, f"percentile needs to be between 1-100. Currently {percentile}"
-    quantile = percentile / 100
-    nth_perc = data.group_by_dynamic("time", every="1y").agg(pl.quantile(target_gauge_col, quantile))
-    return nth_perc.filter(pl.col(target_gauge_col) == 0)["time"].dt.year().to_list()
+    annual_statistics = data_utils.get_annual_statistics(
+        data, target_gauge_col, percentiles=[percentile], annual_statistics=annual_statistics
+    )
+    return annual_statistics.filter(pl.col(f"percentile_{percentile}") == 0)["year"].to_list()
 
 
-@qc_check("check_years_where_annual_kth_largest_value_is_zero", require_non_negative=True)
-def check_years_where_annual_kth_largest_value_is_zero(data: pl.DataFrame, target_gauge_col: str, k: int) -> list:
+@qc_check("check_years_where_annual_kth_largest_value_is_zero", require_non_negative=True, supports_lazy=True)
+def check_years_where_annual_kth_largest_value_is_zero(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, k: int, annual_statistics: pl.DataFrame = None
+) -> list:
     """
     Return list of years where the k-th largest value is 0.
 
@@ -57,6 +71,8 @@ def check_years_where_annual_kth_largest_value_is_zero(data: pl.DataFrame, targe
         Column with rainfall data
     k :
         Number of the largest values to take for a given year i.e. k==5 is top 5
+    annual_statistics :
+        Annual statistics of target_gauge_col from 'data_utils.get_annual_statistics' (default: None, so computed)
 
     Returns
     -------
@@ -64,15 +80,17 @@ def check_years_where_annual_kth_largest_value_is_zero(data: pl.DataFrame, targe
         List of years where k-largest value is zero.
 
     """
-    data_top_k = data.group_by_dynamic("time", every="1y").agg(pl.col(target_gauge_col).top_k(k).min())
-    return data_top_k.filter(pl.col(target_gauge_col) == 0)["time"].dt.year().to_list()
+    annual_statistics = data_utils.get_annual_statistics(
+        data, target_gauge_col, k_largest=[k], annual_statistics=annual_statistics
+    )
+    return annual_statistics.filter(pl.col(f"kth_largest_{k}") == 0)["year"].to_list()
 
 
-@qc_check("check_temporal_bias", require_non_negative=True)
+@qc_check("check_temporal_bias", require_non_negative=True, supports_lazy=True)
 def check_temporal_bias(
-    data: pl.DataFrame,
+    data: pl.DataFrame | pl.LazyFrame,
     target_gauge_col: str,
-    time_granularity: str,
+    time_granularity: str | list[str],
     p_threshold: float = 0.01,
 ) -> int:
     """
@@ -80,6 +98,9 @@ def check_temporal_bias(
 
     This check performs less well when using less data.
 
+    The t-tests of every time group (and every granularity) are computed from the count, sum and sum of squares of each
+    group in one aggregation of the data.
+
     This is QC3 (day of week bias) and QC4 (hour-of-day bias) from the IntenseQC framework.
 
     Parameters
@@ -89,47 +110,53 @@ def check_temporal_bias(
     target_gauge_col :
         Column with rainfall data
     time_granularity :
-        Temporal grouping, either 'weekday' or 'hour'
+        Temporal grouping, either 'weekday', 'hour' or 'month', or a list of these to test several in the same pass
     p_threshold :
         Significance level for the test
 
     Returns
     -------
     flag : int
-        1 if bias is detected (p < threshold), 0 otherwise
-
-    """
-    if time_granularity == "weekday":
-        time_group = pl.col("time").dt.weekday()
-    elif time_granularity == "hour":
-        time_group = pl.col("time").dt.hour()
-    else:
-        raise ValueError("time_granularity must be either 'weekday' or 'hour'")
-
-    # 1. Get time-groups
-    time_group_data = data.group_by(time_group).agg(pl.col(target_gauge_col).drop_nans())
-
-    # 2. Get data mean
-    overall_mean = data[target_gauge_col].drop_nans().mean()
+        1 if bias is detected (p < threshold) for any time group, 0 otherwise
 
-    # 3. Loop through each time group and check difference from mean
-    p_values = []
+    Raises
+    ------
+    ValueError
+        If a time granularity is not one of TEMPORAL_BIAS_GRANULARITIES.
 
-    for _, tg_data in time_group_data.iter_rows():
-        # skip groups less than 2 values
-        if len(tg_data) < 2:
-            continue
-
-        # Compute two-sided t-test group array vs population mean
-        _, p_val = scipy.stats.ttest_1samp(
-            tg_data,
-            popmean=overall_mean,
-            alternative="two-sided",
+    """
+    time_granularities = [time_granularity] if isinstance(time_granularity, str) else list(time_granularity)
+    for granularity in time_granularities:
+        if granularity not in TEMPORAL_BIAS_GRANULARITIES:
+            raise ValueError(
+                f"time_granularity must be one of {list(TEMPORAL_BIAS_GRANULARITIES)}, not '{granularity}'"
+            )
+
+    # 1. Get difference of each value from the data mean
+    rain = pl.col(target_gauge_col).fill_nan(None)
+    rain_diff = (rain - rain.mean()).alias("rain_diff")
+    data = data.select(
+        *[TEMPORAL_BIAS_GRANULARITIES[granularity].alias(granularity) for granularity in time_granularities],
+        rain_diff,
+    ).drop_nulls("rain_diff")
+
+    # 2. Get count, sum and sum of squares for each combination of time groups
+    time_group_sums = data_utils.collect_if_lazy(
+        data.group_by(time_granularities).agg(
+            count=pl.len(),
+            sum_diff=pl.col("rain_diff").sum(),
+            sum_sq_diff=(pl.col("rain_diff") ** 2).sum(),
         )
-        p_values.append(p_val)
+    )
 
-    # Check any are below threshold i.e. different distribution thus a bias
-    return int(any(p < p_threshold for p in p_values))
+    # 3. t-test each time group of each granularity against the data mean
+    for granularity in time_granularities:
+        tg_sums = time_group_sums.group_by(granularity).agg(pl.col("count", "sum_diff", "sum_sq_diff").sum())
+        p_values = stats.ttest_1samp_from_sums(tg_sums["count"], tg_sums["sum_diff"], tg_sums["sum_sq_diff"])
+        # Check any are below threshold i.e. different distribution thus a bias
+        if np.any(p_values < p_threshold):
+            return 1
+    return 0
 
 
 @qc_check("check_intermittency", require_non_negative=True)
@@ -162,72 +189,22 @@ def check_intermittency(
     # 1. Check data has consistent time step
     data_utils.check_data_has_consistent_time_step(data)
 
-    # 2. Replace missing values with NaN
-    data = data_utils.replace_missing_vals_with_nan(data, target_gauge_col)
-
-    # 3. Mark missing values
-    data = data.with_columns(pl.col(target_gauge_col).is_nan().alias("is_missing"))
+    # 2. Get runs of values (missing values are NaN)
+    run_table = data_utils.get_run_table(data, target_gauge_col)
 
-    # 4. Assign group numbers to consecutive missing values
-    grouped = data.with_columns(
-        pl.when(pl.col("is_missing"))
-        .then((~pl.col("is_missing")).cum_sum())  # Only number missing stretches
-        .otherwise(None)
-        .alias("group")
+    # 3. Get missing data periods of at least no_data_threshold that are bounded by zeros
+    bounded_by_zero = run_table.filter(
+        pl.col("is_missing")
+        & (pl.col("run_len") >= no_data_threshold)
+        & (pl.col("value").shift(1) == 0)
+        & (pl.col("value").shift(-1) == 0)
     )
 
-    # 5. Count size of each missing group
-    group_counts = (
-        grouped.filter(pl.col("is_missing"))
-        .group_by("group")
-        .agg(pl.len().alias("count"))
-        .filter(pl.col("count") >= no_data_threshold)
-    )
+    # 4. Count how many bounded periods start in each year
+    year_counts = bounded_by_zero.group_by(pl.col("start").dt.year().alias("year")).len()
 
-    # 6. Keep only valid groups
-    valid_missing_groups = group_counts["group"].to_list()
-    valid_missing = grouped.filter(pl.col("group").is_in(valid_missing_groups))
-
-    # 7. Get first and last time for each group
-    first_last = (
-        valid_missing.sort("time")
-        .group_by("group")
-        .agg([pl.first("time").alias("start_time"), pl.last("time").alias("end_time")])
-    )
-
-    # 8. Add stable row index to full sorted data
-    df_sorted = data.sort("time").with_row_index("row_idx")
-
-    # 9. Lookup row indices of group bounds
-    first_last_with_idx = (
-        first_last.join(df_sorted.select(["time", "row_idx"]), left_on="start_time", right_on="time")
-        .rename({"row_idx": "start_idx"})
-        .join(df_sorted.select(["time", "row_idx"]), left_on="end_time", right_on="time")
-        .rename({"row_idx": "end_idx"})
-    )
-
-    # 10. Compute prev/next indices and fetch values
-    row_lookup = df_sorted.select([pl.col("row_idx"), pl.col(target_gauge_col)])
-
-    first_last_with_vals = (
-        first_last_with_idx.with_columns(
-            [(pl.col("start_idx") - 1).alias("prev_idx"), (pl.col("end_idx") + 1).alias("next_idx")]
-        )
-        .join(row_lookup.rename({target_gauge_col: "prev_val"}), left_on="prev_idx", right_on="row_idx")
-        .join(row_lookup.rename({target_gauge_col: "next_val"}), left_on="next_idx", right_on="row_idx")
-    )
-
-    # 11. Filter to groups bounded by zero
-    bounded_by_zero = first_last_with_vals.filter((pl.col("prev_val") == 0) & (pl.col("next_val") == 0))
-
-    # 12. Extract year from each bounded group's start time
-    bounded_years = bounded_by_zero.select(pl.col("start_time").dt.year().alias("year"))
-
-    # 13. Count how many bounded groups occur per year
-    year_counts = bounded_years.group_by("year").len()
-
-    # 14. Get years exceeding threshold
-    years_w_intermittency = year_counts.filter(pl.col("len") >= annual_count_threshold)["year"].to_list()
+    # 5. Get years exceeding threshold
+    years_w_intermittency = year_counts.filter(pl.col("len") >= annual_count_threshold).sort("year")["year"].to_list()
 
     return years_w_intermittency
 
@@ -237,10 +214,13 @@ def check_breakpoints(
     data: pl.DataFrame,
     target_gauge_col: str,
     p_threshold: float = 0.01,
+    aggregation: str = "daily",
 ) -> int:
     """
     Use a Pettitt test rainfall data to check for breakpoints.
 
+    The test can be run on monthly or annual totals for a quicker screening of long records.
+
     This is QC6 from the IntenseQC framework.
 
     Parameters
@@ -251,15 +231,32 @@ def check_breakpoints(
         Column with rainfall data.
     p_threshold :
         Significance level for the test.
+    aggregation :
+        Run test on the data upsampled to daily ('daily'), or on 'monthly' or 'annual' totals (default: 'daily').
+        Missing values are counted as 0 in totals.
 
     Returns
     -------
     flag : int
         1 if breakpoint is detected (p < p_threshold), 0 otherwise
 
+    Raises
+    ------
+    ValueError :
+        If aggregation is not 'daily', 'monthly' or 'annual'
+
     """
-    # 1. Upsample data to daily
-    data_upsampled = data.upsample("time", every="1d")
+    # 1. Upsample data to daily, or get monthly or annual totals
+    if aggregation == "daily":
+        data_upsampled = data.upsample("time", every="1d")
+    elif aggregation in BREAKPOINT_AGGREGATION_PERIODS:
+        data_upsampled = (
+            data.with_columns(pl.col(target_gauge_col).fill_nan(None))
+            .group_by_dynamic("time", every=BREAKPOINT_AGGREGATION_PERIODS[aggregation])
+            .agg(pl.col(target_gauge_col).sum())
+        )
+    else:
+        raise ValueError(f"aggregation '{aggregation}' is not known. Use 'daily', 'monthly' or 'annual'.")
 
     # 2. Compute Pettitt test for breakpoints
     _, p_val = stats.pettitt_test(data_upsampled[target_gauge_col].fill_nan(0.0))
@@ -269,8 +266,8 @@ def check_breakpoints(
         return 0
 
 
-@qc_check("check_min_val_change", require_non_negative=True)
-def check_min_val_change(data: pl.DataFrame, target_gauge_col: str, expected_min_val: float) -> list:
+@qc_check("check_min_val_change", require_non_negative=True, supports_lazy=True)
+def check_min_val_change(data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, expected_min_val: float) -> list:
     """
     Return years when the minimum recorded value changes.
 
@@ -292,11 +289,9 @@ def check_min_val_change(data: pl.DataFrame, target_gauge_col: str, expected_min
         List of years with minimum value changes.
 
     """
-    # 1. Filter out non-zero years
-    data_non_zero = data.filter(pl.col(target_gauge_col) > 0)
-
-    # 2. Get minimum value each year
-    data_min_by_year = data_non_zero.group_by_dynamic(pl.col("time"), every="1y").agg(pl.col(target_gauge_col).min())
+    # 1. Get minimum non-zero value each year (NaN if only missing values are above zero)
+    annual_statistics = data_utils.get_annual_statistics(data, target_gauge_col)
 
-    non_res_years = data_min_by_year.filter(pl.col(target_gauge_col) != expected_min_val)
-    return non_res_years["time"].dt.year().to_list()
+    # 2. Get years where the minimum is not the expected value (skipping years without values above zero)
+    non_res_years = annual_statistics.filter(pl.col("min_non_zero") != expected_min_val)
+    return non_res_years["year"].to_list()
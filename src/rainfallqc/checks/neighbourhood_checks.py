@@ -24,6 +24,7 @@ def check_wet_neighbours_daily(
     wet_threshold: int | float,
     min_n_neighbours: int,
     n_neighbours_ignored: int = 0,
+    wet_day_statistics: dict = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious large values by comparison to neighbour for daily data.
@@ -50,6 +51,8 @@ def check_wet_neighbours_daily(
         Minimum number of neighbours needed to be checked for flag
     n_neighbours_ignored :
         Number of zero flags allowed for majority voting (default: 0)
+    wet_day_statistics :
+        Whole record statistics of each neighbour from 'get_neighbour_wet_day_statistics' (default: computed from data)
 
     Returns
     -------
@@ -71,7 +74,11 @@ def check_wet_neighbours_daily(
         # 2.1 Flag data based on comparison of wet values in neighbours
         try:
             one_neighbour_data_wet_flags = flag_wet_day_errors_based_on_neighbours(
-                neighbour_data, target_gauge_col, nearest_neighbour, wet_threshold
+                neighbour_data,
+                target_gauge_col,
+                nearest_neighbour,
+                wet_threshold,
+                wet_day_statistics=(wet_day_statistics or {}).get(nearest_neighbour),
             )
         except ValueError as ve:
             list_of_nearest_stations_new.remove(nearest_neighbour)
@@ -117,6 +124,8 @@ def check_wet_neighbours_hourly(
     n_neighbours_ignored: int = 0,
     hour_offset: int = 0,
     min_count: int = None,
+    daily_neighbour_data: pl.DataFrame = None,
+    wet_day_statistics: dict = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious large values by comparison to neighbour for hourly or 15-min data.
@@ -149,6 +158,10 @@ def check_wet_neighbours_hourly(
         Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
     min_count :
         Minimum number of time steps needed per time period (default: 2)
+    daily_neighbour_data :
+        Neighbour data already resampled with 'resample_neighbour_data_to_daily' (default: resampled here)
+    wet_day_statistics :
+        Whole record statistics of each neighbour from 'get_neighbour_wet_day_statistics' (default: computed from data)
 
     Returns
     -------
@@ -165,20 +178,11 @@ def check_wet_neighbours_hourly(
         list_of_nearest_stations_new.remove(target_gauge_col)
     check_nearest_neighbour_columns(neighbour_data, target_gauge_col, list_of_nearest_stations_new)
 
-    # 1. Resample to daily
-    if time_res in ["15m", "hourly"]:
-        rain_cols = neighbour_data.columns[1:]  # get rain columns
-        original_neighbour_data = neighbour_data.clone()
-        if not min_count:
-            min_count = np.ceil(data_readers.DAILY_MULTIPLYING_FACTORS[time_res] / 2)
-        neighbour_data = data_utils.resample_data_by_time_step(
-            neighbour_data,
-            rain_cols=rain_cols,
-            time_col="time",
-            time_step="1d",
-            min_count=min_count,
-            hour_offset=hour_offset,
-        )
+    # 1. Resample to daily, if not given
+    original_neighbour_data = neighbour_data
+    if daily_neighbour_data is None:
+        daily_neighbour_data = resample_neighbour_data_to_daily(neighbour_data, time_res, hour_offset, min_count)
+    neighbour_data = daily_neighbour_data
 
     # 2. Loop through each neighbour and get wet_flags
     list_of_nearest_stations_iterable = list_of_nearest_stations_new.copy()  # make copy again to allow removal in loop
@@ -186,7 +190,11 @@ def check_wet_neighbours_hourly(
         # 2.1 Flag data based on comparison of wet values in neighbours
         try:
             one_neighbour_data_wet_flags = flag_wet_day_errors_based_on_neighbours(
-                neighbour_data, target_gauge_col, nearest_neighbour, wet_threshold
+                neighbour_data,
+                target_gauge_col,
+                nearest_neighbour,
+                wet_threshold,
+                wet_day_statistics=(wet_day_statistics or {}).get(nearest_neighbour),
             )
         except ValueError as ve:
             list_of_nearest_stations_new.remove(nearest_neighbour)
@@ -351,6 +359,7 @@ def check_dry_neighbours_hourly(
     n_neighbours_ignored: int = 0,
     hour_offset: int = 0,
     min_count: int = None,
+    daily_neighbour_data: pl.DataFrame = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious dry periods by comparison to neighbour for hourly or 15-min data.
@@ -383,6 +392,8 @@ def check_dry_neighbours_hourly(
         Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
     min_count :
         Minimum number of time steps needed per time period (default: 1)
+    daily_neighbour_data :
+        Neighbour data already resampled with 'resample_neighbour_data_to_daily' (default: resampled here)
 
     Returns
     -------
@@ -402,20 +413,11 @@ def check_dry_neighbours_hourly(
     # 1. Get proportions of dry period required to be flagged 1, 2, or 3
     dry_period_proportions = data_utils.get_dry_period_proportions(dry_period_days)
 
-    # 2. Resample to daily
-    if time_res in ["15m", "hourly"]:
-        if not min_count:
-            min_count = np.ceil(data_readers.DAILY_MULTIPLYING_FACTORS[time_res] / 2)
-        rain_cols = neighbour_data.columns[1:]  # get rain columns
-        original_neighbour_data = neighbour_data.clone()
-        neighbour_data = data_utils.resample_data_by_time_step(
-            neighbour_data,
-            rain_cols=rain_cols,
-            time_col="time",
-            time_step="1d",
-            min_count=min_count,
-            hour_offset=hour_offset,
-        )
+    # 2. Resample to daily, if not given
+    original_neighbour_data = neighbour_data
+    if daily_neighbour_data is None:
+        daily_neighbour_data = resample_neighbour_data_to_daily(neighbour_data, time_res, hour_offset, min_count)
+    neighbour_data = daily_neighbour_data
 
     # 3. Loop through each neighbour and get dry_flags
     list_of_nearest_stations_iterable = list_of_nearest_stations_new.copy()  # make copy again to allow removal in loop
@@ -494,6 +496,8 @@ def check_monthly_neighbours(
     n_neighbours_ignored: int = 0,
     hour_offset: int = 0,
     min_count: int = None,
+    monthly_neighbour_data: pl.DataFrame = None,
+    neighbour_monthly_max: pl.DataFrame = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious monthly totals by comparison to neighbouring monthly gauges.
@@ -532,6 +536,10 @@ def check_monthly_neighbours(
         Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
     min_count :
         Minimum number of time steps needed per time period (default: will be half of possible time steps)
+    monthly_neighbour_data :
+        Neighbour data already resampled with 'resample_neighbour_data_to_monthly' (default: resampled here)
+    neighbour_monthly_max :
+        Whole record neighbour max of each month from 'get_neighbour_monthly_max' (default: computed from data)
 
     Returns
     -------
@@ -539,22 +547,10 @@ def check_monthly_neighbours(
         Target data with monthly flags
 
     """
-    # 0. Resample to monthly
-    if time_res in ["15m", "hourly", "daily"]:
-        data_utils.check_data_is_specific_time_res(neighbour_data, time_res=["15m", "1h", "1d"])
-        rain_cols = neighbour_data.columns[1:]  # get rain columns
-        original_neighbour_data = neighbour_data.clone()
-        if not min_count:
-            min_count = np.ceil(data_readers.MONTHLY_MULTIPLYING_FACTORS[time_res] / 2)
-        monthly_neighbour_data = data_utils.resample_data_by_time_step(
-            neighbour_data,
-            rain_cols=rain_cols,
-            time_col="time",
-            time_step="1mo",
-            min_count=min_count,
-            hour_offset=hour_offset,
-        )
-    monthly_neighbour_data = neighbour_data if time_res == "monthly" else monthly_neighbour_data
+    # 0. Resample to monthly, if not given
+    original_neighbour_data = neighbour_data
+    if monthly_neighbour_data is None:
+        monthly_neighbour_data = resample_neighbour_data_to_monthly(neighbour_data, time_res, hour_offset, min_count)
 
     data_utils.check_data_is_monthly(monthly_neighbour_data)
     list_of_nearest_stations_new = list_of_nearest_stations.copy()  # make copy
@@ -593,7 +589,7 @@ def check_monthly_neighbours(
 
     # 4. Calculate neighbour monthly max column
     monthly_neighbour_data_w_flags = make_neighbour_monthly_max_climatology(
-        monthly_neighbour_data_w_flags, list_of_nearest_stations_new
+        monthly_neighbour_data_w_flags, list_of_nearest_stations_new, neighbour_monthly_max=neighbour_monthly_max
     )
 
     # 5. Upgrade extreme wet flags to 4 or 5 based on excess of neighbour monthly max climatology
@@ -759,9 +755,12 @@ def check_neighbour_correlation(neighbour_data: pl.DataFrame, target_gauge_col:
     return stats.gauge_correlation(neighbour_data, target_col=target_gauge_col, other_col=nearest_neighbour)
 
 
-@qc_check("check_daily_factor", require_non_negative=True)
+@qc_check("check_daily_factor", require_non_negative=True, supports_lazy=True)
 def check_daily_factor(
-    neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str, averaging_method: str = "mean"
+    neighbour_data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    nearest_neighbour: str,
+    averaging_method: str = "mean",
 ) -> float:
     """
     Daily factor difference between target and neighbouring gauge.
@@ -805,15 +804,18 @@ def check_daily_factor(
     )
 
     if averaging_method == "mean":
-        return daily_factor_positive_vals["factor_diff"].mean()
+        average_daily_factor = pl.col("factor_diff").mean()
     elif averaging_method == "median":
-        return daily_factor_positive_vals["factor_diff"].median()
+        average_daily_factor = pl.col("factor_diff").median()
     else:
         raise ValueError(f"{averaging_method} not recognised, please use 'mean' or 'median'")
+    return data_utils.collect_if_lazy(daily_factor_positive_vals.select(average_daily_factor)).item()
 
 
-@qc_check("check_monthly_factor", require_non_negative=True)
-def check_monthly_factor(neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str) -> pl.DataFrame:
+@qc_check("check_monthly_factor", require_non_negative=True, supports_lazy=True)
+def check_monthly_factor(
+    neighbour_data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, nearest_neighbour: str
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Monthly factor difference between target and neighbouring gauge.
 
@@ -854,7 +856,7 @@ def check_monthly_factor(neighbour_data: pl.DataFrame, target_gauge_col: str, ne
     return monthly_factor_flags.select(["time", "monthly_factor_flag"])
 
 
-def flag_monthly_factor_differences(monthly_factor: pl.DataFrame) -> pl.DataFrame:
+def flag_monthly_factor_differences(monthly_factor: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
     """
     Flag monthly difference flag after IntenseQC framework for QC25.
 
@@ -900,7 +902,7 @@ def flag_monthly_factor_differences(monthly_factor: pl.DataFrame) -> pl.DataFram
 
 
 def make_neighbour_monthly_max_climatology(
-    monthly_neighbour_data: pl.DataFrame, list_of_nearest_stations: list
+    monthly_neighbour_data: pl.DataFrame, list_of_nearest_stations: list, neighbour_monthly_max: pl.DataFrame = None
 ) -> pl.DataFrame:
     """
     Make neighbourhood monthly max climatology.
@@ -911,6 +913,8 @@ def make_neighbour_monthly_max_climatology(
         Monthly rainfall data of neighbouring gauges with time col
     list_of_nearest_stations:
         List of columns with neighbouring gauges
+    neighbour_monthly_max :
+        Neighbour max of each month from 'get_neighbour_monthly_max' (default: computed from monthly_neighbour_data)
 
     Returns
     -------
@@ -924,16 +928,82 @@ def make_neighbour_monthly_max_climatology(
     # 2. Make month and year column
     monthly_neighbour_data = data_utils.make_month_and_year_col(monthly_neighbour_data)
 
-    # 3. Calculate neighbour max monthly climatology
-    monthly_neighbour_data_max = monthly_neighbour_data.group_by("month").agg(
+    # 3. Calculate neighbour max monthly climatology, if not given
+    if neighbour_monthly_max is None:
+        neighbour_monthly_max = calculate_neighbour_monthly_max(monthly_neighbour_data, list_of_nearest_stations)
+
+    # 4. Join neighbour max climatology back to data
+    monthly_neighbour_data = monthly_neighbour_data.join(neighbour_monthly_max, on="month")
+    return monthly_neighbour_data
+
+
+def calculate_neighbour_monthly_max(
+    monthly_neighbour_data: pl.DataFrame | pl.LazyFrame, list_of_nearest_stations: list
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Calculate the maximum of all neighbours for each month of the year.
+
+    Parameters
+    ----------
+    monthly_neighbour_data :
+        Monthly rainfall data of neighbouring gauges with time col and month col
+    list_of_nearest_stations:
+        List of columns with neighbouring gauges
+
+    Returns
+    -------
+    neighbour_monthly_max :
+        Data with 'month' and 'neighbour_max' columns
+
+    """
+    return monthly_neighbour_data.group_by("month").agg(
         pl.max_horizontal([pl.col(station_col).max() for station_col in list_of_nearest_stations]).alias(
             "neighbour_max"
         )
     )
 
-    # 4. Join neighbour max climatology back to data
-    monthly_neighbour_data = monthly_neighbour_data.join(monthly_neighbour_data_max, on="month")
-    return monthly_neighbour_data
+
+def get_neighbour_monthly_max(
+    neighbour_data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    list_of_nearest_stations: List[str],
+    time_res: str,
+    hour_offset: int = 0,
+    min_count: int = None,
+) -> pl.DataFrame:
+    """
+    Get the whole record neighbour max of each month, as used by the monthly neighbour check (QC20).
+
+    Computing this before running 'check_monthly_neighbours' on blocks of time keeps the flags of each block the same
+    as for the whole record.
+
+    Parameters
+    ----------
+    neighbour_data :
+        Rainfall data of neighbouring gauges with time col
+    target_gauge_col :
+        Target gauge column
+    list_of_nearest_stations:
+        List of columns with neighbouring gauges
+    time_res :
+        Time resolution of data (e.g. 'monthly' or 'daily', 'hourly' or '15m' - will be resampled to monthly)
+    hour_offset :
+        Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
+    min_count :
+        Minimum number of time steps needed per time period (default: will be half of possible time steps)
+
+    Returns
+    -------
+    neighbour_monthly_max :
+        Data with 'month' and 'neighbour_max' columns
+
+    """
+    list_of_nearest_stations_new = [col for col in list_of_nearest_stations if col != target_gauge_col]
+    monthly_neighbour_data = resample_neighbour_data_to_monthly(neighbour_data, time_res, hour_offset, min_count)
+    monthly_neighbour_data = data_utils.make_month_and_year_col(monthly_neighbour_data)
+    return data_utils.collect_if_lazy(
+        calculate_neighbour_monthly_max(monthly_neighbour_data, list_of_nearest_stations_new)
+    )
 
 
 def upgrade_monthly_flag_using_neighbour_max_climatology(
@@ -1060,6 +1130,80 @@ def get_majority_positive_or_negative_flags(
     return monthly_neighbour_data.join(monthly_neighbour_data_w_flags, on="time", how="left")
 
 
+def resample_neighbour_data_to_daily(
+    neighbour_data: pl.DataFrame | pl.LazyFrame, time_res: str, hour_offset: int = 0, min_count: int = None
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Resample hourly or 15-min neighbour data to daily, as used by the hourly wet and dry neighbour checks.
+
+    Parameters
+    ----------
+    neighbour_data :
+        Rainfall data of neighbouring gauges with time col
+    time_res :
+        Time resolution of data (hourly or 15m)
+    hour_offset :
+        Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
+    min_count :
+        Minimum number of time steps needed per day (default: will be half of possible time steps)
+
+    Returns
+    -------
+    daily_neighbour_data :
+        Daily rainfall data of neighbouring gauges
+
+    """
+    assert time_res in ["15m", "hourly"], f"time_res arg needs to be 'hourly' or '15m'. Currently: {time_res}"
+    if not min_count:
+        min_count = np.ceil(data_readers.DAILY_MULTIPLYING_FACTORS[time_res] / 2)
+    return data_utils.resample_data_by_time_step(
+        neighbour_data,
+        rain_cols=neighbour_data.collect_schema().names()[1:],  # get rain columns
+        time_col="time",
+        time_step="1d",
+        min_count=min_count,
+        hour_offset=hour_offset,
+    )
+
+
+def resample_neighbour_data_to_monthly(
+    neighbour_data: pl.DataFrame | pl.LazyFrame, time_res: str, hour_offset: int = 0, min_count: int = None
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Resample 15-min, hourly or daily neighbour data to monthly, as used by the monthly neighbour check.
+
+    Parameters
+    ----------
+    neighbour_data :
+        Rainfall data of neighbouring gauges with time col
+    time_res :
+        Time resolution of data (e.g. 'monthly' or 'daily', 'hourly' or '15m')
+    hour_offset :
+        Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
+    min_count :
+        Minimum number of time steps needed per month (default: will be half of possible time steps)
+
+    Returns
+    -------
+    monthly_neighbour_data :
+        Monthly rainfall data of neighbouring gauges (the data itself if already monthly)
+
+    """
+    if time_res == "monthly":
+        return neighbour_data
+    data_utils.check_data_is_specific_time_res(neighbour_data, time_res=["15m", "1h", "1d"])
+    if not min_count:
+        min_count = np.ceil(data_readers.MONTHLY_MULTIPLYING_FACTORS[time_res] / 2)
+    return data_utils.resample_data_by_time_step(
+        neighbour_data,
+        rain_cols=neighbour_data.collect_schema().names()[1:],  # get rain columns
+        time_col="time",
+        time_step="1mo",
+        min_count=min_count,
+        hour_offset=hour_offset,
+    )
+
+
 def get_dry_spell_fraction_col(
     neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str, dry_period_days: int
 ) -> pl.DataFrame:
@@ -1306,7 +1450,11 @@ def make_num_neighbours_online_col(neighbour_data: pl.DataFrame, list_of_nearest
 
 
 def flag_wet_day_errors_based_on_neighbours(
-    neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str, wet_threshold: float
+    neighbour_data: pl.DataFrame,
+    target_gauge_col: str,
+    nearest_neighbour: str,
+    wet_threshold: float,
+    wet_day_statistics: dict = None,
 ) -> pl.DataFrame:
     """
     Flag wet days with errors based on the percentile difference with neighbouring gauge.
@@ -1321,38 +1469,165 @@ def flag_wet_day_errors_based_on_neighbours(
         Neighbouring gauge column
     wet_threshold :
         Threshold for rainfall intensity in given time period
+    wet_day_statistics :
+        Statistics of target and neighbour from 'get_wet_day_statistics' (default: computed from neighbour_data)
 
     Returns
     -------
     neighbour_data_wet_flags :
         Data with wet flags
 
+    Raises
+    ------
+    ValueError :
+        If the statistics cannot be computed for the neighbour
+
     """
-    # 1. Remove nans from target and neighbour
+    # 1. Get ranges and exponential fit of the normalised diff, if not given
+    if wet_day_statistics is None:
+        wet_day_statistics = get_wet_day_statistics(neighbour_data, target_gauge_col, nearest_neighbour, wet_threshold)
+    elif "error" in wet_day_statistics:
+        raise ValueError(wet_day_statistics["error"])
+
+    # 2. Remove nans from target and neighbour
     neighbour_data_clean = neighbour_data.drop_nans(subset=[target_gauge_col, nearest_neighbour])
 
-    # 2. Get normalised difference between target and neighbour
+    # 3. Get normalised difference between target and neighbour
     neighbour_data_diff = normalised_diff_between_target_neighbours(
-        neighbour_data_clean, target_gauge_col=target_gauge_col, nearest_neighbour=nearest_neighbour
+        neighbour_data_clean,
+        target_gauge_col=target_gauge_col,
+        nearest_neighbour=nearest_neighbour,
+        data_ranges=wet_day_statistics["data_ranges"],
     )
-    # 3. filter wet values
-    neighbour_data_filtered_diff = filter_data_based_on_unusual_wetness(
+
+    # 4. Assign flags
+    all_neighbour_data_wet_flags = add_wet_flags_to_data(
         neighbour_data_diff,
+        target_gauge_col,
+        nearest_neighbour,
+        wet_day_statistics["expon_percentiles"],
+        wet_threshold,
+    )
+    return all_neighbour_data_wet_flags
+
+
+def get_wet_day_statistics(
+    neighbour_data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, nearest_neighbour: str, wet_threshold: float
+) -> dict:
+    """
+    Get the ranges of target and neighbour and the exponential fit of their normalised difference on wet days.
+
+    Parameters
+    ----------
+    neighbour_data :
+        Rainfall data of all neighbouring gauges with time col
+    target_gauge_col :
+        Target gauge column
+    nearest_neighbour:
+        Neighbouring gauge column
+    wet_threshold :
+        Threshold for rainfall intensity in given time period
+
+    Returns
+    -------
+    wet_day_statistics :
+        'data_ranges' with min and max of target and neighbour, and 'expon_percentiles' with q95, q99 and q999 of the
+        normalised difference
+
+    """
+    # 1. Remove nans from target and neighbour
+    neighbour_data_clean = neighbour_data.drop_nans(subset=[target_gauge_col, nearest_neighbour])
+
+    # 2. Get min and max of target and neighbour to normalise data with
+    data_ranges = data_utils.collect_if_lazy(
+        neighbour_data_clean.select(
+            [
+                agg(col).alias(f"{col}_{agg.__name__}")
+                for col in [target_gauge_col, nearest_neighbour]
+                for agg in [pl.min, pl.max]
+            ]
+        )
+    ).row(0, named=True)
+
+    # 3. Get normalised difference between target and neighbour
+    neighbour_data_diff = normalised_diff_between_target_neighbours(
+        neighbour_data_clean,
         target_gauge_col=target_gauge_col,
         nearest_neighbour=nearest_neighbour,
-        wet_threshold=wet_threshold,
+        data_ranges=data_ranges,
+    )
+
+    # 4. filter wet values
+    neighbour_data_filtered_diff = data_utils.collect_if_lazy(
+        filter_data_based_on_unusual_wetness(
+            neighbour_data_diff,
+            target_gauge_col=target_gauge_col,
+            nearest_neighbour=nearest_neighbour,
+            wet_threshold=wet_threshold,
+        ).select(f"diff_{nearest_neighbour}")
     )
 
-    # 4. Fit exponential function of normalised diff and get q95, q99 and q999
+    # 5. Fit exponential function of normalised diff and get q95, q99 and q999
     expon_percentiles = stats.fit_expon_and_get_percentile(
         neighbour_data_filtered_diff[f"diff_{nearest_neighbour}"], percentiles=[0.95, 0.99, 0.999]
     )
+    return {"data_ranges": data_ranges, "expon_percentiles": expon_percentiles}
 
-    # 5. Assign flags
-    all_neighbour_data_wet_flags = add_wet_flags_to_data(
-        neighbour_data_diff, target_gauge_col, nearest_neighbour, expon_percentiles, wet_threshold
-    )
-    return all_neighbour_data_wet_flags
+
+def get_neighbour_wet_day_statistics(
+    neighbour_data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    list_of_nearest_stations: List[str],
+    wet_threshold: int | float,
+    time_res: str = "daily",
+    hour_offset: int = 0,
+    min_count: int = None,
+) -> dict:
+    """
+    Get the whole record wet day statistics of each neighbour, as used by the wet neighbour checks (QC16 & QC17).
+
+    Computing these before running the wet neighbour checks on blocks of time keeps the flags of each block the same
+    as for the whole record.
+
+    Parameters
+    ----------
+    neighbour_data :
+        Rainfall data of neighbouring gauges with time col
+    target_gauge_col :
+        Target gauge column
+    list_of_nearest_stations:
+        List of columns with neighbouring gauges
+    wet_threshold :
+        Threshold for rainfall intensity in given time period
+    time_res :
+        Time resolution of data, hourly and 15m data is resampled to daily (default: 'daily')
+    hour_offset :
+        Time offset of hourly data in hours (i.e. if 7am-7am, then set this to 7) (default: 0)
+    min_count :
+        Minimum number of time steps needed per day (default: will be half of possible time steps)
+
+    Returns
+    -------
+    wet_day_statistics :
+        Statistics from 'get_wet_day_statistics' for each neighbour, or {'error': ...} if they cannot be computed
+
+    """
+    # 1. Resample to daily, if needed
+    if time_res in ["15m", "hourly"]:
+        neighbour_data = resample_neighbour_data_to_daily(neighbour_data, time_res, hour_offset, min_count)
+
+    # 2. Get statistics of each neighbour
+    wet_day_statistics = {}
+    for nearest_neighbour in list_of_nearest_stations:
+        if nearest_neighbour == target_gauge_col:
+            continue
+        try:
+            wet_day_statistics[nearest_neighbour] = get_wet_day_statistics(
+                neighbour_data, target_gauge_col, nearest_neighbour, wet_threshold
+            )
+        except ValueError as ve:
+            wet_day_statistics[nearest_neighbour] = {"error": str(ve)}
+    return wet_day_statistics
 
 
 def add_wet_flags_to_data(
@@ -1447,7 +1722,7 @@ def filter_data_based_on_unusual_wetness(
 
 
 def normalised_diff_between_target_neighbours(
-    neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str
+    neighbour_data: pl.DataFrame, target_gauge_col: str, nearest_neighbour: str, data_ranges: dict = None
 ) -> pl.DataFrame:
     """
     Normalised difference between target rain col and neighbouring rain col.
@@ -1460,6 +1735,8 @@ def normalised_diff_between_target_neighbours(
         Target gauge column
     nearest_neighbour :
         Neighbouring gauge column
+    data_ranges :
+        Min and max of each column to normalise with i.e. {'<col>_min': 0.0, '<col>_max': 10.0} (default: of data)
 
     Returns
     -------
@@ -1467,9 +1744,19 @@ def normalised_diff_between_target_neighbours(
         Data with normalised diff to each neighbour
 
     """
+    data_ranges = data_ranges or {}
     return neighbour_data.with_columns(
         (
-            data_utils.normalise_data(pl.col(target_gauge_col)) - data_utils.normalise_data(pl.col(nearest_neighbour))
+            data_utils.normalise_data(
+                pl.col(target_gauge_col),
+                data_min=data_ranges.get(f"{target_gauge_col}_min"),
+                data_max=data_ranges.get(f"{target_gauge_col}_max"),
+            )
+            - data_utils.normalise_data(
+                pl.col(nearest_neighbour),
+                data_min=data_ranges.get(f"{nearest_neighbour}_min"),
+                data_max=data_ranges.get(f"{nearest_neighbour}_max"),
+            )
         ).alias(f"diff_{nearest_neighbour}")
     )
 
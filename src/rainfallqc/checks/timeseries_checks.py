@@ -7,19 +7,27 @@ Time-series checks are defined as QC checks that: "detect abnormalities in patte
 Classes and functions ordered by appearance in IntenseQC framework.
 """
 
+import warnings
+
 import numpy as np
 import polars as pl
 import xarray as xr
 
 from rainfallqc.core.all_qc_checks import qc_check
-from rainfallqc.utils import data_readers, data_utils, neighbourhood_utils, spatial_utils, stats
+from rainfallqc.utils import data_utils, gauge_climatology, stats
 
 DAILY_DIVIDING_FACTOR = {"15m": 96, "1h": 24, "1d": 1, "hourly": 24, "daily": 1}
 
 
 @qc_check("check_dry_period_cdd", require_non_negative=True)
 def check_dry_period_cdd(
-    data: pl.DataFrame, target_gauge_col: str, time_res: str, gauge_lat: int | float, gauge_lon: int | float
+    data: pl.DataFrame,
+    target_gauge_col: str,
+    time_res: str,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    gauge_dry_spell_lengths: pl.DataFrame = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> pl.DataFrame:
     """
     Identify suspiciously long dry periods in time-series using the ETCCDI Consecutive Dry Days (CDD) index.
@@ -38,6 +46,10 @@ def check_dry_period_cdd(
         latitude of the rain gauge
     gauge_lon :
         longitude of the rain gauge
+    gauge_dry_spell_lengths :
+        Dry spell durations of data from 'get_dry_spell_duration' (default: computed from data)
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
@@ -48,33 +60,25 @@ def check_dry_period_cdd(
     if time_res != "15m" and time_res != "daily" and time_res != "hourly":
         raise ValueError("time_res must be 'daily' or 'hourly'")
 
-    # 1. Load CDD data
-    etccdi_cdd = data_readers.load_etccdi_data(etccdi_var="CDD")
-
-    # 2. Make dry spell days column from ETCCDI data
-    etccdi_cdd_days = compute_dry_spell_days(etccdi_cdd)
+    # 1. Get local maximum ETCCDI CDD value (in days) nearest to the gauge coordinates
+    if climatology is None:
+        climatology = gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon)
+    max_etccdi_cdd_days = climatology.get_etccdi_value("CDD")
 
-    # 3. Get nearest local CDD value to the gauge coordinates
-    nearby_etccdi_cdd_days = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
-        etccdi_cdd_days, etccdi_name="CDD", gauge_lat=gauge_lat, gauge_lon=gauge_lon
-    )
-
-    # 4. Get local maximum CDD_days value
-    max_etccdi_cdd_days = np.max(nearby_etccdi_cdd_days["CDD_days"])
-
-    # 5. Get dry spell durations (with start and end dates)
-    gauge_dry_spell_lengths = get_dry_spell_duration(data, target_gauge_col)
+    # 2. Get dry spell durations (with start and end dates), if not given
+    if gauge_dry_spell_lengths is None:
+        gauge_dry_spell_lengths = get_dry_spell_duration(data, target_gauge_col)
 
-    # 6. Flag dry spells
+    # 3. Flag dry spells
     gauge_dry_spell_lengths_flags = flag_dry_spell_duration(gauge_dry_spell_lengths, max_etccdi_cdd_days, time_res)
 
-    # 7. Join data back to main data and flag
+    # 4. Join data back to main data and flag
     data_w_dry_spell_flags = join_dry_spell_data_back_to_original(data, gauge_dry_spell_lengths_flags)
 
-    # 8. Join rain col back
+    # 5. Join rain col back
     data_w_dry_spell_flags = data_w_dry_spell_flags.with_columns(pl.lit(data[target_gauge_col]).alias(target_gauge_col))
 
-    # 9. Remove unnecessary columns
+    # 6. Remove unnecessary columns
     return data_w_dry_spell_flags.select(["time", "dry_spell_flag"])
 
 
@@ -82,11 +86,12 @@ def check_dry_period_cdd(
 def check_daily_accumulations(
     data: pl.DataFrame,
     target_gauge_col: str,
-    gauge_lat: int | float,
-    gauge_lon: int | float,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
     wet_day_threshold: int | float = 1.0,
     accumulation_multiplying_factor: int | float = 2.0,
     accumulation_threshold: float = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious periods where an hour of rainfall is preceded by 23 hours with no rain.
@@ -113,6 +118,8 @@ def check_daily_accumulations(
         Factor to multiply SDII value for to identify an accumulation of rain recordings
     accumulation_threshold :
         Rain accumulation for detecting possible daily accumulations
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
@@ -144,6 +151,7 @@ def check_daily_accumulations(
             gauge_lon=gauge_lon,
             wet_day_threshold=wet_day_threshold,
             accumulation_multiplying_factor=accumulation_multiplying_factor,
+            climatology=climatology,
         )
 
     # 2. Flag daily (24 hour) accumulations in hourly data based on SDII threshold
@@ -172,12 +180,14 @@ def check_daily_accumulations(
 def check_monthly_accumulations(
     data: pl.DataFrame,
     target_gauge_col: str,
-    gauge_lat: int | float,
-    gauge_lon: int | float,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
     min_dry_spell_duration_in_days: int = 28,
     wet_day_threshold: int | float = 1.0,
     accumulation_multiplying_factor: int | float = 2.0,
     accumulation_threshold: float = None,
+    gauge_dry_spell_lengths: pl.DataFrame = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> pl.DataFrame:
     """
     Identify suspicious periods when an hour of rainfall is preceded by 1 month with no rain.
@@ -208,6 +218,10 @@ def check_monthly_accumulations(
         Factor to multiply SDII value for to identify an accumulation of rain recordings (default is 2)
     accumulation_threshold :
         Rain accumulation for detecting possible monthly accumulations
+    gauge_dry_spell_lengths :
+        Dry spell durations of data from 'get_dry_spell_duration' (default: computed from data)
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
@@ -236,10 +250,11 @@ def check_monthly_accumulations(
             gauge_lon=gauge_lon,
             wet_day_threshold=wet_day_threshold,
             accumulation_multiplying_factor=accumulation_multiplying_factor,
+            climatology=climatology,
         )
 
     # 2. Get info about dry spells in rainfall record
-    gauge_dry_spell_info = get_dry_spell_info(data, target_gauge_col)
+    gauge_dry_spell_info = get_dry_spell_info(data, target_gauge_col, gauge_dry_spell_lengths=gauge_dry_spell_lengths)
 
     # 3. Get possible accumulations
     gauge_data_possible_accumulations = get_possible_accumulations(
@@ -273,6 +288,7 @@ def check_streaks(
     gauge_lon: int | float,
     smallest_measurable_rainfall_amount: float,
     accumulation_threshold: float = None,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> pl.DataFrame:
     """
     Check for suspected repeated values.
@@ -299,6 +315,8 @@ def check_streaks(
         Resolution of rainfall data (i.e. minimum rainfall recording).
     accumulation_threshold :
         Rain accumulation for detecting possible monthly accumulations
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
@@ -326,37 +344,38 @@ def check_streaks(
             gauge_lon=gauge_lon,
             wet_day_threshold=1.0,
             accumulation_multiplying_factor=2.0,
+            climatology=climatology,
         )
         accumulation_threshold = hourly_accumulation_threshold / time_multiplier
 
-    # 2. Get streaks of repeated values
-    streak_data = get_streaks_of_repeated_values(data, target_gauge_col)
+    # 2. Get streaks of repeated values, as a run table
+    streak_runs = data_utils.get_run_table(data, target_gauge_col)
 
     # 3. Flag streaks of 2 or more repeated large values exceeding 2 * mean wet day rainfall (from ETCCDI SDII)
-    streak_flag1 = flag_streaks_exceeding_wet_day_rainfall_threshold(
-        streak_data, target_gauge_col, streak_length=2, accumulation_threshold=accumulation_threshold
+    streak_runs = flag_streak_runs_above_threshold(
+        streak_runs, streak_length=2, value_threshold=accumulation_threshold, flag_col="streak_flag1", flag=1
     )
 
     # 4. Flag streaks of 12 or more greater than smallest measurable rainfall amount
-    streak_flag3 = flag_streaks_exceeding_smallest_measurable_rainfall_amount(
-        streak_data,
-        target_gauge_col,
+    streak_runs = flag_streak_runs_above_threshold(
+        streak_runs,
         streak_length=12 * time_multiplier,
-        smallest_measurable_rainfall_amount=smallest_measurable_rainfall_amount,
+        value_threshold=smallest_measurable_rainfall_amount,
+        flag_col="streak_flag3",
+        flag=3,
     )
 
     # 5. Flag streaks of 24 or more greater than zero
-    streak_flag4 = flag_streaks_exceeding_zero(streak_data, target_gauge_col, streak_length=24 * time_multiplier)
+    streak_runs = flag_streak_runs_above_threshold(
+        streak_runs, streak_length=24 * time_multiplier, value_threshold=0.0, flag_col="streak_flag4", flag=4
+    )
 
     # 6. Flag periods of zeros bounded by streaks of multiples of 24
-    streak_flag5 = flag_streaks_of_zero_bounded_by_days(streak_data, target_gauge_col, time_res=time_step)
+    streak_runs = flag_dry_runs_bounded_by_days(streak_runs, time_res=time_step)
 
-    # 7. Join flags together
+    # 7. Join flags of each streak to data
     data_w_streak_flags = data.with_columns(
-        streak_flag1=streak_flag1["streak_flag1"],
-        streak_flag3=streak_flag3["streak_flag3"],
-        streak_flag4=streak_flag4["streak_flag4"],
-        streak_flag5=streak_flag5["streak_flag5"],
+        data_utils.expand_run_table(streak_runs, ["streak_flag1", "streak_flag3", "streak_flag4", "streak_flag5"])
     )
 
     # 8. Convert back to 15-min data if needed
@@ -390,57 +409,47 @@ def flag_streaks_of_zero_bounded_by_days(data: pl.DataFrame, target_gauge_col: s
     streaks_w_flag5 :
         Data with streak flag 5.
 
+    """
+    # 1. Flag streaks of zeros
+    streak_runs = flag_dry_runs_bounded_by_days(data_utils.get_run_table(data, target_gauge_col), time_res=time_res)
+
+    # 2. Label original data
+    return data.with_columns(data_utils.expand_run_table(streak_runs, "streak_flag5"))
+
+
+def flag_dry_runs_bounded_by_days(run_table: pl.DataFrame, time_res: str) -> pl.DataFrame:
+    """
+    Flag runs of zeros that are a multiple of 24 hours and next to a run of at least 24 hours.
+
+    Parameters
+    ----------
+    run_table :
+        Runs of repeated values from 'data_utils.get_run_table'.
+    time_res :
+        Time resolution: "1h", "15m", "1d", or "hourly", "daily"
+
+    Returns
+    -------
+    run_table_w_flag5 :
+        Run table with streak flag 5.
+
     """
     # 0. Check time resolution is expected
     if time_res not in DAILY_DIVIDING_FACTOR:
         raise ValueError(f"Unsupported time resolution: {time_res}. Use one of {list(DAILY_DIVIDING_FACTOR.keys())}")
-
     intervals_per_day = DAILY_DIVIDING_FACTOR[time_res]
-    # 1. group of streaks
-    data_streak_groups = (
-        data.group_by("streak_id")
-        .agg(streak_len=pl.len(), rain_amount=pl.col(target_gauge_col).first())
-        .sort(by="streak_id")
-    )
 
-    # 2. get dry spells
-    streak_w_dry_spells = data_utils.get_dry_spells(data_streak_groups, target_gauge_col="rain_amount")
-
-    # 3. Flag streaks of multiples of 1 day
-    streaks_w_flag5 = streak_w_dry_spells.with_columns(
-        (
-            pl.when(
-                (pl.col("is_dry") == 1)
-                & (pl.col("streak_len") % intervals_per_day == 0)
-                & (pl.col("streak_len").shift(-1) >= intervals_per_day)
-            )
-            .then(1)
-            .otherwise(0)
-            .alias("streak_flag5_next")
-        ),
-        (
-            pl.when(
-                (pl.col("is_dry") == 1)
-                & (pl.col("streak_len") % intervals_per_day == 0)
-                & (pl.col("streak_len").shift(1) >= intervals_per_day)
-            )
-            .then(1)
-            .otherwise(0)
-            .alias("streak_flag5_prev")
-        ),
-    )
-
-    # 4. Filter out only streaks where next or previous are multiples of 24
-    streaks_w_flag5 = streaks_w_flag5.filter((pl.col("streak_flag5_next") == 1) | (pl.col("streak_flag5_prev") == 1))
-
-    # 2. Label original data
-    data_w_flags = data.with_columns(
-        pl.when(pl.col("streak_id").is_in(streaks_w_flag5["streak_id"].unique().to_list()))
+    # 1. Flag dry runs of multiples of 1 day, where the next or previous run is at least 1 day
+    is_dry_days = pl.col("is_dry") & (pl.col("run_len") % intervals_per_day == 0)
+    return run_table.with_columns(
+        pl.when(
+            (is_dry_days & (pl.col("run_len").shift(-1) >= intervals_per_day))
+            | (is_dry_days & (pl.col("run_len").shift(1) >= intervals_per_day))
+        )
         .then(5)
         .otherwise(0)
         .alias("streak_flag5")
     )
-    return data_w_flags
 
 
 def flag_streaks_exceeding_zero(data: pl.DataFrame, target_gauge_col: str, streak_length: int) -> pl.DataFrame:
@@ -463,16 +472,12 @@ def flag_streaks_exceeding_zero(data: pl.DataFrame, target_gauge_col: str, strea
 
     """
     # 1. Get streak above length and exceeding zero
-    streaks_exceeding_zero = get_streaks_above_threshold(data, target_gauge_col, streak_length, 0.0)
+    streak_runs = flag_streak_runs_above_threshold(
+        data_utils.get_run_table(data, target_gauge_col), streak_length, 0.0, flag_col="streak_flag4", flag=4
+    )
 
     # 2. Label original data
-    data_w_flags = data.with_columns(
-        pl.when(pl.col("streak_id").is_in(streaks_exceeding_zero["streak_id"].unique().to_list()))
-        .then(4)
-        .otherwise(0)
-        .alias("streak_flag4")
-    )
-    return data_w_flags
+    return data.with_columns(data_utils.expand_run_table(streak_runs, "streak_flag4"))
 
 
 def flag_streaks_exceeding_smallest_measurable_rainfall_amount(
@@ -499,20 +504,16 @@ def flag_streaks_exceeding_smallest_measurable_rainfall_amount(
 
     """
     # 1. Get streak above length and smallest measurable rainfall amount
-    streaks_above_smallest_measurable_rainfall_amount = get_streaks_above_threshold(
-        data, target_gauge_col, streak_length, smallest_measurable_rainfall_amount
+    streak_runs = flag_streak_runs_above_threshold(
+        data_utils.get_run_table(data, target_gauge_col),
+        streak_length,
+        smallest_measurable_rainfall_amount,
+        flag_col="streak_flag3",
+        flag=3,
     )
 
     # 2. Label original data
-    data_w_flags = data.with_columns(
-        pl.when(
-            pl.col("streak_id").is_in(streaks_above_smallest_measurable_rainfall_amount["streak_id"].unique().to_list())
-        )
-        .then(3)
-        .otherwise(0)
-        .alias("streak_flag3")
-    )
-    return data_w_flags
+    return data.with_columns(data_utils.expand_run_table(streak_runs, "streak_flag3"))
 
 
 def flag_streaks_exceeding_wet_day_rainfall_threshold(
@@ -539,36 +540,71 @@ def flag_streaks_exceeding_wet_day_rainfall_threshold(
 
     """
     # 1. Get streak above length and accumulation threshold
-    streaks_above_accumulation = get_streaks_above_threshold(
-        data, target_gauge_col, streak_length, accumulation_threshold
+    streak_runs = flag_streak_runs_above_threshold(
+        data_utils.get_run_table(data, target_gauge_col),
+        streak_length,
+        accumulation_threshold,
+        flag_col="streak_flag1",
+        flag=1,
     )
 
     # 2. Label original data
-    data_w_flags = data.with_columns(
-        pl.when(pl.col("streak_id").is_in(streaks_above_accumulation["streak_id"].unique().to_list()))
-        .then(1)
+    return data.with_columns(data_utils.expand_run_table(streak_runs, "streak_flag1"))
+
+
+def flag_streak_runs_above_threshold(
+    run_table: pl.DataFrame, streak_length: int, value_threshold: int | float, flag_col: str, flag: int
+) -> pl.DataFrame:
+    """
+    Flag streaks of repeated values above given threshold.
+
+    Parameters
+    ----------
+    run_table :
+        Runs of repeated values from 'data_utils.get_run_table'.
+    streak_length :
+        Minimum length of streaks.
+    value_threshold :
+        Threshold to check.
+    flag_col :
+        Name of flag column.
+    flag :
+        Flag of streaks above threshold (otherwise 0).
+
+    Returns
+    -------
+    run_table_w_flag :
+        Run table with flag column.
+
+    """
+    return run_table.with_columns(
+        pl.when(
+            (pl.col("run_len") >= streak_length) & (pl.col("value") > float(value_threshold)) & ~pl.col("is_missing")
+        )
+        .then(flag)
         .otherwise(0)
-        .alias("streak_flag1")
+        .alias(flag_col)
     )
-    return data_w_flags
 
 
 def get_streaks_above_threshold(
     data: pl.DataFrame, target_gauge_col: str, streak_length: int, value_threshold: int | float
 ) -> pl.DataFrame:
     """
-        Get streak groups above given threshold.
+    Get streak groups above given threshold.
+
+    Deprecated: use 'data_utils.get_run_table' and 'flag_streak_runs_above_threshold' instead.
 
     Parameters
     ----------
     data :
-        Rainfall data with streak_id..
+        Rainfall data with time column.
     target_gauge_col :
         Column with rainfall data.
     streak_length :
         Minimum length of streaks.
     value_threshold :
-        Threshold to check .
+        Threshold to check.
 
     Returns
     -------
@@ -576,20 +612,24 @@ def get_streaks_above_threshold(
         Get all streaks above given value
 
     """
-    # 0. Cast threshold to float
-    value_threshold = float(value_threshold)
-
-    # 1. group of streaks
-    data_streak_groups = (
-        data.group_by("streak_id")
-        .agg(streak_len=pl.len(), rain_amount=pl.col(target_gauge_col).first())
-        .sort(by="streak_id")
+    warnings.warn(
+        "'get_streaks_above_threshold' is deprecated, use 'data_utils.get_run_table' and "
+        "'flag_streak_runs_above_threshold' instead",
+        DeprecationWarning,
+        stacklevel=2,
     )
-    # 2. Get streaks above streak length and threshold
-    streaks_above_accumulation = data_streak_groups.drop_nans().filter(
-        (pl.col("streak_len") >= streak_length) & (pl.col("rain_amount") > value_threshold)
+    # 1. Flag runs of repeated values above streak length and threshold
+    run_table = data_utils.get_run_table(data, target_gauge_col)
+    run_table = flag_streak_runs_above_threshold(
+        run_table, streak_length, value_threshold, flag_col="above_threshold", flag=1
+    )
+
+    # 2. Get streaks above streak length and threshold (numbered from 1 as in 'get_streaks_of_repeated_values')
+    return (
+        run_table.with_row_index("streak_id", offset=1)
+        .filter(pl.col("above_threshold") == 1)
+        .select("streak_id", streak_len="run_len", rain_amount="value")
     )
-    return streaks_above_accumulation
 
 
 def get_streaks_of_repeated_values(data: pl.DataFrame, data_col: str) -> pl.DataFrame:
@@ -698,26 +738,20 @@ def fill_in_monthly_accumulation_flags(
         duration_to_remove = pl.duration(hours=max_dry_spell_duration)
     else:
         duration_to_remove = pl.duration(days=max_dry_spell_duration)
-    # 2. get monthly flag rows
-    flagged_rows = monthly_accumulation_flags.filter(pl.col("monthly_accumulation") > 0)
-    # 3. Fill in rows preceeding
-    for row in flagged_rows.iter_rows(named=True):
-        # Check dry spell is at least minimum for a month
-        if row["dry_spell_length"] >= min_dry_spell_duration:
-            # Check dry spell is at not over maximum for a month
-            if row["dry_spell_length"] <= max_dry_spell_duration:
-                dry_spell_start = row["dry_spell_start"]
-            else:
-                # fill in up to the maximum amount for the month
-                dry_spell_start = pl.select(row["dry_spell_end"] - duration_to_remove).item()
-            # Fill in values preceeding
-            monthly_accumulation_flags = monthly_accumulation_flags.with_columns(
-                pl.when((pl.col("time") <= row["dry_spell_end"]) & (pl.col("time") >= dry_spell_start))
-                .then(row["monthly_accumulation"])
-                .otherwise(pl.col("monthly_accumulation"))
-                .alias("monthly_accumulation")
-            )
-    return monthly_accumulation_flags
+    # 2. Get monthly flag rows with a dry spell of at least the minimum for a month
+    flagged_rows = monthly_accumulation_flags.filter(
+        (pl.col("monthly_accumulation") > 0) & (pl.col("dry_spell_length") >= min_dry_spell_duration)
+    )
+    # 3. Get preceeding dry spell, up to the maximum amount for the month
+    flag_intervals = flagged_rows.select(
+        start=pl.when(pl.col("dry_spell_length") <= max_dry_spell_duration)
+        .then(pl.col("dry_spell_start"))
+        .otherwise(pl.col("dry_spell_end") - duration_to_remove),
+        end=pl.col("dry_spell_end"),
+        value=pl.col("monthly_accumulation"),
+    )
+    # 4. Fill in values preceeding
+    return data_utils.paint_intervals(monthly_accumulation_flags, flag_intervals, data_col="monthly_accumulation")
 
 
 def get_surrounding_dry_spell_lengths(data: pl.DataFrame) -> pl.DataFrame:
@@ -822,58 +856,74 @@ def get_local_etccdi_sdii_mean(gauge_lat: int | float, gauge_lon: int | float) -
     Returns
     -------
     nearby_etccdi_sdii_mean :
-        Local mean SDII value
+        Local mean SDII value (from 'GaugeClimatology')
 
     """
-    # 1. Load SDII data
-    etccdi_sdii = data_readers.load_etccdi_data(etccdi_var="SDII")
-    # 2. Compute spatial mean
-    etccdi_sdii = spatial_utils.compute_spatial_mean_xr(etccdi_sdii, var_name="SDII")
-    # 3. Get nearest local CDD value to the gauge coordinates
-    nearby_etccdi_sdii = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
-        etccdi_sdii, etccdi_name="SDII", gauge_lat=gauge_lat, gauge_lon=gauge_lon
-    )
-    # 4. Get local maximum CDD_days value
-    nearby_etccdi_sdii_mean = np.max(nearby_etccdi_sdii["SDII_mean"])
-    return nearby_etccdi_sdii_mean
+    return gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon).get_etccdi_value("SDII")
 
 
 def flag_accumulation_periods(
-    data: pl.DataFrame, target_gauge_col: str, accumulation_threshold: float, accumulation_period_in_hours: int
+    data: pl.DataFrame,
+    target_gauge_col: str,
+    accumulation_threshold: float,
+    accumulation_period_in_hours: int,
+    time_res: str = "1h",
 ) -> np.ndarray:
     """
-    Flag accumulation in a given period of hourly data.
+    Flag accumulation in a given period of rainfall data.
 
-    TODO: make work for daily using: DAILY_DIVIDING_FACTOR
+    A period is flagged if its last value exceeds the accumulation threshold and all other values are 0 (see
+    'flag_n_hours_accumulation_based_on_threshold'), using rolling counts of dry time steps rather than a loop.
 
     Parameters
     ----------
     data :
-        Hourly rainfall data
+        Rainfall data
     target_gauge_col :
         Column with rainfall data
     accumulation_threshold :
         Rain accumulation for detecting possible period accumulations
     accumulation_period_in_hours :
         Accumulation period in hours
+    time_res :
+        Time resolution of data i.e. '15m', '1h' or '1d' (default is '1h')
 
     Returns
     -------
     pa_flags :
         Accumulation flags
 
+    Raises
+    ------
+    ValueError :
+        If the accumulation period is not a whole number of (at least 2) time steps of data
+
     """
-    # Note uses n-hour moving window
-    rain_vals = data[target_gauge_col]
-    pa_flags = np.zeros_like(rain_vals)
-    for i in range(len(rain_vals) - accumulation_period_in_hours):
-        period_rain_vals = rain_vals[i : i + accumulation_period_in_hours]
-        pa_flag = flag_n_hours_accumulation_based_on_threshold(
-            period_rain_vals, accumulation_threshold, n_hours=accumulation_period_in_hours
+    # 1. Get number of time steps in accumulation period
+    period_steps = accumulation_period_in_hours * DAILY_DIVIDING_FACTOR[time_res] / 24
+    if period_steps != int(period_steps) or period_steps < 2:
+        raise ValueError(
+            f"Accumulation period of {accumulation_period_in_hours} hours is not a whole number of (at least 2) "
+            f"time steps of {time_res} data."
         )
-        if pa_flag > max(pa_flags[i : i + accumulation_period_in_hours]):
-            pa_flags[i : i + accumulation_period_in_hours] = np.full(accumulation_period_in_hours, pa_flag)
-    return pa_flags
+    period_steps = int(period_steps)
+
+    # 2. Find the last time step of each accumulation period (missing values are neither dry nor accumulations).
+    # A period ending on the last time step of data is not flagged, as in the original moving window
+    rain_col = pl.col(target_gauge_col).cast(pl.Float64)
+    n_previous_dry_steps = (rain_col <= 0).cast(pl.Int32).rolling_sum(window_size=period_steps - 1).shift(1)
+    is_period_end = (
+        (n_previous_dry_steps == period_steps - 1)
+        & (rain_col > max(accumulation_threshold, 0))
+        & rain_col.is_not_nan()
+        & (pl.int_range(pl.len()) < pl.len() - 1)
+    ).fill_null(False)
+
+    # 3. Flag each time step in a period that ends within the next period_steps - 1 steps
+    pa_flags = data.select(
+        is_period_end.cast(pl.Float64).reverse().rolling_max(window_size=period_steps, min_samples=1).reverse()
+    )
+    return pa_flags.to_series().to_numpy()
 
 
 def flag_n_hours_accumulation_based_on_threshold(
@@ -942,6 +992,116 @@ def get_accumulation_threshold(
     return accumulation_threshold
 
 
+def get_daily_accumulation_threshold(
+    data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    wet_day_threshold: int | float = 1.0,
+    accumulation_multiplying_factor: int | float = 2.0,
+    climatology: gauge_climatology.GaugeClimatology = None,
+) -> float:
+    """
+    Get the whole record accumulation threshold, as used by the daily accumulation check (QC13).
+
+    Computing this before running 'check_daily_accumulations' on blocks of time keeps the flags of each block the same
+    as for the whole record.
+
+    Parameters
+    ----------
+    data :
+        Hourly or 15-min rainfall data
+    target_gauge_col :
+        Column with rainfall data
+    gauge_lat :
+        latitude of the rain gauge
+    gauge_lon :
+        longitude of the rain gauge
+    wet_day_threshold :
+        Threshold for rainfall intensity in one day (default is 1 mm)
+    accumulation_multiplying_factor :
+        Factor to multiply SDII value for to identify an accumulation of rain recordings
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
+
+    Returns
+    -------
+    accumulation_threshold :
+        Rain accumulation for detecting possible daily accumulations
+
+    """
+    # 1. Resample 15-min data to hourly, as done in the check
+    data = data_utils.collect_if_lazy(data.select(["time", target_gauge_col]))
+    time_step = data_utils.get_data_timestep_as_str(data)
+    if time_step == "15m":
+        data = data_utils.resample_data_by_time_step(
+            data, rain_cols=[target_gauge_col], time_col="time", time_step="1h", min_count=2, hour_offset=0
+        )
+
+    # 2. Get accumulation threshold from ETCCDI SDII value
+    return get_accumulation_threshold_from_etccdi(
+        data,
+        target_gauge_col,
+        time_res=time_step,
+        gauge_lat=gauge_lat,
+        gauge_lon=gauge_lon,
+        wet_day_threshold=wet_day_threshold,
+        accumulation_multiplying_factor=accumulation_multiplying_factor,
+        climatology=climatology,
+    )
+
+
+def get_monthly_accumulation_threshold(
+    data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    gauge_lat: int | float = None,
+    gauge_lon: int | float = None,
+    wet_day_threshold: int | float = 1.0,
+    accumulation_multiplying_factor: int | float = 2.0,
+    climatology: gauge_climatology.GaugeClimatology = None,
+) -> float:
+    """
+    Get the whole record accumulation threshold, as used by the monthly accumulation check (QC14).
+
+    Computing this before running 'check_monthly_accumulations' on blocks of time keeps the flags of each block the
+    same as for the whole record.
+
+    Parameters
+    ----------
+    data :
+        Daily or Hourly or 15 min rainfall data
+    target_gauge_col :
+        Column with rainfall data
+    gauge_lat :
+        latitude of the rain gauge
+    gauge_lon :
+        longitude of the rain gauge
+    wet_day_threshold :
+        Threshold for rainfall intensity in one day (default is 1 mm)
+    accumulation_multiplying_factor :
+        Factor to multiply SDII value for to identify an accumulation of rain recordings (default is 2)
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
+
+    Returns
+    -------
+    accumulation_threshold :
+        Rain accumulation for detecting possible monthly accumulations
+
+    """
+    data = data_utils.collect_if_lazy(data.select(["time", target_gauge_col]))
+    return get_accumulation_threshold_from_etccdi(
+        data,
+        target_gauge_col,
+        time_res=data_utils.get_data_timestep_as_str(data),
+        gauge_lat=gauge_lat,
+        gauge_lon=gauge_lon,
+        wet_day_threshold=wet_day_threshold,
+        accumulation_multiplying_factor=accumulation_multiplying_factor,
+        climatology=climatology,
+    )
+
+
 def get_accumulation_threshold_from_etccdi(
     data: pl.DataFrame,
     target_gauge_col: str,
@@ -950,6 +1110,7 @@ def get_accumulation_threshold_from_etccdi(
     gauge_lon: int | float,
     wet_day_threshold: float,
     accumulation_multiplying_factor: float,
+    climatology: gauge_climatology.GaugeClimatology = None,
 ) -> float:
     """
     Get rain accumulation threshold from ETCCDI data.
@@ -970,6 +1131,8 @@ def get_accumulation_threshold_from_etccdi(
         Threshold for rainfall intensity in one day (whether it is a wet day or not)
     accumulation_multiplying_factor :
         Factor to multiply SDII value for to identify an accumulation of rain recordings
+    climatology :
+        Local ETCCDI climatology of the gauge from 'GaugeClimatology' (default: looked up using gauge_lat and gauge_lon)
 
     Returns
     -------
@@ -978,12 +1141,17 @@ def get_accumulation_threshold_from_etccdi(
 
     """
     # 1. Get local mean ETCCDI SDII value (this is the default for SDII in this method)
-    etccdi_sdii = get_local_etccdi_sdii_mean(gauge_lat, gauge_lon)
-    # 2. Filter out world records
-    daily_data_non_wr = get_daily_non_wr_data(data, target_gauge_col, time_res)
-    # 3. Calculate simple precipitation intensity index from daily data
-    gauge_sdii = stats.simple_precip_intensity_index(daily_data_non_wr, target_gauge_col, wet_day_threshold)
-    # 4. Get rain gauge accumulation threshold
+    if climatology is None:
+        climatology = gauge_climatology.GaugeClimatology(gauge_lat, gauge_lon)
+    etccdi_sdii = climatology.get_etccdi_value("SDII")
+    # 2. Only compute the rain gauge SDII when there is no local ETCCDI SDII value, as it is not used otherwise
+    gauge_sdii = np.nan
+    if np.isnan(etccdi_sdii):
+        # 2.1 Filter out world records
+        daily_data_non_wr = get_daily_non_wr_data(data, target_gauge_col, time_res)
+        # 2.2 Calculate simple precipitation intensity index from daily data
+        gauge_sdii = stats.simple_precip_intensity_index(daily_data_non_wr, target_gauge_col, wet_day_threshold)
+    # 3. Get rain gauge accumulation threshold
     return get_accumulation_threshold(etccdi_sdii, gauge_sdii, accumulation_multiplying_factor)
 
 
@@ -1010,16 +1178,11 @@ def join_dry_spell_data_back_to_original(data: pl.DataFrame, dry_spell_lengths_f
     # 2. Get all non-0 flags (i.e. suspicious dry spells)
     dry_spell_non_zero = dry_spell_lengths_flags.filter(pl.col("dry_spell_flag") > 0)
 
-    # 3. Loop through problematic flags and label the original data based on duration of dry spell
-    for non_zero_data_row in dry_spell_non_zero.iter_rows():
-        # overwrite flag
-        dry_spell_flag_data = dry_spell_flag_data.with_columns(
-            pl.when((pl.col("time") >= non_zero_data_row[1]) & (pl.col("time") <= non_zero_data_row[2]))
-            .then(non_zero_data_row[4])
-            .otherwise(pl.col("dry_spell_flag"))
-            .alias("dry_spell_flag")
-        )
-    return dry_spell_flag_data
+    # 3. Label the original data based on duration of dry spell
+    flag_intervals = dry_spell_non_zero.select(
+        start=pl.col("dry_spell_start"), end=pl.col("dry_spell_end"), value=pl.col("dry_spell_flag")
+    )
+    return data_utils.paint_intervals(dry_spell_flag_data, flag_intervals, data_col="dry_spell_flag")
 
 
 def flag_dry_spell_duration(
@@ -1078,24 +1241,16 @@ def get_dry_spell_duration(data: pl.DataFrame, target_gauge_col: str) -> pl.Data
         Data with dry spell start, end and duration
 
     """
-    # 1. Get dry spells
-    gauge_dry_spells = data_utils.get_dry_spells(data, target_gauge_col)
-
-    # 2. Get consecutive groups of dry spells
-    gauge_dry_spell_groups = get_consecutive_dry_days(gauge_dry_spells)
-
-    # 3. Get dry spell lengths
-    gauge_dry_spell_lengths = (
-        gauge_dry_spell_groups.filter(pl.col("is_dry") == 1)
-        .group_by("dry_group_id")
-        .agg(
-            pl.first("time").alias("dry_spell_start"),
-            pl.last("time").alias("dry_spell_end"),
-            pl.col("is_dry").sum().alias("dry_spell_length"),
-        )
-        .sort("dry_group_id")
+    # 1. Get dry spells, numbered as consecutive groups of dry spells
+    gauge_dry_spell_runs = get_dry_group_ids(data_utils.get_run_table(data, target_gauge_col)).filter(pl.col("is_dry"))
+
+    # 2. Get dry spell lengths
+    return gauge_dry_spell_runs.select(
+        "dry_group_id",
+        dry_spell_start=pl.col("start"),
+        dry_spell_end=pl.col("end"),
+        dry_spell_length=pl.col("run_len").cast(pl.Int64),
     )
-    return gauge_dry_spell_lengths
 
 
 def get_first_wet_after_dry_spell(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFrame:
@@ -1115,12 +1270,15 @@ def get_first_wet_after_dry_spell(data: pl.DataFrame, target_gauge_col: str) ->
         Data with binary column denoting first wet after dry spell
 
     """
-    # 1. Get dry spells
-    gauge_dry_spells = data_utils.get_dry_spells(data, target_gauge_col)
-
-    # 2. Get consecutive groups of dry spells
-    gauge_dry_spell_groups = get_consecutive_dry_days(gauge_dry_spells)
+    # 1. Get dry spells and consecutive groups of dry spells
+    gauge_dry_spell_runs = get_dry_group_ids(data_utils.get_run_table(data, target_gauge_col))
+    gauge_dry_spell_groups = data.with_columns(
+        data_utils.expand_run_table(
+            gauge_dry_spell_runs.with_columns(pl.col("is_dry").cast(pl.Int8())), ["is_dry", "dry_group_id"]
+        )
+    )
 
+    # 2. Get first wet value after dry spell
     return gauge_dry_spell_groups.with_columns(
         pl.when((pl.col("is_dry") == 0) & (pl.col("dry_group_id").diff().fill_null(0) == 1))
         .then(pl.col("time"))
@@ -1129,7 +1287,9 @@ def get_first_wet_after_dry_spell(data: pl.DataFrame, target_gauge_col: str) ->
     )
 
 
-def get_dry_spell_info(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFrame:
+def get_dry_spell_info(
+    data: pl.DataFrame, target_gauge_col: str, gauge_dry_spell_lengths: pl.DataFrame = None
+) -> pl.DataFrame:
     """
     Get summary of dry spells (i.e. duration and first wet value after dry and previous and next dry spells duration).
 
@@ -1139,6 +1299,8 @@ def get_dry_spell_info(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFram
         Hourly rainfall data
     target_gauge_col :
         Column with rainfall data
+    gauge_dry_spell_lengths :
+        Dry spell durations of data from 'get_dry_spell_duration' (default: computed from data)
 
     Returns
     -------
@@ -1146,8 +1308,9 @@ def get_dry_spell_info(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFram
         Data with dry spell information
 
     """
-    # 1. Get dry spell durations (with start and end dates)
-    gauge_dry_spell_lengths = get_dry_spell_duration(data, target_gauge_col)
+    # 1. Get dry spell durations (with start and end dates), if not given
+    if gauge_dry_spell_lengths is None:
+        gauge_dry_spell_lengths = get_dry_spell_duration(data, target_gauge_col)
 
     # 2. Get first wet value after consecutive dry spell
     gauge_first_wet_after_dry = get_first_wet_after_dry_spell(data, target_gauge_col)
@@ -1177,6 +1340,24 @@ def get_consecutive_dry_days(gauge_dry_spells: pl.DataFrame) -> pl.DataFrame:
     return gauge_dry_spells.with_columns(((pl.col("is_dry").diff().fill_null(0) == 1).cum_sum()).alias("dry_group_id"))
 
 
+def get_dry_group_ids(run_table: pl.DataFrame) -> pl.DataFrame:
+    """
+    Get id of consecutive groups of dry spells for each run, as in 'get_consecutive_dry_days'.
+
+    Parameters
+    ----------
+    run_table :
+        Runs of repeated values from 'data_utils.get_run_table'
+
+    Returns
+    -------
+    run_table :
+        Run table with dry group ids (a dry spell at the start of the data is group 0)
+
+    """
+    return run_table.with_columns(dry_group_id=(pl.col("is_dry") & (pl.col("start_idx") > 0)).cum_sum())
+
+
 def compute_dry_spell_days(dry_spell_data: xr.Dataset) -> xr.Dataset:
     """
     Compute dry spells in days from ETCCDI Consecutive Dry Days data.
@@ -1192,19 +1373,4 @@ def compute_dry_spell_days(dry_spell_data: xr.Dataset) -> xr.Dataset:
         ETCCDI CDD index data with `CDD_days` variable
 
     """
-    # Convert CDD from seconds to days
-    dry_spell_days = data_utils.convert_datarray_seconds_to_days(dry_spell_data["CDD"])
-
-    # Mask out non-land data
-    dry_spell_days[dry_spell_days < 0.0] = np.nan
-
-    # Remove errors from data where more than 366 days are dry
-    dry_spell_days[dry_spell_days > 366] = np.nan  # remove errors
-
-    # Remove invalid data
-    dry_spell_days = np.ma.masked_invalid(dry_spell_days)
-
-    # Make CDD days variable
-    dry_spell_data["CDD_days"] = (("lat", "lon"), np.ma.max(dry_spell_days, axis=0))
-
-    return dry_spell_data
+    return gauge_climatology.compute_dry_spell_days(dry_spell_data)
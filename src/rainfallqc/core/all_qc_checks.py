@@ -7,21 +7,28 @@ import itertools
 
 import polars as pl
 
+from rainfallqc.core import result_cache
 from rainfallqc.utils import data_utils
 
 QC_CHECKS = {}
 
 
-def qc_check(name: str, require_non_negative: bool = False) -> callable:
+def qc_check(name: str, require_non_negative: bool = False, supports_lazy: bool = False) -> callable:
     """
     Register a QC check and check for non-negative values if required.
 
+    All registered QC checks accept a polars LazyFrame, and return LazyFrames in place of DataFrames.
+    Checks that cannot build their result as a lazy query are given the data collected with the polars streaming engine
+    (collected once for all checks of a 'data_utils.validated_frame', i.e. within 'run_qc_framework').
+
     Parameters
     ----------
     name :
         Name of the QC check.
     require_non_negative :
         If True, check that the target gauge column has no negative values before running the QC check
+    supports_lazy :
+        If True, the QC check can be run directly on a LazyFrame.
 
     Returns
     -------
@@ -36,12 +43,18 @@ def qc_check(name: str, require_non_negative: bool = False) -> callable:
     """
 
     def decorator(func: callable) -> callable:
+        # Signature and defaults are only worked out once, at registration
+        call_plan = get_call_plan(func)
+
         @functools.wraps(func)
-        def wrapper(df: pl.DataFrame, *args, **kwargs) -> list:
-            # Bind args/kwargs to signature to include defaults
-            bound = inspect.signature(func).bind_partial(df, *args, **kwargs)
-            bound.apply_defaults()
-            full_kwargs = bound.arguments  # dict including defaults
+        def wrapper(df: pl.DataFrame | pl.LazyFrame, *args, **kwargs) -> list:
+            # Collect LazyFrame if check only works on DataFrames (once for all checks within 'validated_frame')
+            collected_lazy_df = isinstance(df, pl.LazyFrame) and not supports_lazy
+            if collected_lazy_df:
+                df = data_utils.collect_validated_frame(df)
+
+            # Combine args/kwargs with defaults
+            full_kwargs = get_full_kwargs(call_plan, df, *args, **kwargs)
 
             columns_to_check = []
             columns_to_check = get_columns_in_kwargs(
@@ -59,13 +72,27 @@ def qc_check(name: str, require_non_negative: bool = False) -> callable:
                 itertools.chain.from_iterable(col if isinstance(col, list) else [col] for col in columns_to_check)
             )
 
-            # Optional non-negative pre-check
-            for col in columns_to_check:
-                if require_non_negative and data_utils.check_for_negative_values(df, col):
-                    raise ValueError(f"{name} failed: column '{col}' contains negative values.")
-
-            # Run the actual QC check
-            return func(df, *args, **kwargs)
+            # Optional non-negative pre-check (columns already checked within 'data_utils.validated_frame' are skipped)
+            if require_non_negative:
+                negative_cols = data_utils.get_columns_with_negative_values(df, columns_to_check)
+                if negative_cols:
+                    raise ValueError(f"{name} failed: column '{negative_cols[0]}' contains negative values.")
+
+            # Run the actual QC check, or get its result from the active result cache (see 'result_cache.QCResultCache')
+            active_result_cache = result_cache.get_active_result_cache()
+            if active_result_cache is None:
+                qc_result = func(df, *args, **kwargs)
+            else:
+                check_kwargs = {key: val for key, val in full_kwargs.items() if key != call_plan["param_names"][0]}
+                qc_result = active_result_cache.get_or_compute(
+                    name, df, check_kwargs, columns_to_check, functools.partial(func, df, *args, **kwargs)
+                )
+            if isinstance(qc_result, pl.DataFrame) and (collected_lazy_df or isinstance(df, pl.LazyFrame)):
+                return qc_result.lazy()
+            return qc_result
+
+        wrapper.call_plan = call_plan
+        wrapper.supports_lazy = supports_lazy
 
         # Register for later use
         QC_CHECKS[name] = wrapper
@@ -74,6 +101,65 @@ def qc_check(name: str, require_non_negative: bool = False) -> callable:
     return decorator
 
 
+@functools.cache
+def get_call_plan(func: callable) -> dict:
+    """
+    Get the parameter names and defaults of a function, so a function's signature only needs inspecting once.
+
+    Parameters
+    ----------
+    func :
+        Function to get call plan for.
+
+    Returns
+    -------
+    call_plan :
+        Dictionary with the "signature", "param_names" (positional or keyword parameters in order), "defaults" and
+        "accepted_keys" of the function, and whether it "accepts_var_kwargs".
+
+    """
+    sig = inspect.signature(func)
+    positional_kinds = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+    return {
+        "signature": sig,
+        "param_names": tuple(p.name for p in sig.parameters.values() if p.kind in positional_kinds),
+        "defaults": {p.name: p.default for p in sig.parameters.values() if p.default is not inspect.Parameter.empty},
+        "accepted_keys": frozenset(sig.parameters.keys()),
+        "accepts_var_kwargs": any(p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values()),
+    }
+
+
+def get_full_kwargs(call_plan: dict, *args, **kwargs) -> dict:
+    """
+    Combine args and kwargs of a call with the defaults of a function.
+
+    Parameters
+    ----------
+    call_plan :
+        Call plan of the function from 'get_call_plan'.
+    args :
+        Positional arguments of call.
+    kwargs :
+        Keyword arguments of call.
+
+    Returns
+    -------
+    full_kwargs :
+        Dictionary of all arguments by name (including defaults).
+
+    Raises
+    ------
+    TypeError :
+        If there are more positional arguments than the function takes.
+
+    """
+    if len(args) > len(call_plan["param_names"]):
+        raise TypeError(
+            f"Too many positional arguments: expected at most {len(call_plan['param_names'])}, got {len(args)}."
+        )
+    return {**call_plan["defaults"], **dict(zip(call_plan["param_names"], args, strict=False)), **kwargs}
+
+
 def get_columns_in_kwargs(kwargs: dict, kwarg_name: str, column_list: list, name: str) -> list:
     """
     Check that a column exists in the DataFrame.
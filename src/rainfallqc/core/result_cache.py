@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""On-disk cache of QC check results, so checks are not recomputed for the same data and arguments."""
+
+import collections
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+import numpy as np
+import polars as pl
+
+import rainfallqc
+from rainfallqc.utils import data_utils
+
+# File suffix of cached DataFrames (Parquet) and other cached values (pickle)
+FRAME_SUFFIX = ".frame"
+VALUE_SUFFIX = ".value"
+
+# Result caches that have been entered in the current context i.e. thread (the last one is active), see 'QCResultCache'
+_ACTIVE_RESULT_CACHES = contextvars.ContextVar("active_result_caches", default=())
+
+
+class QCResultCache:
+    """
+    On-disk cache of QC check results, with least recently used results removed when over a maximum size.
+
+    Results are keyed by a fingerprint of the check name, the columns of the data the check uses, all arguments of the
+    check (including defaults) and the versions of RainfallQC and polars. DataFrame results are stored as Parquet files
+    and other results (i.e. scalars and lists) are pickled, so only use a cache directory you trust.
+
+    The cache is used by all registered QC checks run in the same thread (or context) while it is active i.e.:
+
+    >>> with QCResultCache("qc_cache", max_size_bytes=10**9):
+    ...     qc_results = apply_qc_framework.run_qc_framework(...)
+
+    The size and last use of the results are scanned from the cache directory when the cache is opened, then kept up to
+    date in memory, so results saved by other processes at the same time are only counted when they reopen it.
+
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = None):
+        """
+        Open result cache in a directory (made if it does not exist).
+
+        Parameters
+        ----------
+        cache_dir :
+            Directory to store results in.
+        max_size_bytes :
+            Maximum size of all results in bytes (default: None, so no limit)
+
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_cached_results()
+
+    def __enter__(self) -> "QCResultCache":
+        """Make this the active result cache of the current context."""
+        _ACTIVE_RESULT_CACHES.set((*_ACTIVE_RESULT_CACHES.get(), self))
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Stop using this result cache in the current context."""
+        active_result_caches = list(_ACTIVE_RESULT_CACHES.get())
+        del active_result_caches[len(active_result_caches) - 1 - active_result_caches[::-1].index(self)]
+        _ACTIVE_RESULT_CACHES.set(tuple(active_result_caches))
+
+    def __getstate__(self) -> dict:
+        """Pickle without the lock, so the cache can be sent to worker processes."""
+        return {"cache_dir": self.cache_dir, "max_size_bytes": self.max_size_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        """Unpickle, make a new lock and scan the cached results."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._scan_cached_results()
+
+    def _scan_cached_results(self) -> None:
+        """Get size of each result in the cache in order of last use, and the size of all results."""
+        with self._lock:
+            self._result_sizes = collections.OrderedDict(
+                (result_path, result_size) for _, result_size, result_path in sorted(self.get_cached_results())
+            )
+            self._size_bytes = sum(self._result_sizes.values())
+
+    def _track_result(self, result_path: str, result_size: int = None) -> None:
+        """Mark a result as the most recently used, and update its size if given."""
+        with self._lock:
+            if result_size is not None:
+                self._size_bytes += result_size - self._result_sizes.get(result_path, 0)
+                self._result_sizes[result_path] = result_size
+            if result_path in self._result_sizes:
+                self._result_sizes.move_to_end(result_path)
+
+    def get_or_compute(
+        self, check_name: str, data: pl.DataFrame | pl.LazyFrame, check_kwargs: dict, data_cols: list, compute: callable
+    ) -> object:
+        """
+        Get result of a QC check from the cache, or compute and store it.
+
+        Parameters
+        ----------
+        check_name :
+            Name of QC check.
+        data :
+            Data given to the QC check.
+        check_kwargs :
+            All other arguments of the QC check by name.
+        data_cols :
+            Columns of data used by the QC check (default: all columns)
+        compute :
+            Function without arguments that runs the QC check.
+
+        Returns
+        -------
+        qc_result :
+            Result of QC check (LazyFrames are returned collected).
+
+        """
+        key = self.make_key(check_name, data, check_kwargs, data_cols)
+        found, qc_result = self.load(key)
+        if not found:
+            qc_result = data_utils.collect_if_lazy(compute())
+            self.save(key, qc_result)
+        return qc_result
+
+    def make_key(
+        self, check_name: str, data: pl.DataFrame | pl.LazyFrame, check_kwargs: dict, data_cols: list = None
+    ) -> str:
+        """
+        Make the key of a QC check result.
+
+        Parameters
+        ----------
+        check_name :
+            Name of QC check.
+        data :
+            Data given to the QC check.
+        check_kwargs :
+            All other arguments of the QC check by name.
+        data_cols :
+            Columns of data used by the QC check (default: all columns)
+
+        Returns
+        -------
+        key :
+            SHA-256 hex digest of the check inputs.
+
+        """
+        key = hashlib.sha256()
+        key.update(json.dumps([check_name, rainfallqc.__version__, pl.__version__]).encode())
+        key.update(get_frame_fingerprint(data, data_cols).encode())
+        key.update(json.dumps(make_fingerprintable(check_kwargs), sort_keys=True).encode())
+        return key.hexdigest()
+
+    def load(self, key: str) -> tuple[bool, object]:
+        """
+        Load a result from the cache.
+
+        Parameters
+        ----------
+        key :
+            Key of result from 'make_key'.
+
+        Returns
+        -------
+        found :
+            True if the result is in the cache.
+        qc_result :
+            Cached result (None if not found).
+
+        """
+        for suffix in [FRAME_SUFFIX, VALUE_SUFFIX]:
+            result_path = self.get_result_path(key, suffix)
+            try:
+                with open(result_path, "rb") as result_file:
+                    qc_result = pl.read_parquet(result_file) if suffix == FRAME_SUFFIX else pickle.load(result_file)
+                # mark as recently used (on disk for when the cache is reopened)
+                os.utime(result_path)
+            except FileNotFoundError:
+                continue
+            self._track_result(result_path)
+            return True, qc_result
+        return False, None
+
+    def save(self, key: str, qc_result: object) -> None:
+        """
+        Save a result to the cache, then remove least recently used results if the cache is over its maximum size.
+
+        Parameters
+        ----------
+        key :
+            Key of result from 'make_key'.
+        qc_result :
+            Result of QC check.
+
+        """
+        qc_result = data_utils.collect_if_lazy(qc_result)
+        is_frame = isinstance(qc_result, pl.DataFrame)
+        result_path = self.get_result_path(key, FRAME_SUFFIX if is_frame else VALUE_SUFFIX)
+
+        # 1. Write to a temporary file then rename it, so partly written results are never read
+        tmp_file, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(tmp_file, "wb") as result_file:
+                qc_result.write_parquet(result_file) if is_frame else pickle.dump(qc_result, result_file)
+            result_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, result_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        self._track_result(result_path, result_size)
+
+        # 2. Keep cache within maximum size
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used results until the cache is within its maximum size."""
+        if self.max_size_bytes is None:
+            return
+        with self._lock:
+            while self._result_sizes and self._size_bytes > self.max_size_bytes:
+                result_path, result_size = self._result_sizes.popitem(last=False)
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(result_path)
+                self._size_bytes -= result_size
+
+    def clear(self) -> None:
+        """Remove all results from the cache."""
+        for _, _, result_path in self.get_cached_results():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(result_path)
+        self._scan_cached_results()
+
+    def get_size_bytes(self) -> int:
+        """
+        Get size of all results in the cache (as scanned when opened, and saved or removed since).
+
+        Returns
+        -------
+        cache_size :
+            Size in bytes.
+
+        """
+        return self._size_bytes
+
+    def get_cached_results(self) -> list[tuple[float, int, str]]:
+        """
+        Get last used time, size and path of each result in the cache.
+
+        Returns
+        -------
+        cached_results :
+            Modification time, size in bytes and path of each result.
+
+        """
+        cached_results = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith((FRAME_SUFFIX, VALUE_SUFFIX)):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                entry_stat = entry.stat()
+                cached_results.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+        return cached_results
+
+    def get_result_path(self, key: str, suffix: str) -> str:
+        """
+        Get path of a result in the cache.
+
+        Parameters
+        ----------
+        key :
+            Key of result from 'make_key'.
+        suffix :
+            FRAME_SUFFIX or VALUE_SUFFIX.
+
+        Returns
+        -------
+        result_path :
+            Path of result.
+
+        """
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+
+def get_active_result_cache() -> QCResultCache | None:
+    """
+    Get the active result cache.
+
+    Returns
+    -------
+    result_cache :
+        Result cache that was entered last in the current context (None if there is no active cache).
+
+    """
+    active_result_caches = _ACTIVE_RESULT_CACHES.get()
+    return active_result_caches[-1] if active_result_caches else None
+
+
+def get_frame_fingerprint(data: pl.DataFrame | pl.LazyFrame, data_cols: list = None) -> str:
+    """
+    Get fingerprint of the schema and values of a DataFrame or LazyFrame.
+
+    Parameters
+    ----------
+    data :
+        Data to get fingerprint of.
+    data_cols :
+        Columns to include, with 'time' if it is in data (default: all columns)
+
+    Returns
+    -------
+    fingerprint :
+        SHA-256 hex digest of data.
+
+    """
+    if data_cols:
+        all_cols = data.collect_schema().names()
+        data = data.select([col for col in dict.fromkeys(["time", *data_cols]) if col in all_cols])
+    data = data_utils.collect_if_lazy(data)
+    fingerprint = hashlib.sha256(str(data.schema).encode())
+    fingerprint.update(data.hash_rows().to_numpy().tobytes())
+    return fingerprint.hexdigest()
+
+
+def make_fingerprintable(value: object) -> object:
+    """
+    Make a JSON serialisable version of a value, used to compare arguments of QC checks.
+
+    Frames are replaced with their fingerprint and other objects that are not JSON types are replaced with their repr.
+
+    Parameters
+    ----------
+    value :
+        Value to make JSON serialisable.
+
+    Returns
+    -------
+    fingerprintable_value :
+        JSON serialisable version of value.
+
+    """
+    if isinstance(value, (pl.DataFrame, pl.LazyFrame)):
+        return {"frame": get_frame_fingerprint(value)}
+    if isinstance(value, pl.Series):
+        return {"series": get_frame_fingerprint(value.to_frame())}
+    if isinstance(value, dict):
+        return {repr(key): make_fingerprintable(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [make_fingerprintable(val) for val in value]]
+    if isinstance(value, (set, frozenset)):
+        return ["set", sorted(repr(val) for val in value)]
+    if isinstance(value, np.generic):
+        return make_fingerprintable(value.item())
+    if isinstance(value, float):
+        return repr(value)  # JSON does not have NaN
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    return repr(value)
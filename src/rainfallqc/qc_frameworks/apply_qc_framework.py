@@ -1,27 +1,49 @@
 # -*- coding: utf-8 -*-
 """Methods to apply QC qc_frameworks to apply to rainfall data to create quality controlled data."""
 
-import inspect
+import contextlib
+import datetime
+import graphlib
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from typing import Iterator
 
+import numpy as np
 import polars as pl
 
-from rainfallqc.qc_frameworks.inbuilt_qc_frameworks import INBUILT_QC_FRAMEWORKS
+from rainfallqc.core import all_qc_checks, result_cache
+from rainfallqc.qc_frameworks.inbuilt_qc_frameworks import (
+    INBUILT_QC_FRAMEWORKS,
+    SHARED_PRODUCTS,
+    get_qc_name_from_qc_key,
+)
+from rainfallqc.utils import data_readers, data_utils, gauge_climatology, neighbourhood_utils
+
+NETWORK_TIME_RES_CONVERSION = {**data_readers.GSDR_TIME_RES_CONVERSION, **data_readers.GPCC_TIME_RES_CONVERSION}
+
+# State of each worker process of run_qc_framework_on_network i.e. the network reader and ETCCDI reference table
+_NETWORK_WORKER_STATE = {}
 
 
 def run_qc_framework(
-    data: pl.DataFrame,
+    data: pl.DataFrame | pl.LazyFrame,
     qc_framework: str,
     qc_methods_to_run: list,
     qc_kwargs: dict,
     user_defined_framework: dict = None,
-) -> pl.DataFrame:
+    executor: Executor = None,
+    max_workers: int = None,
+    output_format: str = "dict",
+    compact_flags: bool = False,
+    qc_result_cache: result_cache.QCResultCache = None,
+) -> dict | tuple[pl.DataFrame, pl.DataFrame]:
     """
     Run QC methods from a QC framework.
 
     Parameters
     ----------
     data :
-        Rainfall data to QC.
+        Rainfall data to QC (DataFrame or LazyFrame).
     qc_framework :
         QC framework to run, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
     qc_methods_to_run :
@@ -30,41 +52,1047 @@ def run_qc_framework(
         Keyword arguments to pass to QC framework methods.
     user_defined_framework :
         A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+    executor :
+        Executor to run the methods concurrently with i.e. a ThreadPoolExecutor (default: None, so run one by one).
+    max_workers :
+        If given (and no executor), run the methods concurrently on a thread pool with this many threads.
+    output_format :
+        Either 'dict' for a dictionary of results by method, or 'columnar' for a flag table and a summary table
+        (see 'convert_qc_results_to_columnar').
+    compact_flags :
+        If True, row-wise flags are returned as Int8 with null where not evaluated (instead of Float64 with NaN),
+        see 'data_utils.convert_flags_to_compact_dtype'.
+    qc_result_cache :
+        If given, results of methods are read from and written to this on-disk cache, so methods are not rerun for the
+        same data and keyword arguments (see 'result_cache.QCResultCache').
 
     Returns
     -------
     qc_results :
-        Results of running QC framework.
+        Results of running QC framework. If data is a LazyFrame, row-wise results are LazyFrames (unless flags are
+        compact or output is columnar).
+
+    Notes
+    -----
+    Intermediate products that are needed by more than one method (e.g. neighbour data resampled to daily) are
+    computed once, see 'plan_shared_products', and the annual statistics of year-based methods are computed in one
+    aggregation, see 'compute_annual_statistics'.
+
+    The methods only read the data, so can be run concurrently on threads (polars and numpy release the GIL for most of
+    their work). Results are returned in the order of qc_methods_to_run and the first error (in that order) is raised.
 
     """
+    if output_format not in ["dict", "columnar"]:
+        raise ValueError(f"output_format '{output_format}' is not known. Use 'dict' or 'columnar'.")
     qc_results = {}
     shared_kwargs = qc_kwargs.get("shared", {})
+    qc_framework = get_qc_framework(qc_framework, user_defined_framework)
+
+    # 1. Combine shared and method-specific kwargs
+    method_kwargs = {qc_method: {**shared_kwargs, **qc_kwargs.get(qc_method, {})} for qc_method in qc_methods_to_run}
+
+    # 2. Columns and time steps of data only need validating once for all methods
+    with data_utils.validated_frame(data), qc_result_cache or contextlib.nullcontext():
+        # 3. Compute intermediate products and annual statistics shared between methods once
+        product_plan = plan_shared_products(qc_framework, qc_methods_to_run, method_kwargs)
+        method_products = compute_shared_products(data, product_plan)
+        for qc_method, annual_statistics in compute_annual_statistics(
+            data, qc_framework, qc_methods_to_run, method_kwargs
+        ).items():
+            method_products.setdefault(qc_method, {}).update(annual_statistics)
+
+        # 4. Get each method with its kwargs
+        method_calls = {}
+        for qc_method in qc_methods_to_run:
+            qc_func = qc_framework[qc_method]["function"]
+            combined_kwargs = {**method_kwargs[qc_method], **method_products.get(qc_method, {})}
+            method_calls[qc_method] = (qc_func, filter_kwargs_for_function(qc_func, combined_kwargs))
+
+        # 5. Run each method
+        if executor is None and max_workers is None:
+            for qc_method, (qc_func, filtered_kwargs) in method_calls.items():
+                qc_results[qc_method] = qc_func(data, **filtered_kwargs)
+        else:
+            qc_results = run_methods_concurrently(data, method_calls, executor=executor, max_workers=max_workers)
+
+    if compact_flags:
+        for qc_method, qc_result in qc_results.items():
+            if is_rowwise_result(qc_result):
+                qc_results[qc_method] = data_utils.convert_flags_to_compact_dtype(data_utils.collect_if_lazy(qc_result))
+
+    if output_format == "columnar":
+        return convert_qc_results_to_columnar(data, qc_results)
+    return qc_results
+
+
+def run_qc_framework_in_chunks(
+    data: pl.DataFrame | pl.LazyFrame,
+    qc_framework: str,
+    qc_methods_to_run: list,
+    qc_kwargs: dict,
+    user_defined_framework: dict = None,
+    chunk_every: str = "1y",
+    output_format: str = "dict",
+    whole_record_kwargs: dict = None,
+) -> dict | tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Run QC methods from a QC framework on one block of time of the data at a time, to limit memory use.
+
+    Methods with a "halo" in their framework entry are run on each block of time extended by their halo (the data
+    needed before and after the block to flag it), and the flags of each block are joined back together. Keyword
+    arguments that need the whole record (i.e. thresholds and fitted distributions, see "whole_record_kwargs") are
+    computed first. The flags are the same as those of 'run_qc_framework'.
+
+    Methods without a halo (i.e. summary checks and checks of unbounded dry spells or streaks) are run on the whole
+    record.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC (DataFrame or LazyFrame i.e. from 'pl.scan_parquet', so only one block is loaded at a time).
+    qc_framework :
+        QC framework to run, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    qc_kwargs :
+        Keyword arguments to pass to QC framework methods.
+    user_defined_framework :
+        A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+    chunk_every :
+        Length of each block of time as a polars duration string i.e. '1y' or '6mo' (default: '1y')
+    output_format :
+        Either 'dict' or 'columnar', see 'run_qc_framework'.
+    whole_record_kwargs :
+        Keyword arguments that need the whole record by method, from 'get_whole_record_kwargs' (default: computed)
+
+    Returns
+    -------
+    qc_results :
+        Results of running QC framework.
+
+    """
+    if output_format not in ["dict", "columnar"]:
+        raise ValueError(f"output_format '{output_format}' is not known. Use 'dict' or 'columnar'.")
+    shared_kwargs = qc_kwargs.get("shared", {})
+    qc_framework = get_qc_framework(qc_framework, user_defined_framework)
+    whole_record_kwargs = whole_record_kwargs or {}
+
+    # 1. Combine shared and method-specific kwargs (given kwargs take priority over whole record kwargs)
+    method_kwargs = {
+        qc_method: {**whole_record_kwargs.get(qc_method, {}), **shared_kwargs, **qc_kwargs.get(qc_method, {})}
+        for qc_method in qc_methods_to_run
+    }
+
+    # 2. Run methods without a halo on the whole record
+    chunked_methods = [qc_method for qc_method in qc_methods_to_run if "halo" in qc_framework[qc_method]]
+    qc_results = run_qc_framework(
+        data,
+        qc_framework="custom",
+        qc_methods_to_run=[qc_method for qc_method in qc_methods_to_run if qc_method not in chunked_methods],
+        qc_kwargs=method_kwargs,
+        user_defined_framework=qc_framework,
+    )
+
+    # 3. Compute keyword arguments that need the whole record and group methods with the same halo
+    methods_by_halo = {}
+    for qc_method in chunked_methods:
+        method_kwargs[qc_method].update(
+            compute_whole_record_kwargs(data, qc_framework[qc_method], method_kwargs[qc_method])
+        )
+        halo = qc_framework[qc_method]["halo"](**method_kwargs[qc_method])
+        methods_by_halo.setdefault(halo, []).append(qc_method)
+
+    # 4. Run methods on each block of time extended by their halo, then trim the results to the block
+    chunk_results = {qc_method: [] for qc_method in chunked_methods}
+    for chunk_start, chunk_end in get_chunk_bounds(data, chunk_every):
+        for halo, halo_methods in methods_by_halo.items():
+            halo_results = run_qc_methods_on_time_window(
+                data, qc_framework, halo_methods, method_kwargs, halo, window_start=chunk_start, window_end=chunk_end
+            )
+            for qc_method, qc_result in halo_results.items():
+                chunk_results[qc_method].append(qc_result)
+
+    # 5. Join blocks back together
+    for qc_method in chunked_methods:
+        qc_results[qc_method] = pl.concat(chunk_results[qc_method], how="vertical_relaxed")
+    qc_results = {qc_method: qc_results[qc_method] for qc_method in qc_methods_to_run}
+
+    if output_format == "columnar":
+        return convert_qc_results_to_columnar(data, qc_results)
+    return qc_results
+
+
+def update_qc_framework_results(
+    data: pl.DataFrame | pl.LazyFrame,
+    previous_qc_results: dict,
+    qc_framework: str,
+    qc_methods_to_run: list,
+    qc_kwargs: dict,
+    whole_record_kwargs: dict = None,
+    user_defined_framework: dict = None,
+) -> dict:
+    """
+    Update the results of a previous run of a QC framework after new data is appended to the record.
+
+    For methods with a "halo" (see 'run_qc_framework_in_chunks'), only the flags that the new data can change are
+    recomputed i.e. from the look-ahead of the method before the end of the previous results, using the look-back of
+    the method before that. The whole record keyword arguments (i.e. thresholds and fitted distributions) of the
+    previous run should be given, so they are not computed from the whole record again (see
+    'get_whole_record_kwargs'). Methods without a halo or previous results are run on the whole record.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with new data appended (DataFrame or LazyFrame, so only the data needed is loaded).
+    previous_qc_results :
+        Results of previous run of QC framework by method.
+    qc_framework :
+        QC framework to run, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    qc_kwargs :
+        Keyword arguments to pass to QC framework methods.
+    whole_record_kwargs :
+        Keyword arguments that need the whole record by method, from 'get_whole_record_kwargs' (default: computed)
+    user_defined_framework :
+        A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+
+    Returns
+    -------
+    qc_results :
+        Updated results of QC framework.
+
+    """
+    shared_kwargs = qc_kwargs.get("shared", {})
+    qc_framework = get_qc_framework(qc_framework, user_defined_framework)
+    whole_record_kwargs = whole_record_kwargs or {}
+
+    # 1. Combine shared and method-specific kwargs (given kwargs take priority over whole record kwargs)
+    method_kwargs = {
+        qc_method: {**whole_record_kwargs.get(qc_method, {}), **shared_kwargs, **qc_kwargs.get(qc_method, {})}
+        for qc_method in qc_methods_to_run
+    }
+
+    # 2. Run methods without a halo or previous results on the whole record
+    previous_qc_results = {
+        qc_method: data_utils.collect_if_lazy(previous_qc_results[qc_method])
+        for qc_method in qc_methods_to_run
+        if qc_method in previous_qc_results
+    }
+    updated_methods = [
+        qc_method
+        for qc_method in qc_methods_to_run
+        if "halo" in qc_framework[qc_method]
+        and is_rowwise_result(previous_qc_results.get(qc_method))
+        and len(previous_qc_results[qc_method]) > 0
+    ]
+    qc_results = run_qc_framework(
+        data,
+        qc_framework="custom",
+        qc_methods_to_run=[qc_method for qc_method in qc_methods_to_run if qc_method not in updated_methods],
+        qc_kwargs=method_kwargs,
+        user_defined_framework=qc_framework,
+    )
 
+    # 3. Recompute the flags the new data can change, from the look-ahead of each method before the previous end
+    for qc_method in updated_methods:
+        method_kwargs[qc_method].update(
+            compute_whole_record_kwargs(data, qc_framework[qc_method], method_kwargs[qc_method])
+        )
+        halo = qc_framework[qc_method]["halo"](**method_kwargs[qc_method])
+        previous_qc_result = previous_qc_results[qc_method]
+        update_start = previous_qc_result["time"].max() - halo[1]
+        updated_qc_result = run_qc_methods_on_time_window(
+            data, qc_framework, [qc_method], method_kwargs, halo, window_start=update_start
+        )[qc_method]
+
+        # 4. Replace the flags from the start of the update
+        qc_results[qc_method] = pl.concat(
+            [previous_qc_result.filter(pl.col("time") < update_start), updated_qc_result], how="vertical_relaxed"
+        )
+
+    return {qc_method: qc_results[qc_method] for qc_method in qc_methods_to_run}
+
+
+def run_qc_methods_on_time_window(
+    data: pl.DataFrame | pl.LazyFrame,
+    qc_framework: dict,
+    qc_methods_to_run: list,
+    method_kwargs: dict,
+    halo: tuple,
+    window_start: datetime.datetime,
+    window_end: datetime.datetime = None,
+) -> dict:
+    """
+    Run QC methods on a window of time of the data extended by their halo, and trim the results to the window.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    qc_framework :
+        QC framework dictionary.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    method_kwargs :
+        Keyword arguments of each method.
+    halo :
+        Time of data needed before and after the window by the methods.
+    window_start :
+        Start of window (inclusive).
+    window_end :
+        End of window (exclusive), (default: None, so until the end of the data)
+
+    Returns
+    -------
+    qc_results :
+        Results of each method in the window.
+
+    """
+    look_back, look_ahead = halo
+    # 1. Get data in window extended by halo
+    window_filter = pl.col("time") >= window_start - look_back
+    if window_end is not None:
+        window_filter = window_filter & (pl.col("time") < window_end + look_ahead)
+    window_data = data_utils.collect_if_lazy(data.filter(window_filter))
+
+    # 2. Run methods on data in window
+    qc_results = run_qc_framework(
+        window_data,
+        qc_framework="custom",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs={qc_method: method_kwargs[qc_method] for qc_method in qc_methods_to_run},
+        user_defined_framework=qc_framework,
+    )
+
+    # 3. Trim results to window
+    in_window = pl.col("time") >= window_start
+    if window_end is not None:
+        in_window = in_window & (pl.col("time") < window_end)
+    return {qc_method: qc_result.filter(in_window) for qc_method, qc_result in qc_results.items()}
+
+
+def get_whole_record_kwargs(
+    data: pl.DataFrame | pl.LazyFrame,
+    qc_framework: str,
+    qc_methods_to_run: list,
+    qc_kwargs: dict,
+    user_defined_framework: dict = None,
+) -> dict:
+    """
+    Compute the keyword arguments of QC methods that need the whole record (see "whole_record_kwargs").
+
+    These can be stored and given to 'run_qc_framework_in_chunks' or 'update_qc_framework_results' so they are not
+    computed again.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    qc_framework :
+        QC framework to run, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    qc_kwargs :
+        Keyword arguments to pass to QC framework methods.
+    user_defined_framework :
+        A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+
+    Returns
+    -------
+    whole_record_kwargs :
+        Computed keyword arguments by method.
+
+    """
+    shared_kwargs = qc_kwargs.get("shared", {})
+    qc_framework = get_qc_framework(qc_framework, user_defined_framework)
+    return {
+        qc_method: compute_whole_record_kwargs(
+            data, qc_framework[qc_method], {**shared_kwargs, **qc_kwargs.get(qc_method, {})}
+        )
+        for qc_method in qc_methods_to_run
+        if "whole_record_kwargs" in qc_framework[qc_method]
+    }
+
+
+def get_qc_framework(qc_framework: str, user_defined_framework: dict = None) -> dict:
+    """
+    Get QC framework dictionary by name.
+
+    Parameters
+    ----------
+    qc_framework :
+        QC framework name, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
+    user_defined_framework :
+        A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+
+    Returns
+    -------
+    qc_framework :
+        QC framework dictionary.
+
+    """
     qc_framework = qc_framework.lower()
     if qc_framework in INBUILT_QC_FRAMEWORKS.keys():
         # select in-built qc framework by name
-        qc_framework = INBUILT_QC_FRAMEWORKS[qc_framework]
-    elif qc_framework == "custom":
-        qc_framework = user_defined_framework
-    else:
-        raise KeyError(
-            f"QC framework '{qc_framework}' is not known."
-            f"In-built QC frameworks include: {INBUILT_QC_FRAMEWORKS.keys()}."
-        )
+        return INBUILT_QC_FRAMEWORKS[qc_framework]
+    if qc_framework == "custom":
+        return user_defined_framework
+    raise KeyError(
+        f"QC framework '{qc_framework}' is not known.In-built QC frameworks include: {INBUILT_QC_FRAMEWORKS.keys()}."
+    )
+
+
+def compute_whole_record_kwargs(data: pl.DataFrame | pl.LazyFrame, qc_method_entry: dict, kwargs: dict) -> dict:
+    """
+    Compute the keyword arguments of a QC method that need the whole record (see "whole_record_kwargs").
+
+    Keyword arguments that are already given are not computed.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    qc_method_entry :
+        Framework entry of QC method i.e. {"function": ..., "whole_record_kwargs": {...}}
+    kwargs :
+        Keyword arguments of the method.
+
+    Returns
+    -------
+    whole_record_kwargs :
+        Computed keyword arguments.
+
+    """
+    # the whole record functions take the data as the same parameter as the method
+    data_param = all_qc_checks.get_call_plan(qc_method_entry["function"])["param_names"][0]
+    whole_record_kwargs = {}
+    for kwarg_name, kwarg_func in qc_method_entry.get("whole_record_kwargs", {}).items():
+        if kwargs.get(kwarg_name) is not None:
+            continue
+        func_kwargs = filter_kwargs_for_function(kwarg_func, kwargs)
+        func_kwargs[data_param] = data
+        whole_record_kwargs[kwarg_name] = kwarg_func(**func_kwargs)
+    return whole_record_kwargs
+
+
+def get_chunk_bounds(data: pl.DataFrame | pl.LazyFrame, chunk_every: str) -> list[tuple]:
+    """
+    Get start and end time of each block of time of the data.
+
+    Parameters
+    ----------
+    data :
+        Data with time column.
+    chunk_every :
+        Length of each block of time as a polars duration string i.e. '1y'.
 
+    Returns
+    -------
+    chunk_bounds :
+        Start (inclusive) and end (exclusive) time of each block with data.
+
+    """
+    chunk_starts = data_utils.collect_if_lazy(
+        data.select(pl.col("time").dt.truncate(chunk_every).unique().sort().alias("chunk_start"))
+    )["chunk_start"]
+    return list(zip(chunk_starts, chunk_starts.dt.offset_by(chunk_every), strict=True))
+
+
+def convert_qc_results_to_columnar(data: pl.DataFrame, qc_results: dict) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Convert QC results to one table of row-wise flags and one table of summary values.
+
+    Row-wise results (DataFrames with a 'time' column) are joined into one flag table on the time axis of the data.
+    Flag columns keep their name, unless it is used by more than one method, then the QC key is added as a prefix
+    i.e. 'QC17_wet_spell_flag_hourly'. All other results (i.e. scalars and lists of yearly values) are put in a summary
+    table with one row, with columns named by 'get_qc_name_from_qc_key' (or the QC key if not known).
+
+    Parameters
+    ----------
+    data :
+        Rainfall data that was QC'd.
+    qc_results :
+        Results of running QC framework as a dictionary.
+
+    Returns
+    -------
+    qc_flags :
+        Row-wise flags, with one 'time' column.
+    qc_summary :
+        Summary values with one row.
+
+    Raises
+    ------
+    ValueError :
+        If a result cannot be stored in either table.
+
+    """
+    qc_flags = data_utils.collect_if_lazy(data.select("time"))
+    qc_results = {qc_key: data_utils.collect_if_lazy(qc_result) for qc_key, qc_result in qc_results.items()}
+    summary_columns = []
+
+    # 1. Count flag columns names, to find those used by more than one method
+    flag_col_counts = {}
+    for qc_result in qc_results.values():
+        if is_rowwise_result(qc_result):
+            for col in qc_result.columns:
+                flag_col_counts[col] = flag_col_counts.get(col, 0) + 1
+
+    for qc_key, qc_result in qc_results.items():
+        # 2. Add row-wise flags to flag table
+        if is_rowwise_result(qc_result):
+            qc_result_flags = qc_result.rename(
+                {col: f"{qc_key}_{col}" for col in qc_result.columns if col != "time" and flag_col_counts[col] > 1}
+            )
+            if qc_result_flags["time"].equals(qc_flags["time"]):
+                qc_flags = qc_flags.hstack(qc_result_flags.drop("time"))
+            else:
+                qc_flags = qc_flags.join(qc_result_flags, on="time", how="left", maintain_order="left")
+        # 3. Add summary values to summary table
+        elif qc_result is None or isinstance(qc_result, (int, float, np.number, list, tuple)):
+            summary_col = get_qc_name_from_qc_key(qc_key) or qc_key
+            summary_values = list(qc_result) if isinstance(qc_result, tuple) else qc_result
+            summary_columns.append(pl.Series(summary_col, [summary_values]))
+        else:
+            raise ValueError(f"Result of '{qc_key}' of type {type(qc_result)} cannot be converted to a column.")
+
+    return qc_flags, pl.DataFrame(summary_columns)
+
+
+def is_rowwise_result(qc_result: object) -> bool:
+    """
+    Check if a QC result is row-wise i.e. a DataFrame (or LazyFrame) of flags with a 'time' column.
+
+    Parameters
+    ----------
+    qc_result :
+        Result of a QC method.
+
+    Returns
+    -------
+    is_rowwise :
+        True if result is row-wise.
+
+    """
+    if isinstance(qc_result, pl.LazyFrame):
+        return "time" in qc_result.collect_schema().names()
+    return isinstance(qc_result, pl.DataFrame) and "time" in qc_result.columns
+
+
+def run_methods_concurrently(
+    data: pl.DataFrame, method_calls: dict, executor: Executor = None, max_workers: int = None
+) -> dict:
+    """
+    Run QC methods concurrently on an executor.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    method_calls :
+        Function and kwargs of each method to run.
+    executor :
+        Executor to run methods on (default: None, so a thread pool with max_workers is used).
+    max_workers :
+        Number of threads if no executor is given.
+
+    Returns
+    -------
+    qc_results :
+        Results of each method, in the order of method_calls.
+
+    """
+    # 1. Start a thread pool if no executor is given
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    # 2. Submit all methods with the active result cache (not passed to executor threads), then gather results in order
+    qc_result_cache = result_cache.get_active_result_cache()
+    try:
+        futures = {
+            qc_method: executor.submit(_run_method_with_result_cache, qc_result_cache, qc_func, data, **filtered_kwargs)
+            for qc_method, (qc_func, filtered_kwargs) in method_calls.items()
+        }
+        wait(futures.values())
+        return {qc_method: future.result() for qc_method, future in futures.items()}
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_method_with_result_cache(
+    qc_result_cache: result_cache.QCResultCache, qc_func: callable, data: pl.DataFrame, **kwargs
+) -> object:
+    """Run a QC method with the result cache active, if given (run in executor thread or process)."""
+    with qc_result_cache or contextlib.nullcontext():
+        return qc_func(data, **kwargs)
+
+
+def filter_kwargs_for_function(func: callable, kwargs: dict) -> dict:
+    """
+    Filter kwargs to only those the function accepts.
+
+    Parameters
+    ----------
+    func :
+        Function to filter kwargs for.
+    kwargs :
+        Keyword arguments.
+
+    Returns
+    -------
+    filtered_kwargs :
+        Keyword arguments accepted by function.
+
+    """
+    call_plan = all_qc_checks.get_call_plan(func)
+    if call_plan["accepts_var_kwargs"]:
+        return dict(kwargs)
+    return {k: v for k, v in kwargs.items() if k in call_plan["accepted_keys"]}
+
+
+def plan_shared_products(
+    qc_framework: dict, qc_methods_to_run: list, method_kwargs: dict, shared_products: dict = None
+) -> dict:
+    """
+    Plan which intermediate products to compute for the QC methods being run.
+
+    Each QC method lists the products it needs in its framework entry (i.e. {"function": ..., "needs": [...]}).
+    Methods needing the same product with the same keyword arguments share one product, which is only computed once.
+    Products that are already given in the kwargs of a method, not needed by it (see "skip_if") or missing arguments
+    the product needs (so the method raises its own error), are not planned.
+
+    Parameters
+    ----------
+    qc_framework :
+        QC framework dictionary.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    method_kwargs :
+        Keyword arguments of each method.
+    shared_products :
+        Products that can be shared between methods (default: SHARED_PRODUCTS)
+
+    Returns
+    -------
+    product_plan :
+        Planned products by product key, with its name, kwargs, product keys it needs and methods that use it.
+
+    """
+    shared_products = shared_products or SHARED_PRODUCTS
+    product_plan = {}
+    for qc_method in qc_methods_to_run:
+        for product_name in qc_framework[qc_method].get("needs", []):
+            add_product_to_plan(product_plan, product_name, method_kwargs[qc_method], qc_method, shared_products)
+    return product_plan
+
+
+def add_product_to_plan(
+    product_plan: dict, product_name: str, kwargs: dict, qc_method: str | None, shared_products: dict
+) -> tuple | None:
+    """
+    Add a product and the products it needs to a product plan.
+
+    Parameters
+    ----------
+    product_plan :
+        Planned products by product key.
+    product_name :
+        Name of product in shared_products.
+    kwargs :
+        Keyword arguments of the method needing the product.
+    qc_method :
+        Method that uses the product (None if only needed by another product).
+    shared_products :
+        Products that can be shared between methods.
+
+    Returns
+    -------
+    product_key :
+        Key of product in product plan (None if product is not needed).
+
+    """
+    product = shared_products[product_name]
+    # 1. Check if product is already given, not needed or missing arguments (so the method raises its own error)
+    if kwargs.get(product_name) is not None or any(kwargs.get(key) for key in product.get("skip_if", [])):
+        return None
+    call_plan = all_qc_checks.get_call_plan(product["function"])
+    required_params = [
+        param_name
+        for param_name in call_plan["param_names"]
+        if param_name not in call_plan["defaults"]
+        and param_name not in [product["data_param"], *product.get("needs", [])]
+    ]
+    if any(param_name not in kwargs for param_name in required_params):
+        return None
+
+    # 2. Add products that this product needs
+    needed_product_keys = [
+        add_product_to_plan(product_plan, needed_product_name, kwargs, None, shared_products)
+        for needed_product_name in product.get("needs", [])
+    ]
+
+    # 3. Products with the same name and kwargs are shared
+    product_kwargs = filter_kwargs_for_function(product["function"], kwargs)
+    product_kwargs.pop(product["data_param"], None)
+    product_key = (product_name, make_hashable(product_kwargs))
+    planned_product = product_plan.setdefault(
+        product_key,
+        {
+            "product": product_name,
+            "kwargs": product_kwargs,
+            "needs": [key for key in needed_product_keys if key is not None],
+            "used_by": [],
+        },
+    )
+    if qc_method is not None:
+        planned_product["used_by"].append(qc_method)
+    return product_key
+
+
+def compute_shared_products(data: pl.DataFrame, product_plan: dict, shared_products: dict = None) -> dict:
+    """
+    Compute planned products in dependency order.
+
+    If a product raises one of its "errors" (i.e. it cannot be made for the data or kwargs of the methods), the methods
+    using it are run without it, so they compute it themselves and raise their own errors. Other errors are raised.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    product_plan :
+        Planned products from 'plan_shared_products'.
+    shared_products :
+        Products that can be shared between methods (default: SHARED_PRODUCTS)
+
+    Returns
+    -------
+    method_products :
+        Products to pass as keyword arguments to each method.
+
+    """
+    shared_products = shared_products or SHARED_PRODUCTS
+
+    # 1. Compute products after the products they need
+    product_dag = graphlib.TopologicalSorter({key: planned["needs"] for key, planned in product_plan.items()})
+    product_values = {}
+    for product_key in product_dag.static_order():
+        planned_product = product_plan[product_key]
+        product = shared_products[planned_product["product"]]
+        product_kwargs = {
+            **planned_product["kwargs"],
+            **{product_plan[key]["product"]: product_values[key] for key in planned_product["needs"]},
+        }
+        if product["data_param"]:
+            product_kwargs[product["data_param"]] = data
+        try:
+            # products are given to checks that may need DataFrames, so LazyFrames are collected
+            product_values[product_key] = data_utils.collect_if_lazy(product["function"](**product_kwargs))
+        except product.get("errors", ()):
+            product_values[product_key] = None
+
+    # 2. Give each method its products
+    method_products = {}
+    for product_key, planned_product in product_plan.items():
+        if product_values[product_key] is None:
+            continue
+        for qc_method in planned_product["used_by"]:
+            method_products.setdefault(qc_method, {})[planned_product["product"]] = product_values[product_key]
+    return method_products
+
+
+def compute_annual_statistics(
+    data: pl.DataFrame | pl.LazyFrame, qc_framework: dict, qc_methods_to_run: list, method_kwargs: dict
+) -> dict:
+    """
+    Compute the annual statistics of all year-based methods in one aggregation for each target gauge column.
+
+    Each method gives the statistics it reads in its framework entry (i.e. {"function": ..., "annual_statistics": ...}).
+    Statistics are not computed for methods given "annual_statistics" in their kwargs, or for target gauge columns that
+    are not in data or that the statistics cannot be computed for (so those methods raise their own errors).
+
+    Parameters
+    ----------
+    data :
+        Rainfall data to QC.
+    qc_framework :
+        QC framework with the methods.
+    qc_methods_to_run :
+        Methods to run.
+    method_kwargs :
+        Keyword arguments of each method.
+
+    Returns
+    -------
+    method_products :
+        Annual statistics table of the target gauge column to pass as "annual_statistics" to each method.
+
+    """
+    # 1. Combine the statistics needed for each target gauge column
+    data_cols = data.collect_schema().names()
+    methods_by_col = {}
+    annual_statistics_by_col = {}
     for qc_method in qc_methods_to_run:
-        qc_func = qc_framework[qc_method]["function"]
-        specific_kwargs = qc_kwargs.get(qc_method, {})
-        combined_kwargs = {**shared_kwargs, **specific_kwargs}
-
-        # Filter kwargs to only those the function accepts
-        sig = inspect.signature(qc_func)
-        accepted_keys = set(sig.parameters.keys())
-        filtered_kwargs = {
-            k: v
-            for k, v in combined_kwargs.items()
-            if k in accepted_keys or any(p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values())
+        get_method_statistics = qc_framework[qc_method].get("annual_statistics")
+        kwargs = method_kwargs[qc_method]
+        target_gauge_col = kwargs.get("target_gauge_col")
+        if (
+            get_method_statistics is None
+            or kwargs.get("annual_statistics") is not None
+            or target_gauge_col not in data_cols
+        ):
+            continue
+        methods_by_col.setdefault(target_gauge_col, []).append(qc_method)
+        col_statistics = annual_statistics_by_col.setdefault(target_gauge_col, {})
+        for stat_name, stat_params in get_method_statistics(**kwargs).items():
+            col_statistics[stat_name] = list(dict.fromkeys([*col_statistics.get(stat_name, []), *stat_params]))
+
+    # 2. Compute all statistics of each column in one aggregation
+    method_products = {}
+    for target_gauge_col, col_statistics in annual_statistics_by_col.items():
+        try:
+            annual_statistics = data_utils.get_annual_statistics(data, target_gauge_col, **col_statistics)
+        except pl.exceptions.InvalidOperationError:
+            # i.e. a negative k or a column that is not numeric, so each method raises its own error
+            continue
+        for qc_method in methods_by_col[target_gauge_col]:
+            method_products[qc_method] = {"annual_statistics": annual_statistics}
+    return method_products
+
+
+def make_hashable(value: object) -> object:
+    """
+    Make a hashable version of a value, used to compare keyword arguments.
+
+    Unhashable objects that are not lists, tuples or dicts (e.g. DataFrames) are compared by identity.
+
+    Parameters
+    ----------
+    value :
+        Value to make hashable.
+
+    Returns
+    -------
+    hashable_value :
+        Hashable version of value.
+
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, make_hashable(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(make_hashable(val) for val in value)
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return value
+
+
+def run_qc_framework_on_network(
+    network_reader: data_readers.GaugeNetworkReader,
+    qc_framework: str,
+    target_ids: list,
+    qc_methods_to_run: list,
+    qc_kwargs: dict,
+    distance_threshold: int | float,
+    n_closest: int,
+    min_overlap_days: int,
+    load_data_kwargs: dict = None,
+    user_defined_framework: dict = None,
+    max_workers: int = None,
+    output_format: str = "dict",
+    qc_result_cache: result_cache.QCResultCache = None,
+    etccdi_reference_table: pl.DataFrame = None,
+    neighbour_graph_dir: str = None,
+) -> Iterator[tuple[str, dict | tuple[pl.DataFrame, pl.DataFrame] | BaseException]]:
+    """
+    Run QC methods from a QC framework on many target gauges of a gauge network, spread over a process pool.
+
+    For each target gauge, the nearest overlapping neighbours are found, the target and neighbour data is loaded, and
+    'target_gauge_col', 'list_of_nearest_stations', 'nearest_neighbour', 'gauge_lat' and 'gauge_lon' are set as
+    shared keyword arguments for that gauge. The 'time_res' is taken from the network reader if not given in qc_kwargs.
+
+    Parameters
+    ----------
+    network_reader :
+        Gauge network reader i.e. GSDRNetworkReader or GPCCNetworkReader.
+    qc_framework :
+        QC framework to run, can be 'in-built' type i.e. IntenseQC or pyPWSQC or 'custom' for user-defined.
+    target_ids :
+        Station IDs of target gauges to QC.
+    qc_methods_to_run :
+        Which methods should be run within that framework i.e. [QC1, QC2]
+    qc_kwargs :
+        Keyword arguments to pass to QC framework methods.
+    distance_threshold :
+        Distance threshold to check for neighbours
+    n_closest :
+        Number of nearest neighbours to use
+    min_overlap_days :
+        Minimum time overlap between target and neighbours
+    load_data_kwargs :
+        Keyword arguments for the 'load_network_data' method of the network reader i.e. {'rain_col_prefix': 'rain'}
+    user_defined_framework :
+        A user-defined QC framework dictionary, required if qc_framework is 'custom'.
+    max_workers :
+        Number of worker processes (default is number of CPUs)
+    output_format :
+        Either 'dict' or 'columnar', see 'run_qc_framework'.
+    qc_result_cache :
+        On-disk cache of results shared by all worker processes, see 'run_qc_framework'.
+    etccdi_reference_table :
+        Local ETCCDI values of the network gauges from 'gauge_climatology.get_etccdi_reference_table'. If given, each
+        target gauge gets a 'climatology' from it, so the ETCCDI checks do not load ETCCDI data (default: None)
+    neighbour_graph_dir :
+        Directory of saved neighbour graphs, see 'GaugeNetworkReader.get_neighbour_graph' (default: None)
+
+    Yields
+    ------
+    target_id :
+        Station ID of target gauge.
+    qc_results :
+        Results of running QC framework on target gauge, returned as each gauge finishes. If the gauge failed, this is
+        the exception it raised instead, so one failing gauge does not stop the other gauges.
+
+    """
+    # 1. Find neighbours of all gauges once, so each worker only looks them up
+    network_reader.get_neighbour_ids(distance_threshold, n_closest, min_overlap_days, neighbour_graph_dir)
+
+    # 2. Start one reader per worker process, so the network metadata is only sent once to each worker.
+    # Workers are spawned rather than forked, as forking a process that has started the polars thread pool can deadlock
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_network_worker,
+        initargs=(network_reader, etccdi_reference_table),
+    )
+    try:
+        # 3. Submit each target gauge
+        futures = {
+            executor.submit(
+                _run_qc_framework_on_network_target,
+                target_id,
+                qc_framework,
+                qc_methods_to_run,
+                qc_kwargs,
+                distance_threshold,
+                n_closest,
+                min_overlap_days,
+                load_data_kwargs or {},
+                user_defined_framework,
+                output_format,
+                qc_result_cache,
+            ): target_id
+            for target_id in target_ids
         }
-        qc_results[qc_method] = qc_func(data, **filtered_kwargs)
 
-    return qc_results
+        # 4. Return results (or the error of a failed gauge) as each gauge finishes
+        for future in as_completed(futures):
+            target_error = future.exception()
+            yield futures[future], target_error if target_error is not None else future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _init_network_worker(
+    network_reader: data_readers.GaugeNetworkReader, etccdi_reference_table: pl.DataFrame = None
+) -> None:
+    """Store the network reader and ETCCDI reference table in the worker process."""
+    _NETWORK_WORKER_STATE["network_reader"] = network_reader
+    _NETWORK_WORKER_STATE["etccdi_reference_table"] = etccdi_reference_table
+
+
+def _run_qc_framework_on_network_target(
+    target_id: str,
+    qc_framework: str,
+    qc_methods_to_run: list,
+    qc_kwargs: dict,
+    distance_threshold: int | float,
+    n_closest: int,
+    min_overlap_days: int,
+    load_data_kwargs: dict,
+    user_defined_framework: dict,
+    output_format: str,
+    qc_result_cache: result_cache.QCResultCache,
+) -> dict | tuple[pl.DataFrame, pl.DataFrame]:
+    """Load data of a target gauge and its neighbours and run QC framework on it (run in worker process)."""
+    network_reader = _NETWORK_WORKER_STATE["network_reader"]
+    metadata = network_reader.metadata
+
+    # 1. Resolve neighbours of target from the neighbour graph (nearest first, so the first is the nearest neighbour)
+    all_neighbour_ids = network_reader.get_neighbour_ids(distance_threshold, n_closest, min_overlap_days)
+    if target_id not in all_neighbour_ids:
+        raise ValueError(
+            f"Network metadata does not contain value: '{target_id}' in column '{neighbourhood_utils.STATION_ID_COL}'"
+        )
+    neighbour_ids = all_neighbour_ids[target_id]
+
+    # 2. Load target and neighbour data
+    station_metadata = metadata.filter(pl.col(neighbourhood_utils.STATION_ID_COL).is_in([target_id, *neighbour_ids]))
+    network_data = network_reader.load_network_data(data_paths=station_metadata["path"], **load_data_kwargs)
+    gauge_cols = get_gauge_cols_by_station_id(network_data, station_metadata[neighbourhood_utils.STATION_ID_COL])
+
+    # 3. Set per-gauge keyword arguments
+    target_metadata = metadata.filter(pl.col(neighbourhood_utils.STATION_ID_COL) == target_id)
+    gauge_kwargs = {
+        "target_gauge_col": gauge_cols[target_id],
+        "list_of_nearest_stations": [gauge_cols[neighbour_id] for neighbour_id in neighbour_ids],
+        "nearest_neighbour": gauge_cols[neighbour_ids[0]] if neighbour_ids else None,
+        "gauge_lat": target_metadata["latitude"].item(),
+        "gauge_lon": target_metadata["longitude"].item(),
+    }
+    etccdi_reference_table = _NETWORK_WORKER_STATE.get("etccdi_reference_table")
+    if etccdi_reference_table is not None:
+        gauge_kwargs["climatology"] = gauge_climatology.get_gauge_climatology_from_reference_table(
+            etccdi_reference_table, target_id
+        )
+    shared_kwargs = {**qc_kwargs.get("shared", {}), **gauge_kwargs}
+    shared_kwargs.setdefault("time_res", NETWORK_TIME_RES_CONVERSION.get(network_reader.time_res))
+
+    # 4. Run QC framework on target gauge
+    return run_qc_framework(
+        network_data,
+        qc_framework=qc_framework,
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs={**qc_kwargs, "shared": shared_kwargs},
+        user_defined_framework=user_defined_framework,
+        output_format=output_format,
+        qc_result_cache=qc_result_cache,
+    )
+
+
+def get_gauge_cols_by_station_id(network_data: pl.DataFrame, station_ids: list | pl.Series) -> dict:
+    """
+    Get the rain column of each gauge in network data from its station ID.
+
+    Network readers add one rain column for each data path after "time", in the order the paths are given, so columns
+    are matched to the station IDs of those paths by position rather than by name.
+
+    Parameters
+    ----------
+    network_data :
+        Rainfall data of gauge network from 'load_network_data'.
+    station_ids :
+        Station IDs of gauges in the order of the data paths given to 'load_network_data'.
+
+    Returns
+    -------
+    gauge_cols :
+        Column of each gauge in network data by station ID.
+
+    Raises
+    ------
+    ValueError :
+        If the number of rain columns is not the number of station IDs.
+
+    """
+    station_ids = list(station_ids)
+    rain_cols = [col for col in network_data.columns if col != "time"]
+    if len(rain_cols) != len(station_ids):
+        raise ValueError(
+            f"Network data has {len(rain_cols)} rain columns ({rain_cols}) but {len(station_ids)} station IDs are given"
+        )
+    return dict(zip(station_ids, rain_cols, strict=True))
@@ -1,66 +1,314 @@
 # -*- coding: utf-8 -*-
 """In-built QC frameworks to apply to rainfall data to create quality controlled data."""
 
+import datetime
+import functools
+
+import polars as pl
+
 from rainfallqc.checks import comparison_checks, gauge_checks, neighbourhood_checks, pypwsqc_filters, timeseries_checks
+from rainfallqc.utils import data_utils, gauge_climatology
+
+
+def get_halo_in_days(
+    look_back_days: int | float, look_ahead_days: int | float, **kwargs
+) -> tuple[datetime.timedelta, datetime.timedelta]:
+    """
+    Get a halo of a fixed number of days.
+
+    Parameters
+    ----------
+    look_back_days :
+        Days of data needed before a block of time.
+    look_ahead_days :
+        Days of data needed after a block of time.
+    kwargs :
+        Keyword arguments of the check (not used).
+
+    Returns
+    -------
+    halo :
+        Time needed before and after a block of time.
+
+    """
+    return datetime.timedelta(days=look_back_days), datetime.timedelta(days=look_ahead_days)
 
+
+def get_dry_period_halo(dry_period_days: int = 15, **kwargs) -> tuple[datetime.timedelta, datetime.timedelta]:
+    """
+    Get the halo of the dry neighbour checks, which flag dry periods of 'dry_period_days'.
+
+    Parameters
+    ----------
+    dry_period_days :
+        Length for of a "dry_spell" (default: 15 days)
+    kwargs :
+        Other keyword arguments of the check (not used).
+
+    Returns
+    -------
+    halo :
+        Time needed before and after a block of time.
+
+    """
+    # dry spell fractions look back a dry period, and flags are back-propagated from up to a dry period ahead
+    return get_halo_in_days(dry_period_days + 1, dry_period_days + 1)
+
+
+def get_durations_halo(
+    extra_days: int | float, durations: list = None, **kwargs
+) -> tuple[datetime.timedelta, datetime.timedelta]:
+    """
+    Get the halo of the checks of rolling totals over 'durations' (QC10 and QC11).
+
+    Parameters
+    ----------
+    extra_days :
+        Days of data needed before and after a block of time, as well as the longest duration.
+    durations :
+        Durations of rolling totals i.e. ['1h', '1d'] (default: None, no rolling totals)
+    kwargs :
+        Other keyword arguments of the check (not used).
+
+    Returns
+    -------
+    halo :
+        Time needed before and after a block of time.
+
+    """
+    # rolling totals look back the longest duration, and flags are spread back from windows ending up to it ahead
+    longest_duration = max(
+        (data_utils.convert_duration_str_to_timedelta(duration) for duration in durations or []),
+        default=datetime.timedelta(0),
+    )
+    return longest_duration + datetime.timedelta(days=extra_days), longest_duration + datetime.timedelta(
+        days=extra_days
+    )
+
+
+def get_percentile_annual_statistics(percentile: float = None, **kwargs) -> dict:
+    """
+    Get the annual statistics needed by the percentile check (QC1).
+
+    Parameters
+    ----------
+    percentile :
+        Percentile the check compares to zero (default: None, so not given and the check raises its own error).
+    kwargs :
+        Other keyword arguments of the check (not used).
+
+    Returns
+    -------
+    annual_statistics :
+        Keyword arguments of 'data_utils.get_annual_statistics'.
+
+    """
+    return {"percentiles": [percentile]} if percentile is not None else {}
+
+
+def get_kth_largest_annual_statistics(k: int = None, **kwargs) -> dict:
+    """
+    Get the annual statistics needed by the k-largest check (QC2).
+
+    Parameters
+    ----------
+    k :
+        Number of the largest values the check takes for each year (default: None, so not given and the check raises
+        its own error).
+    kwargs :
+        Other keyword arguments of the check (not used).
+
+    Returns
+    -------
+    annual_statistics :
+        Keyword arguments of 'data_utils.get_annual_statistics'.
+
+    """
+    return {"k_largest": [k]} if k is not None else {}
+
+
+def get_etccdi_annual_statistics(**kwargs) -> dict:
+    """
+    Get the annual statistics needed by the R99p and PRCPTOT checks (QC8 and QC9).
+
+    Parameters
+    ----------
+    kwargs :
+        Keyword arguments of the check (not used).
+
+    Returns
+    -------
+    annual_statistics :
+        Keyword arguments of 'data_utils.get_annual_statistics'.
+
+    """
+    return {"sum_above_percentiles": [99]}
+
+
+# Halos of row-wise checks that can be run on blocks of time (see 'run_qc_framework_in_chunks'). Each halo is a function
+# of the check keyword arguments returning the time of data needed before and after a block to flag it exactly.
+NO_HALO = functools.partial(get_halo_in_days, 0, 0)
+ONE_DAY_HALO = functools.partial(get_halo_in_days, 1, 1)
+TWO_DAY_HALO = functools.partial(get_halo_in_days, 2, 2)
+ONE_MONTH_HALO = functools.partial(get_halo_in_days, 32, 32)
+WORLD_RECORD_HALO = functools.partial(get_durations_halo, 0)
+RX1DAY_HALO = functools.partial(get_durations_halo, 1)
+
+# Intermediate products shared between checks of a framework run. Each product is passed to the checks that list it in
+# "needs" using a keyword argument of the same name. "data_param" is the parameter the rainfall data is passed as,
+# "skip_if" are check keyword arguments that make the product unnecessary for that check and "errors" are the exceptions
+# raised when the product cannot be made for the data or keyword arguments of a check (so the check raises its own).
+SHARED_PRODUCTS = {
+    "daily_neighbour_data": {
+        "function": neighbourhood_checks.resample_neighbour_data_to_daily,
+        "data_param": "neighbour_data",
+        "errors": (AssertionError,),  # time_res is not sub-daily
+    },
+    "monthly_neighbour_data": {
+        "function": neighbourhood_checks.resample_neighbour_data_to_monthly,
+        "data_param": "neighbour_data",
+        "errors": (ValueError,),  # time step of data is not 15 minutes, hourly or daily
+    },
+    "climatology": {
+        "function": gauge_climatology.GaugeClimatology,
+        "data_param": None,
+        "skip_if": ["accumulation_threshold"],
+    },
+    "gauge_dry_spell_lengths": {
+        "function": timeseries_checks.get_dry_spell_duration,
+        "data_param": "data",
+        "errors": (pl.exceptions.ColumnNotFoundError,),  # target_gauge_col is not in data
+    },
+}
+
+# Each check of a framework has a "function" and optionally the shared products it "needs". Row-wise checks that can be
+# run on blocks of time have a "halo", and "whole_record_kwargs" are keyword arguments that have to be computed from the
+# whole record first (i.e. thresholds and fitted distributions) by the given functions. Year-based checks give the
+# "annual_statistics" they read (a function of the check keyword arguments), so these are computed in one aggregation.
 INTENSE_QC = {
-    "QC1": {"function": gauge_checks.check_years_where_nth_percentile_is_zero},
-    "QC2": {"function": gauge_checks.check_years_where_annual_kth_largest_value_is_zero},
+    "QC1": {
+        "function": gauge_checks.check_years_where_nth_percentile_is_zero,
+        "annual_statistics": get_percentile_annual_statistics,
+    },
+    "QC2": {
+        "function": gauge_checks.check_years_where_annual_kth_largest_value_is_zero,
+        "annual_statistics": get_kth_largest_annual_statistics,
+    },
     "QC3": {"function": gauge_checks.check_temporal_bias},
     "QC4": {"function": gauge_checks.check_temporal_bias},
     "QC5": {"function": gauge_checks.check_intermittency},
     "QC6": {"function": gauge_checks.check_breakpoints},
     "QC7": {"function": gauge_checks.check_min_val_change},
-    "QC8": {"function": comparison_checks.check_annual_exceedance_etccdi_r99p},
-    "QC9": {"function": comparison_checks.check_annual_exceedance_etccdi_prcptot},
-    "QC10": {"function": comparison_checks.check_exceedance_of_rainfall_world_record},
-    "QC11": {"function": comparison_checks.check_hourly_exceedance_etccdi_rx1day},
-    "QC12": {"function": timeseries_checks.check_dry_period_cdd},
-    "QC13": {"function": timeseries_checks.check_daily_accumulations},
-    "QC14": {"function": timeseries_checks.check_monthly_accumulations},
-    "QC15": {"function": timeseries_checks.check_streaks},
-    "QC16": {"function": neighbourhood_checks.check_wet_neighbours_daily},
-    "QC17": {"function": neighbourhood_checks.check_wet_neighbours_hourly},
-    "QC18": {"function": neighbourhood_checks.check_dry_neighbours_daily},
-    "QC19": {"function": neighbourhood_checks.check_dry_neighbours_hourly},
-    "QC20": {"function": neighbourhood_checks.check_monthly_neighbours},
+    "QC8": {
+        "function": comparison_checks.check_annual_exceedance_etccdi_r99p,
+        "needs": ["climatology"],
+        "annual_statistics": get_etccdi_annual_statistics,
+    },
+    "QC9": {
+        "function": comparison_checks.check_annual_exceedance_etccdi_prcptot,
+        "needs": ["climatology"],
+        "annual_statistics": get_etccdi_annual_statistics,
+    },
+    "QC10": {"function": comparison_checks.check_exceedance_of_rainfall_world_record, "halo": WORLD_RECORD_HALO},
+    "QC11": {
+        "function": comparison_checks.check_hourly_exceedance_etccdi_rx1day,
+        "needs": ["climatology"],
+        "halo": RX1DAY_HALO,
+    },
+    "QC12": {"function": timeseries_checks.check_dry_period_cdd, "needs": ["climatology", "gauge_dry_spell_lengths"]},
+    "QC13": {
+        "function": timeseries_checks.check_daily_accumulations,
+        "needs": ["climatology"],
+        "halo": TWO_DAY_HALO,
+        "whole_record_kwargs": {"accumulation_threshold": timeseries_checks.get_daily_accumulation_threshold},
+    },
+    "QC14": {
+        "function": timeseries_checks.check_monthly_accumulations,
+        "needs": ["climatology", "gauge_dry_spell_lengths"],
+        "halo": ONE_MONTH_HALO,
+        "whole_record_kwargs": {"accumulation_threshold": timeseries_checks.get_monthly_accumulation_threshold},
+    },
+    "QC15": {"function": timeseries_checks.check_streaks, "needs": ["climatology"]},
+    "QC16": {
+        "function": neighbourhood_checks.check_wet_neighbours_daily,
+        "halo": ONE_DAY_HALO,
+        "whole_record_kwargs": {"wet_day_statistics": neighbourhood_checks.get_neighbour_wet_day_statistics},
+    },
+    "QC17": {
+        "function": neighbourhood_checks.check_wet_neighbours_hourly,
+        "needs": ["daily_neighbour_data"],
+        "halo": TWO_DAY_HALO,
+        "whole_record_kwargs": {"wet_day_statistics": neighbourhood_checks.get_neighbour_wet_day_statistics},
+    },
+    "QC18": {"function": neighbourhood_checks.check_dry_neighbours_daily, "halo": get_dry_period_halo},
+    "QC19": {
+        "function": neighbourhood_checks.check_dry_neighbours_hourly,
+        "needs": ["daily_neighbour_data"],
+        "halo": get_dry_period_halo,
+    },
+    "QC20": {
+        "function": neighbourhood_checks.check_monthly_neighbours,
+        "needs": ["monthly_neighbour_data"],
+        "halo": ONE_MONTH_HALO,
+        "whole_record_kwargs": {"neighbour_monthly_max": neighbourhood_checks.get_neighbour_monthly_max},
+    },
     "QC21": {"function": neighbourhood_checks.check_timing_offset},
     "QC22": {"function": neighbourhood_checks.check_neighbour_affinity_index},
     "QC23": {"function": neighbourhood_checks.check_neighbour_correlation},
     "QC24": {"function": neighbourhood_checks.check_daily_factor},
-    "QC25": {"function": neighbourhood_checks.check_monthly_factor},
+    "QC25": {"function": neighbourhood_checks.check_monthly_factor, "halo": NO_HALO},
 }
 
 INTENSE_RULEBASE_QC = {
     "QC2": {
         "function": gauge_checks.check_years_where_annual_kth_largest_value_is_zero,
+        "annual_statistics": get_kth_largest_annual_statistics,
     },
     "QC10": {
         "function": comparison_checks.check_exceedance_of_rainfall_world_record,
+        "halo": WORLD_RECORD_HALO,
     },
     "QC11": {
         "function": comparison_checks.check_hourly_exceedance_etccdi_rx1day,
+        "needs": ["climatology"],
+        "halo": RX1DAY_HALO,
     },
     "QC12": {
         "function": timeseries_checks.check_dry_period_cdd,
+        "needs": ["climatology", "gauge_dry_spell_lengths"],
     },
     "QC13": {
         "function": timeseries_checks.check_daily_accumulations,
+        "needs": ["climatology"],
+        "halo": TWO_DAY_HALO,
+        "whole_record_kwargs": {"accumulation_threshold": timeseries_checks.get_daily_accumulation_threshold},
     },
     "QC14": {
         "function": timeseries_checks.check_monthly_accumulations,
+        "needs": ["climatology", "gauge_dry_spell_lengths"],
+        "halo": ONE_MONTH_HALO,
+        "whole_record_kwargs": {"accumulation_threshold": timeseries_checks.get_monthly_accumulation_threshold},
     },
     "QC15": {
         "function": timeseries_checks.check_streaks,
+        "needs": ["climatology"],
     },
     "QC17": {
         "function": neighbourhood_checks.check_wet_neighbours_hourly,
+        "needs": ["daily_neighbour_data"],
+        "halo": TWO_DAY_HALO,
+        "whole_record_kwargs": {"wet_day_statistics": neighbourhood_checks.get_neighbour_wet_day_statistics},
     },
     "QC19": {
         "function": neighbourhood_checks.check_dry_neighbours_hourly,
+        "needs": ["daily_neighbour_data"],
+        "halo": get_dry_period_halo,
     },
     "QC20": {
         "function": neighbourhood_checks.check_monthly_neighbours,
+        "needs": ["monthly_neighbour_data"],
+        "halo": ONE_MONTH_HALO,
+        "whole_record_kwargs": {"neighbour_monthly_max": neighbourhood_checks.get_neighbour_monthly_max},
     },
 }
 
@@ -78,19 +326,21 @@ INBUILT_QC_FRAMEWORKS = {"intenseqc": INTENSE_QC, "intenseqc_rulebase_only": INT
 
 
 # all checks that are computed as summary of overall data or once per year values
-NON_ROWWISE_QC_CHECKS = ["QC1", "QC2", "QC3", "QC4", "QC5", "QC7", "QC8", "QC9", "QC21", "QC22", "QC23"]
+NON_ROWWISE_QC_CHECKS = ["QC1", "QC2", "QC3", "QC4", "QC5", "QC6", "QC7", "QC8", "QC9", "QC21", "QC22", "QC23", "QC24"]
 NON_ROWWISE_QC_CHECKS_NAMES = [
     "percentiles_zero",
     "k-largest_zero",
     "days_of_week",
     "hours_of_day",
     "intermittency",
+    "breakpoints",
     "min_val_change",
     "r99p",
     "prcptot",
     "timings_offset",
     "affinity_index",
     "pearson_corr",
+    "daily_factor",
 ]
 NON_ROWWISE_QC_CONVERTER = dict(zip(NON_ROWWISE_QC_CHECKS, NON_ROWWISE_QC_CHECKS_NAMES, strict=True))
 
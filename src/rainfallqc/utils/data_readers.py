@@ -5,9 +5,15 @@ Data loading tools.
 Classes for reading rain gauge network data at bottom of file.
 """
 
+import collections
+import contextlib
 import datetime
 import glob
+import hashlib
+import json
 import os.path
+import tempfile
+import threading
 import zipfile
 from abc import ABC, abstractmethod
 from importlib import resources
@@ -25,6 +31,9 @@ MONTHLY_MULTIPLYING_FACTORS = {"15m": 96 * 24, "hourly": 30 * 24, "daily": 30, "
 GSDR_TIME_RES_CONVERSION = {"1hr": "hourly", "1d": "daily", "1mo": "monthly"}
 GPCC_TIME_RES_CONVERSION = {"tw": "daily", "mw": "monthly"}
 GPCC_HOUR_OFFSET = 7  # Apparently the GSDR data runs from 7am to 7am, so this converts it for comparison
+ETCCDI_CACHE_MAX_SIZE_BYTES = 256 * 1024**2  # Maximum size of ETCCDI data kept in memory by 'load_etccdi_data'
+CACHE_DIR_ENV_VAR = "RAINFALLQC_CACHE_DIR"  # Directory to keep files made from input data in between runs
+NEIGHBOUR_GRAPH_FORMAT_VERSION = 1
 
 
 def read_gsdr_metadata(data_path: str) -> dict:
@@ -323,16 +332,21 @@ def add_datetime_to_gsdr_data(
     return gsdr_data
 
 
-def load_etccdi_data(etccdi_var: str, path_to_etccdi: str = None) -> xr.Dataset:
+def load_etccdi_data(etccdi_var: str, path_to_etccdi: str = None, use_cache: bool = True) -> xr.Dataset:
     """
     Load ETCCDI data.
 
+    Loaded data is kept in memory by 'ETCCDI_CACHE', so each file is only read once per process (see
+    'clear_etccdi_cache').
+
     Parameters
     ----------
     etccdi_var :
         variable to load from ETCCDI
     path_to_etccdi :
         path to ETCCDI data (default is location of data in tests)
+    use_cache :
+        Whether to use data kept in memory from a previous call (default: True)
 
     Returns
     -------
@@ -340,21 +354,67 @@ def load_etccdi_data(etccdi_var: str, path_to_etccdi: str = None) -> xr.Dataset:
         Loaded data
 
     """
-    if not path_to_etccdi:
-        netcdf_file = f"RawData_HADEX2_{etccdi_var}_1951-2010_ANN_from-90to90_from-180to180.nc"
-        path_to_etccdi_data = resources.files("rainfallqc.data.ETCCDI").joinpath(netcdf_file)
-        etccdi_data = xr.open_dataset(str(path_to_etccdi_data), decode_timedelta=True, engine="netcdf4")
-    else:
+    if not use_cache:
+        return read_etccdi_data(etccdi_var, path_to_etccdi)
+    return ETCCDI_CACHE.get_or_load(
+        ("data", etccdi_var, path_to_etccdi), lambda: read_etccdi_data(etccdi_var, path_to_etccdi)
+    )
+
+
+def read_etccdi_data(etccdi_var: str, path_to_etccdi: str = None) -> xr.Dataset:
+    """
+    Read ETCCDI data from its NetCDF file into memory.
+
+    Parameters
+    ----------
+    etccdi_var :
+        variable to load from ETCCDI
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_data :
+        Loaded data
+
+    """
+    if path_to_etccdi:
         print(f"User defined path to ETCCDI being used: {path_to_etccdi}")
-        etccdi_data = xr.open_dataset(
-            f"{path_to_etccdi}RawData_HADEX2_{etccdi_var}_1951-2010_ANN_from-90to90_from-180to180.nc",
-            decode_timedelta=True,
-            engine="netcdf4",
-        )
+    etccdi_data = xr.open_dataset(
+        get_etccdi_data_path(etccdi_var, path_to_etccdi), decode_timedelta=True, engine="netcdf4"
+    )
     etccdi_data.load()
     return etccdi_data
 
 
+def get_etccdi_data_path(etccdi_var: str, path_to_etccdi: str = None) -> str:
+    """
+    Get path to the NetCDF file of an ETCCDI variable.
+
+    Parameters
+    ----------
+    etccdi_var :
+        variable to load from ETCCDI
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_data_path :
+        Path to NetCDF file
+
+    """
+    netcdf_file = f"RawData_HADEX2_{etccdi_var}_1951-2010_ANN_from-90to90_from-180to180.nc"
+    if not path_to_etccdi:
+        return str(resources.files("rainfallqc.data.ETCCDI").joinpath(netcdf_file))
+    return f"{path_to_etccdi}{netcdf_file}"
+
+
+def clear_etccdi_cache() -> None:
+    """Remove all ETCCDI data kept in memory by 'load_etccdi_data'."""
+    ETCCDI_CACHE.clear()
+
+
 def load_gsdr_gauge_network_metadata(path_to_gsdr_dir: str, file_format: str = ".txt") -> pl.DataFrame:
     """
     Load metadata from GSDR gauges from a directory.
@@ -474,6 +534,103 @@ def get_paths_using_gauge_ids(
     return all_data_paths
 
 
+class ETCCDICache:
+    """
+    In-memory cache of ETCCDI data shared by all threads of a process, with least recently used data removed first.
+
+    Data is keyed by a tuple (i.e. ("data", etccdi_var, path_to_etccdi)), so data derived from ETCCDI data (e.g. the
+    'CDD_days' of 'gauge_climatology.load_etccdi_local_var_data' or a 'neighbourhood_utils.ETCCDIGridIndex') can be
+    kept alongside the data it is made from. Any value with an 'nbytes' size can be cached. Cached datasets are returned
+    as shallow copies, so variables added by callers do not change the cached data.
+
+    """
+
+    def __init__(self, max_size_bytes: int = None):
+        """
+        Make empty cache.
+
+        Parameters
+        ----------
+        max_size_bytes :
+            Maximum size of all cached data in bytes (default: None, so no limit)
+
+        """
+        self.max_size_bytes = max_size_bytes
+        self._datasets = collections.OrderedDict()
+        # Re-entrant, as derived data is loaded from other cached data. Data is also loaded while holding the lock, as
+        # the NetCDF library is not thread-safe and threads needing the same data should wait for it rather than load it
+        self._lock = threading.RLock()
+
+    def get_or_load(self, key: tuple, load: callable) -> xr.Dataset | object:
+        """
+        Get data from the cache, or load it and keep it in the cache.
+
+        Parameters
+        ----------
+        key :
+            Key of data.
+        load :
+            Function without arguments that loads the data.
+
+        Returns
+        -------
+        etccdi_data :
+            Cached data (shallow copy if it is a dataset).
+
+        """
+        with self._lock:
+            if key in self._datasets:
+                # mark as recently used
+                self._datasets.move_to_end(key)
+            else:
+                self._datasets[key] = load()
+                self.evict()
+            etccdi_data = self._datasets[key]
+        return etccdi_data.copy(deep=False) if isinstance(etccdi_data, xr.Dataset) else etccdi_data
+
+    def evict(self) -> None:
+        """Remove least recently used data until the cache is within its maximum size (keeping the latest data)."""
+        if self.max_size_bytes is None:
+            return
+        with self._lock:
+            while len(self._datasets) > 1 and self.get_size_bytes() > self.max_size_bytes:
+                self._datasets.popitem(last=False)
+
+    def get_size_bytes(self) -> int:
+        """
+        Get size of all cached data.
+
+        Returns
+        -------
+        size_bytes :
+            Size of all cached data in bytes.
+
+        """
+        with self._lock:
+            return sum(dataset.nbytes for dataset in self._datasets.values())
+
+    def clear(self) -> None:
+        """Remove all cached data."""
+        with self._lock:
+            self._datasets.clear()
+
+
+ETCCDI_CACHE = ETCCDICache(max_size_bytes=ETCCDI_CACHE_MAX_SIZE_BYTES)
+
+
+def write_file_atomically(file_dir: str, file_name: str, write: callable) -> None:
+    """Write to a temporary file then rename it, so partly written files are never read."""
+    tmp_file, tmp_path = tempfile.mkstemp(dir=file_dir, suffix=".tmp")
+    try:
+        with os.fdopen(tmp_file, "wb") as file:
+            write(file)
+        os.replace(tmp_path, os.path.join(file_dir, file_name))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
 class GaugeNetworkReader(ABC):
     """Base class for reading rain gauge networks."""
 
@@ -481,6 +638,7 @@ class GaugeNetworkReader(ABC):
         """Load network reader."""
         self.path_to_gauge_network = path_to_gauge_network
         self.metadata = self._load_metadata()
+        self._neighbour_ids = {}
 
     @abstractmethod
     def _load_metadata(self) -> dict:
@@ -491,12 +649,137 @@ class GaugeNetworkReader(ABC):
     #     """Must be implemented by subclasses to load gauge network data."""
     #     pass
 
+    def get_neighbour_graph_key(self, distance_threshold: int | float, n_closest: int, min_overlap_days: int) -> str:
+        """
+        Get hash of the network metadata and neighbour parameters, which identifies a saved neighbour graph.
+
+        Parameters
+        ----------
+        distance_threshold :
+            Distance threshold to check for neighbours
+        n_closest :
+            Number of nearest neighbours to return
+        min_overlap_days :
+            Minimum time overlap between neighbours to return
+
+        Returns
+        -------
+        neighbour_graph_key :
+            Hash of metadata used to find neighbours (IDs, coordinates, start and end) and the parameters
+
+        """
+        neighbour_graph_key = hashlib.sha256(
+            self.metadata.select(
+                neighbourhood_utils.STATION_ID_COL,
+                "latitude",
+                "longitude",
+                neighbourhood_utils.START_DATETIME_COL,
+                neighbourhood_utils.END_DATETIME_COL,
+            )
+            .write_csv()
+            .encode()
+        )
+        neighbour_graph_key.update(
+            json.dumps([NEIGHBOUR_GRAPH_FORMAT_VERSION, distance_threshold, n_closest, min_overlap_days]).encode()
+        )
+        return neighbour_graph_key.hexdigest()
+
+    def get_neighbour_graph(
+        self, distance_threshold: int | float, n_closest: int, min_overlap_days: int, neighbour_graph_dir: str = None
+    ) -> pl.DataFrame:
+        """
+        Get nearest overlapping neighbours of every gauge in network, see 'neighbourhood_utils.get_neighbour_graph'.
+
+        If a neighbour graph directory is given (or the RAINFALLQC_CACHE_DIR environment variable is set), the graph is
+        saved there as Parquet, named by the hash of the metadata and parameters, and read from there on later runs.
+
+        Parameters
+        ----------
+        distance_threshold :
+            Distance threshold to check for neighbours
+        n_closest :
+            Number of nearest neighbours to return
+        min_overlap_days :
+            Minimum time overlap between neighbours to return
+        neighbour_graph_dir :
+            Directory of saved neighbour graphs (default: 'neighbour_graphs' in RAINFALLQC_CACHE_DIR, if set)
+
+        Returns
+        -------
+        neighbour_graph :
+            Neighbours of each target gauge with columns 'target_id', 'neighbour_id', 'distance_km' and 'overlap_days'
+
+        """
+        # 1. Get path to saved neighbour graph of this metadata and parameters
+        if neighbour_graph_dir is None and os.environ.get(CACHE_DIR_ENV_VAR):
+            neighbour_graph_dir = os.path.join(os.environ[CACHE_DIR_ENV_VAR], "neighbour_graphs")
+        if neighbour_graph_dir is None:
+            return neighbourhood_utils.get_neighbour_graph(
+                self.metadata, distance_threshold, n_closest, min_overlap_days
+            )
+        neighbour_graph_key = self.get_neighbour_graph_key(distance_threshold, n_closest, min_overlap_days)
+        neighbour_graph_file = f"neighbour_graph_{neighbour_graph_key}.parquet"
+
+        # 2. Read neighbour graph if already saved
+        if os.path.exists(os.path.join(neighbour_graph_dir, neighbour_graph_file)):
+            return pl.read_parquet(os.path.join(neighbour_graph_dir, neighbour_graph_file))
+
+        # 3. Build and save neighbour graph
+        neighbour_graph = neighbourhood_utils.get_neighbour_graph(
+            self.metadata, distance_threshold, n_closest, min_overlap_days
+        )
+        os.makedirs(neighbour_graph_dir, exist_ok=True)
+        write_file_atomically(neighbour_graph_dir, neighbour_graph_file, neighbour_graph.write_parquet)
+        return neighbour_graph
+
+    def get_neighbour_ids(
+        self, distance_threshold: int | float, n_closest: int, min_overlap_days: int, neighbour_graph_dir: str = None
+    ) -> dict:
+        """
+        Get IDs of nearest overlapping neighbours of every gauge in network (made once for each set of parameters).
+
+        Parameters
+        ----------
+        distance_threshold :
+            Distance threshold to check for neighbours
+        n_closest :
+            Number of nearest neighbours to return
+        min_overlap_days :
+            Minimum time overlap between neighbours to return
+        neighbour_graph_dir :
+            Directory of saved neighbour graphs, see 'get_neighbour_graph'
+
+        Returns
+        -------
+        neighbour_ids :
+            IDs of neighbouring gauges (nearest first) of each gauge ID in the network
+
+        """
+        parameters = (distance_threshold, n_closest, min_overlap_days)
+        if parameters not in self._neighbour_ids:
+            neighbour_graph = self.get_neighbour_graph(*parameters, neighbour_graph_dir=neighbour_graph_dir)
+            neighbour_ids = {station_id: [] for station_id in self.metadata[neighbourhood_utils.STATION_ID_COL]}
+            for target_id, target_neighbour_ids in (
+                neighbour_graph.group_by("target_id", maintain_order=True).agg("neighbour_id").rows()
+            ):
+                neighbour_ids[target_id] = target_neighbour_ids
+            self._neighbour_ids[parameters] = neighbour_ids
+        return self._neighbour_ids[parameters]
+
     def get_nearest_overlapping_neighbours_to_target(
-        self, target_id: str, distance_threshold: int | float, n_closest: int, min_overlap_days: int
+        self,
+        target_id: str,
+        distance_threshold: int | float,
+        n_closest: int,
+        min_overlap_days: int,
+        neighbour_graph_dir: str = None,
     ) -> set:
         """
         Get IDs of the nearest neighbours to a target whilst checking that there is at least a minimum time overlap.
 
+        Neighbours of all gauges in the network are found once for each set of parameters (see 'get_neighbour_ids'),
+        then looked up for each target.
+
         Parameters
         ----------
         target_id :
@@ -507,17 +790,23 @@ class GaugeNetworkReader(ABC):
             Number of nearest neighbours to return
         min_overlap_days :
             Minimum time overlap between neighbours to return
+        neighbour_graph_dir :
+            Directory of saved neighbour graphs, see 'get_neighbour_graph'
 
         Returns
         -------
         neighbouring_gauge_id :
-            IDs of neighbouring gauges within a given distance to target and min overlapping days
+            IDs of neighbouring gauges within a given distance to target and min overlapping days (see
+            'get_neighbour_ids' for them in order, nearest first)
 
         """
-        all_neighbour_ids = neighbourhood_utils.get_ids_of_n_nearest_overlapping_neighbouring_gauges(
-            self.metadata, target_id, distance_threshold, n_closest, min_overlap_days
-        )
-        return all_neighbour_ids
+        neighbour_ids = self.get_neighbour_ids(distance_threshold, n_closest, min_overlap_days, neighbour_graph_dir)
+        if target_id not in neighbour_ids:
+            raise ValueError(
+                f"Network metadata does not contain value: '{target_id}' in column "
+                f"'{neighbourhood_utils.STATION_ID_COL}'"
+            )
+        return set(neighbour_ids[target_id])
 
 
 class GSDRNetworkReader(GaugeNetworkReader):
@@ -5,9 +5,10 @@ All data operations for polars including datetime and calendar functionality.
 Classes and functions ordered alphabetically.
 """
 
-import calendar
+import contextlib
 import datetime
-from collections.abc import Sequence
+import threading
+from collections.abc import Iterator, Sequence
 from typing import List
 
 import numpy as np
@@ -18,12 +19,17 @@ SECONDS_IN_DAY = 86400.0
 TEMPORAL_CONVERSIONS = {"hourly": "1h", "daily": "1d", "monthly": "1mo"}
 MONTHLY_TIME_STEPS = ["28d", "29d", "30d", "31d"]
 
+# Records of data frames being validated (see 'validated_frame'), keyed by id of data frame
+_VALIDATED_FRAMES = {}
+_VALIDATED_FRAMES_LOCK = threading.RLock()
+
 
 def back_propagate_daily_data_flags(data: pl.DataFrame, flag_column: str, num_days: int) -> pl.DataFrame:
     """
     Back fill-in flags a number of days.
 
-    This will prioritise higher flag values.
+    This will prioritise higher flag values. Each row takes the highest flag in the following `num_days` (inclusive),
+    found with one rolling maximum over the reversed time axis.
 
     Parameters
     ----------
@@ -40,21 +46,17 @@ def back_propagate_daily_data_flags(data: pl.DataFrame, flag_column: str, num_da
         Data with flags back-propogated
 
     """
-    data = data.clone()
-    # Extract flag values
-    flag_values = (flag for flag in data[flag_column].unique() if (np.isfinite(flag) & (flag > 0)))
-    for flag, data_filtered in [(flag, data.filter(pl.col(flag_column) == flag)) for flag in flag_values]:
-        for time_to_use in data_filtered["time"]:
-            assert isinstance(time_to_use, datetime.datetime), "time_to_use must be datetime.datetime"
-            start_time = time_to_use - datetime.timedelta(days=num_days)
-            data = data.with_columns(
-                pl.when((pl.col("time") >= start_time) & (pl.col("time") <= time_to_use))
-                .then(flag)
-                .otherwise(pl.col(flag_column))
-                .alias(flag_column)
-            )
+    # 1. Only finite flags above 0 are back-propagated
+    flags = pl.when(pl.col(flag_column).is_finite() & (pl.col(flag_column) > 0)).then(pl.col(flag_column))
 
-    return data
+    # 2. Get highest flag from each time to num_days later (inclusive), as rolling maximum backwards in time
+    reversed_time_in_us = -pl.col("time").dt.epoch(time_unit="us").reverse()
+    back_propagated_flags = flags.reverse().rolling_max_by(
+        reversed_time_in_us, window_size=f"{int(num_days * SECONDS_IN_DAY * 1e6) + 1}i"
+    )
+
+    # 3. Keep flags where none are back-propagated
+    return data.with_columns(pl.coalesce(back_propagated_flags.reverse(), pl.col(flag_column)).alias(flag_column))
 
 
 def calculate_dry_spell_fraction(data: pl.DataFrame, target_gauge_col: str, dry_period_days: int) -> pl.Series:
@@ -90,7 +92,7 @@ def calculate_dry_spell_fraction(data: pl.DataFrame, target_gauge_col: str, dry_
     return data_dry_days["dry_spell_fraction"]
 
 
-def check_data_has_consistent_time_step(data: pl.DataFrame) -> None:
+def check_data_has_consistent_time_step(data: pl.DataFrame | pl.LazyFrame) -> None:
     """
     Check data has a consistent time step i.e. '1h'.
 
@@ -114,7 +116,7 @@ def check_data_has_consistent_time_step(data: pl.DataFrame) -> None:
         )
 
 
-def check_data_is_monthly(data: pl.DataFrame) -> None:
+def check_data_is_monthly(data: pl.DataFrame | pl.LazyFrame) -> None:
     """
     Check data is monthly.
 
@@ -141,7 +143,7 @@ def check_data_is_monthly(data: pl.DataFrame) -> None:
         raise ValueError("No timesteps found in data.")
 
 
-def check_data_is_specific_time_res(data: pl.DataFrame, time_res: str | list) -> None:
+def check_data_is_specific_time_res(data: pl.DataFrame | pl.LazyFrame, time_res: str | list) -> None:
     """
     Check data has a hourly or daily time step.
 
@@ -181,7 +183,7 @@ def check_data_is_specific_time_res(data: pl.DataFrame, time_res: str | list) ->
         )
 
 
-def check_for_negative_values(df: pl.DataFrame, target_gauge_col: str) -> bool:
+def check_for_negative_values(df: pl.DataFrame | pl.LazyFrame, target_gauge_col: str) -> bool:
     """
     Check if the target column contains any negative values.
 
@@ -198,7 +200,123 @@ def check_for_negative_values(df: pl.DataFrame, target_gauge_col: str) -> bool:
         If negative values are found in the target column.
 
     """
-    return (df[target_gauge_col] < 0).any()
+    return target_gauge_col in get_columns_with_negative_values(df, [target_gauge_col])
+
+
+def collect_if_lazy(data: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame:
+    """
+    Collect data with the polars streaming engine if it is a LazyFrame.
+
+    Parameters
+    ----------
+    data :
+        DataFrame or LazyFrame.
+
+    Returns
+    -------
+    data :
+        DataFrame.
+
+    """
+    if isinstance(data, pl.LazyFrame):
+        return data.collect(engine="streaming")
+    return data
+
+
+def collect_validated_frame(data: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame:
+    """
+    Collect data if it is a LazyFrame, only once for all checks if it is being validated within 'validated_frame'.
+
+    The collected DataFrame shares the record of the LazyFrame, so its time steps, columns with no negative values and
+    run tables are not recomputed either.
+
+    Parameters
+    ----------
+    data :
+        DataFrame or LazyFrame.
+
+    Returns
+    -------
+    data :
+        DataFrame.
+
+    """
+    record = get_validated_frame_record(data)
+    if not isinstance(data, pl.LazyFrame) or record is None:
+        return collect_if_lazy(data)
+    with record["collect_lock"]:
+        if record["collected_data"] is None:
+            collected_data = collect_if_lazy(data)
+            with _VALIDATED_FRAMES_LOCK:
+                record["collected_data"] = collected_data
+                _VALIDATED_FRAMES[id(collected_data)] = record
+    return record["collected_data"]
+
+
+def convert_flags_to_compact_dtype(data: pl.DataFrame, flag_cols: list = None) -> pl.DataFrame:
+    """
+    Convert flag columns to Int8, with null where the flag was not evaluated (NaN).
+
+    Flags only take small integer values, so Int8 uses an eighth of the memory of Float64. Columns with values that
+    are not whole numbers between -128 and 127 are left as they are.
+
+    Parameters
+    ----------
+    data :
+        Data with flag columns.
+    flag_cols :
+        Columns to convert (default: all numeric columns).
+
+    Returns
+    -------
+    data :
+        Data with compact flag columns.
+
+    """
+    if flag_cols is None:
+        flag_cols = [col for col, dtype in data.schema.items() if dtype.is_numeric()]
+
+    compact_flag_cols = []
+    for col in flag_cols:
+        # 1. NaN is not evaluated, so make null
+        flags = data[col].fill_nan(None) if data[col].dtype.is_float() else data[col]
+
+        # 2. Check all flags are whole numbers in Int8 range
+        evaluated_flags = flags.drop_nulls()
+        if evaluated_flags.len() > 0:
+            if evaluated_flags.min() < -128 or evaluated_flags.max() > 127:
+                continue
+            if flags.dtype.is_float() and not (evaluated_flags == evaluated_flags.round()).all():
+                continue
+        compact_flag_cols.append(flags.cast(pl.Int8))
+    return data.with_columns(compact_flag_cols)
+
+
+def convert_duration_str_to_timedelta(duration: str) -> datetime.timedelta:
+    """
+    Convert a duration string i.e. '15m', '24h' or '1d' to a timedelta (the inverse of 'format_timedelta_duration').
+
+    Parameters
+    ----------
+    duration :
+        Number followed by a unit of 's', 'm', 'h' or 'd', or one of TEMPORAL_CONVERSIONS i.e. 'hourly'.
+
+    Returns
+    -------
+    td :
+        Time delta of duration.
+
+    Raises
+    ------
+    ValueError :
+        If duration is not a whole number of one of the units.
+
+    """
+    duration = TEMPORAL_CONVERSIONS.get(duration, duration)
+    unit_seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if len(duration) < 2 or duration[-1] not in unit_seconds or not duration[:-1].isdigit():
+        raise ValueError(f"Duration '{duration}' is not known. Use a whole number of 's', 'm', 'h' or 'd' i.e. '24h'")
+    return datetime.timedelta(seconds=int(duration[:-1]) * unit_seconds[duration[-1]])
 
 
 def convert_datarray_seconds_to_days(series_seconds: xr.DataArray) -> np.ndarray:
@@ -220,8 +338,8 @@ def convert_datarray_seconds_to_days(series_seconds: xr.DataArray) -> np.ndarray
 
 
 def convert_daily_data_to_monthly(
-    daily_data: pl.DataFrame, rain_cols: list, perc_for_valid_month: int | float = 95
-) -> pl.DataFrame:
+    daily_data: pl.DataFrame | pl.LazyFrame, rain_cols: list, perc_for_valid_month: int | float = 95
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Convert daily data to monthly whilst setting month to NaN if less than a given percentage of days is missing.
 
@@ -268,13 +386,13 @@ def convert_daily_data_to_monthly(
 
 
 def downsample_and_fill_columns(
-    high_res_data: pl.DataFrame,
-    low_res_data: pl.DataFrame,
+    high_res_data: pl.DataFrame | pl.LazyFrame,
+    low_res_data: pl.DataFrame | pl.LazyFrame,
     data_cols: str | list[str],
     fill_limit: int,
     fill_method: str = "backward",
     time_col: str = "time",
-) -> pl.DataFrame:
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Join columns from lower resolution data to higher resolution data and fill gaps.
 
@@ -330,11 +448,11 @@ def downsample_and_fill_columns(
 
 
 def downsample_monthly_data(
-    sub_monthly_data: pl.DataFrame,
-    monthly_data: pl.DataFrame,
+    sub_monthly_data: pl.DataFrame | pl.LazyFrame,
+    monthly_data: pl.DataFrame | pl.LazyFrame,
     data_cols: str | list[str],
     time_col: str = "time",
-) -> pl.DataFrame:
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Join monthly data to hourly and fill only within same month.
 
@@ -374,6 +492,26 @@ def downsample_monthly_data(
     return result
 
 
+def expand_run_table(run_table: pl.DataFrame, cols: str | list) -> pl.DataFrame:
+    """
+    Expand columns of a run table to one row per time step of the data it was made from.
+
+    Parameters
+    ----------
+    run_table :
+        Run table from 'get_run_table'
+    cols :
+        Columns of run table to expand
+
+    Returns
+    -------
+    expanded_cols :
+        Columns with the value of each run repeated for each time step in the run
+
+    """
+    return run_table.select(pl.col(cols).repeat_by("run_len").explode())
+
+
 def extract_negative_values_from_data(data: pl.DataFrame, cols_to_extract_from: list) -> pl.DataFrame:
     """
     Extract negative values from data.
@@ -464,7 +602,164 @@ def format_timedelta_duration(td: datetime.timedelta) -> str:
         return f"{total_seconds}s"
 
 
-def get_data_timestep_as_str(data: pl.DataFrame) -> str:
+def get_annual_max_rolling_totals(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, durations: Sequence[str]
+) -> pl.DataFrame:
+    """
+    Get the maximum rolling total of each duration in each calendar year i.e. the annual maximum 24-hour rainfall.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with a consistent time step
+    target_gauge_col :
+        Column with rainfall data
+    durations :
+        Durations of rolling windows (see 'get_rolling_totals')
+
+    Returns
+    -------
+    annual_max_totals :
+        Maximum total of each duration ("{target_gauge_col}_{duration}", windows with missing values ignored) by "year"
+        of the end of the window.
+
+    """
+    rolling_totals = get_rolling_totals(data, target_gauge_col, durations)
+    total_cols = [f"{target_gauge_col}_{duration}" for duration in durations]
+    annual_max_totals = (
+        rolling_totals.group_by(pl.col("time").dt.year().alias("year"))
+        .agg(pl.col(total_cols).fill_nan(None).max())
+        .sort("year")
+    )
+    return collect_if_lazy(annual_max_totals)
+
+
+def get_annual_statistics(
+    data: pl.DataFrame | pl.LazyFrame,
+    target_gauge_col: str,
+    percentiles: Sequence = (),
+    k_largest: Sequence = (),
+    sum_above_percentiles: Sequence = (),
+    annual_statistics: pl.DataFrame = None,
+) -> pl.DataFrame:
+    """
+    Get statistics of a rainfall column for each calendar year in one aggregation.
+
+    The number of time steps ("n_time_steps"), number ("n_missing") and fraction ("missing_fraction") of missing values
+    and the minimum value above zero ("min_non_zero", NaN if only missing values are above zero and null if there are no
+    values above zero) are always included. Within 'validated_frame', statistics of each column are only computed once
+    and are shared between checks.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with time column
+    target_gauge_col :
+        Column with rainfall data
+    percentiles :
+        Percentiles (between 1-100) to get for each year, as "percentile_{p}"
+    k_largest :
+        k to get the k-th largest value of each year for, as "kth_largest_{k}"
+    sum_above_percentiles :
+        Percentiles (between 1-100) to get the sum of rainfall above for each year, as "sum_above_percentile_{p}".
+        As 'add_daily_year_col', these use values on a daily time grid from the first time step with NaN as 0 and are
+        null for years without values above the percentile.
+    annual_statistics :
+        Statistics of the column already computed i.e. by 'run_qc_framework' (default: None, so the statistics are
+        computed, or read from 'validated_frame'). Only statistics that are not in it are computed.
+
+    Returns
+    -------
+    annual_statistics :
+        Statistics with one row per "year" of data.
+
+    """
+    rain = pl.col(target_gauge_col)
+    daily_rain = rain.filter(pl.col("on_daily_grid")).fill_nan(0.0)
+
+    # 1. Expressions of requested statistics
+    stat_exprs = {
+        "n_time_steps": pl.len(),
+        "n_missing": rain.fill_nan(None).is_null().sum(),
+        "missing_fraction": rain.fill_nan(None).is_null().mean(),
+        "min_non_zero": pl.when((rain > 0).any()).then(rain.filter(rain > 0).drop_nans().min().fill_null(np.nan)),
+    }
+    for percentile in percentiles:
+        stat_exprs[f"percentile_{percentile}"] = rain.quantile(percentile / 100)
+    for k in k_largest:
+        stat_exprs[f"kth_largest_{k}"] = rain.top_k(k).min()
+    for percentile in sum_above_percentiles:
+        daily_rain_above = daily_rain.filter(daily_rain > daily_rain.quantile(percentile / 100))
+        stat_exprs[f"sum_above_percentile_{percentile}"] = pl.when(daily_rain_above.len() > 0).then(
+            daily_rain_above.sum()
+        )
+
+    # 2. Reuse statistics already given or computed within 'validated_frame'
+    record = get_validated_frame_record(data)
+    if annual_statistics is None and record is not None:
+        annual_statistics = record["annual_statistics"].get(target_gauge_col)
+    stats_to_compute = [
+        stat_name for stat_name in stat_exprs if annual_statistics is None or stat_name not in annual_statistics.columns
+    ]
+
+    # 3. Compute other statistics in one aggregation by year
+    if stats_to_compute:
+        time_since_start = (pl.col("time") - pl.col("time").min()).dt.total_microseconds()
+        new_statistics = collect_if_lazy(
+            data.with_columns(on_daily_grid=time_since_start % int(SECONDS_IN_DAY * 1e6) == 0)
+            .group_by(pl.col("time").dt.year().alias("year"))
+            .agg(**{stat_name: stat_exprs[stat_name] for stat_name in stats_to_compute})
+            .sort("year")
+        )
+        if annual_statistics is None:
+            annual_statistics = new_statistics
+        else:
+            annual_statistics = annual_statistics.join(new_statistics, on="year", how="left")
+        if record is not None:
+            with _VALIDATED_FRAMES_LOCK:
+                record["annual_statistics"][target_gauge_col] = annual_statistics
+    return annual_statistics.select("year", *stat_exprs)
+
+
+def get_columns_with_negative_values(data: pl.DataFrame | pl.LazyFrame, cols_to_check: list) -> list:
+    """
+    Get columns that contain any negative values, scanning all columns in one pass.
+
+    Columns already checked within 'validated_frame' are skipped.
+
+    Parameters
+    ----------
+    data :
+        Data to check.
+    cols_to_check :
+        Columns to check for negative values.
+
+    Returns
+    -------
+    negative_cols :
+        Columns with negative values (in order of cols_to_check).
+
+    """
+    # 1. Skip columns already checked within 'validated_frame'
+    record = get_validated_frame_record(data)
+    unchecked_cols = [
+        col for col in dict.fromkeys(cols_to_check) if record is None or col not in record["non_negative_cols"]
+    ]
+    if not unchecked_cols:
+        return []
+
+    # 2. Check for negative values
+    has_negative_values = collect_if_lazy(data.select([(pl.col(col) < 0).any() for col in unchecked_cols])).row(
+        0, named=True
+    )
+    negative_cols = [col for col in unchecked_cols if has_negative_values[col]]
+    if record is not None:
+        with _VALIDATED_FRAMES_LOCK:
+            record["non_negative_cols"].update(col for col in unchecked_cols if not has_negative_values[col])
+    return negative_cols
+
+
+def get_data_timestep_as_str(data: pl.DataFrame | pl.LazyFrame) -> str:
     """
     Get time step of data.
 
@@ -484,7 +779,7 @@ def get_data_timestep_as_str(data: pl.DataFrame) -> str:
     return format_timedelta_duration(unique_timestep[0])
 
 
-def get_data_timesteps(data: pl.DataFrame) -> pl.Series:
+def get_data_timesteps(data: pl.DataFrame | pl.LazyFrame) -> pl.Series:
     """
     Get data timesteps. Ideally the data should have 1.
 
@@ -499,8 +794,17 @@ def get_data_timesteps(data: pl.DataFrame) -> pl.Series:
         All unique time steps in data (timedelta).
 
     """
-    data_timesteps = data.with_columns([pl.col("time").diff().alias("time_step")])
+    # 1. Reuse time steps already worked out within 'validated_frame'
+    record = get_validated_frame_record(data)
+    if record is not None and record["timesteps"] is not None:
+        return record["timesteps"]
+
+    # 2. Get time steps
+    data_timesteps = collect_if_lazy(data.select([pl.col("time").diff().alias("time_step")]))
     unique_timesteps = data_timesteps["time_step"].drop_nulls().unique()
+    if record is not None:
+        with _VALIDATED_FRAMES_LOCK:
+            record["timesteps"] = unique_timesteps
     return unique_timesteps
 
 
@@ -547,7 +851,7 @@ def get_dry_spells(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFrame:
     )
 
 
-def get_expected_days_in_month(data: pl.DataFrame) -> pl.DataFrame:
+def get_expected_days_in_month(data: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
     """
     Get expected number of days in a months within the data.
 
@@ -562,16 +866,9 @@ def get_expected_days_in_month(data: pl.DataFrame) -> pl.DataFrame:
         Data with 'expected_days_in_month" column
 
     """
-    # Use map_elements + calendar.monthrange to compute days in each month
+    # Day of the end of each month is the number of days in the month
     return data.with_columns(
-        [
-            pl.struct(["year", "month"])
-            .map_elements(
-                lambda x: calendar.monthrange(x["year"], x["month"])[1],
-                return_dtype=pl.Int64,
-            )
-            .alias("expected_days_in_month")
-        ]
+        [pl.date("year", "month", 1).dt.month_end().dt.day().cast(pl.Int64).alias("expected_days_in_month")]
     )
 
 
@@ -601,7 +898,146 @@ def get_normalised_diff(data: pl.DataFrame, target_col: str, other_col: str, dif
     )
 
 
-def make_month_and_year_col(data: pl.DataFrame) -> pl.DataFrame:
+def get_rolling_totals(
+    data: pl.DataFrame | pl.LazyFrame, target_gauge_col: str, durations: Sequence[str]
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Get rainfall totals of rolling windows of several durations ending at each time step, in one pass.
+
+    Every total is the difference of two values of the cumulative sum of the data (and the number of missing values in
+    a window is the difference of two values of the cumulative count of missing values), so each duration takes one
+    subtraction per time step however long its window is. Totals of more than one time step can differ from a direct
+    sum by floating point rounding.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with a consistent time step
+    target_gauge_col :
+        Column with rainfall data
+    durations :
+        Durations of rolling windows, each a whole number of time steps of data i.e. ['15m', '1h', '24h', '72h']
+
+    Returns
+    -------
+    rolling_totals :
+        Time and total of each duration as "{target_gauge_col}_{duration}". Totals are NaN for windows with missing
+        values or that start before the data.
+
+    Raises
+    ------
+    ValueError :
+        If data has an inconsistent time step or a duration is not a whole number of time steps.
+
+    """
+    # 1. Get number of time steps in each window
+    check_data_has_consistent_time_step(data)
+    time_step = get_data_timesteps(data)[0]
+    window_steps = {}
+    for duration in durations:
+        n_steps, remainder = divmod(convert_duration_str_to_timedelta(duration), time_step)
+        if remainder or n_steps < 1:
+            raise ValueError(
+                f"Duration '{duration}' is not a whole number of time steps of data "
+                f"({format_timedelta_duration(time_step)})"
+            )
+        window_steps[duration] = n_steps
+
+    # 2. Cumulative sums of rainfall and of missing values
+    rain = pl.col(target_gauge_col).fill_nan(None)
+    cum_rain = rain.fill_null(0.0).cum_sum()
+    cum_missing = rain.is_null().cum_sum()
+
+    # 3. Total of each window is the difference of cumulative sums at its end and just before its start
+    rolling_total_exprs = []
+    for duration, n_steps in window_steps.items():
+        n_missing = cum_missing - cum_missing.shift(n_steps, fill_value=0)
+        total = rain if n_steps == 1 else cum_rain - cum_rain.shift(n_steps, fill_value=0.0)
+        is_incomplete = (pl.int_range(pl.len()) < n_steps - 1) | (n_missing > 0)
+        rolling_total_exprs.append(
+            pl.when(is_incomplete).then(np.nan).otherwise(total).alias(f"{target_gauge_col}_{duration}")
+        )
+    return data.select("time", *rolling_total_exprs)
+
+
+def get_run_table(data: pl.DataFrame, target_gauge_col: str) -> pl.DataFrame:
+    """
+    Get run-length encoding of a rainfall column, with one row per run of repeated values.
+
+    Missing values (null or NaN) are treated as NaN, so consecutive missing values are one run. Within
+    'validated_frame', the run table of each column is only made once and is shared between checks.
+
+    Parameters
+    ----------
+    data :
+        Rainfall data with time column
+    target_gauge_col :
+        Column with rainfall data
+
+    Returns
+    -------
+    run_table :
+        Runs with the row of their first time step ("start_idx"), number of time steps ("run_len"), first and last
+        time ("start", "end"), "value" and whether they are missing ("is_missing") or dry ("is_dry") periods.
+
+    """
+    # 1. Reuse run table already made within 'validated_frame'
+    record = get_validated_frame_record(data)
+    if record is not None and target_gauge_col in record["run_tables"]:
+        return record["run_tables"][target_gauge_col]
+
+    # 2. Get first time step of each run (NaN is equal to NaN in polars)
+    rain_data = data.select("time", pl.col(target_gauge_col).cast(pl.Float64).fill_null(np.nan).alias("value"))
+    run_table = (
+        rain_data.with_row_index("start_idx")
+        .filter((pl.col("value") != pl.col("value").shift(1)).fill_null(True))
+        .rename({"time": "start"})
+    )
+
+    # 3. Get length and last time step of each run
+    run_table = run_table.with_columns(
+        run_len=pl.col("start_idx").shift(-1, fill_value=len(rain_data)) - pl.col("start_idx")
+    )
+    run_table = run_table.select(
+        "start_idx",
+        "run_len",
+        "start",
+        end=rain_data["time"].gather(run_table["start_idx"] + run_table["run_len"] - 1),
+        value="value",
+        is_missing=pl.col("value").is_nan(),
+        is_dry=pl.col("value") == 0,
+    )
+    if record is not None:
+        with _VALIDATED_FRAMES_LOCK:
+            record["run_tables"][target_gauge_col] = run_table
+    return run_table
+
+
+def get_validated_frame_record(data: pl.DataFrame | pl.LazyFrame) -> dict | None:
+    """
+    Get the validation record of a data frame, if it is being validated within 'validated_frame'.
+
+    Parameters
+    ----------
+    data :
+        Data frame.
+
+    Returns
+    -------
+    record :
+        Record with the columns known to have no negative values ("non_negative_cols"), time steps of data
+        ("timesteps"), run tables by column ("run_tables"), annual statistics by column ("annual_statistics") and the
+        collected data of a LazyFrame ("collected_data", see 'collect_validated_frame'). None if data is not being
+        validated (or is not the collected data of a LazyFrame being validated).
+
+    """
+    record = _VALIDATED_FRAMES.get(id(data))
+    if record is None or (record["data"] is not data and record["collected_data"] is not data):
+        return None
+    return record
+
+
+def make_month_and_year_col(data: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
     """
     Make year and month columns for polars dataframe.
 
@@ -624,7 +1060,9 @@ def make_month_and_year_col(data: pl.DataFrame) -> pl.DataFrame:
     )
 
 
-def normalise_data(data: pl.Series | pl.expr.Expr) -> pl.Series:
+def normalise_data(
+    data: pl.Series | pl.expr.Expr, data_min: int | float = None, data_max: int | float = None
+) -> pl.Series:
     """
     Normalise data to [0, 1].
 
@@ -632,6 +1070,10 @@ def normalise_data(data: pl.Series | pl.expr.Expr) -> pl.Series:
     ----------
     data :
         Data with time column.
+    data_min :
+        Minimum of data (default: minimum of given data)
+    data_max :
+        Maximum of data (default: maximum of given data)
 
     Returns
     -------
@@ -639,7 +1081,9 @@ def normalise_data(data: pl.Series | pl.expr.Expr) -> pl.Series:
         Normalised data.
 
     """
-    return (data - data.min()) / (data.max() - data.min())
+    data_min = data.min() if data_min is None else data_min
+    data_max = data.max() if data_max is None else data_max
+    return (data - data_min) / (data_max - data_min)
 
 
 def offset_data_by_time(data: pl.DataFrame, target_col: str, offset_in_time: int, time_res: str) -> pl.DataFrame:
@@ -678,6 +1122,55 @@ def offset_data_by_time(data: pl.DataFrame, target_col: str, offset_in_time: int
     )
 
 
+def paint_intervals(data: pl.DataFrame, intervals: pl.DataFrame, data_col: str, time_col: str = "time") -> pl.DataFrame:
+    """
+    Set values of a column of data within time intervals.
+
+    Intervals are converted to row indices of the (sorted) time column and expanded to the rows they cover in one
+    pass, rather than updating the whole data frame for each interval. Where intervals overlap, the value of the
+    interval with the highest priority is used.
+
+    Parameters
+    ----------
+    data :
+        Data with time column sorted in ascending order.
+    intervals :
+        Intervals with 'start' and 'end' times (inclusive), 'value' and optionally 'priority' columns (default: the
+        priority is the row number, so later intervals overwrite earlier ones).
+    data_col :
+        Column of data to set values in (values are cast to the data type of this column).
+    time_col :
+        Column with time (default is 'time').
+
+    Returns
+    -------
+    data :
+        Data with values of intervals set in data_col.
+
+    """
+    # 1. Get rows of data covered by each interval (end index is exclusive)
+    time_vals = data[time_col]
+    if "priority" not in intervals.columns:
+        intervals = intervals.with_row_index("priority")
+    intervals = intervals.select(
+        start_idx=time_vals.search_sorted(intervals["start"].cast(time_vals.dtype), side="left"),
+        end_idx=time_vals.search_sorted(intervals["end"].cast(time_vals.dtype), side="right"),
+        value=intervals["value"].cast(data[data_col].dtype),
+        priority=intervals["priority"],
+    ).filter(pl.col("start_idx") < pl.col("end_idx"))
+
+    # 2. Expand intervals to the rows they cover, keeping the interval with the highest priority for each row
+    painted_rows = (
+        intervals.select(pl.int_ranges("start_idx", "end_idx").alias("row_idx"), "value", "priority")
+        .explode("row_idx")
+        .sort("priority", maintain_order=True)
+        .unique("row_idx", keep="last")
+    )
+
+    # 3. Set values of rows
+    return data.with_columns(data[data_col].clone().scatter(painted_rows["row_idx"], painted_rows["value"]))
+
+
 def replace_missing_vals_with_nan(
     data: pl.DataFrame,
     target_gauge_col: str,
@@ -718,8 +1211,13 @@ def replace_missing_vals_with_nan(
 
 
 def resample_data_by_time_step(
-    data: pl.DataFrame, rain_cols: List[str], time_col: str, time_step: str, min_count: int, hour_offset: int
-) -> pl.DataFrame:
+    data: pl.DataFrame | pl.LazyFrame,
+    rain_cols: List[str],
+    time_col: str,
+    time_step: str,
+    min_count: int,
+    hour_offset: int,
+) -> pl.DataFrame | pl.LazyFrame:
     """
     Group hourly data into daily and check for at least 24 daily time steps per day.
 
@@ -751,3 +1249,53 @@ def resample_data_by_time_step(
             for col in rain_cols
         ]
     )
+
+
+@contextlib.contextmanager
+def validated_frame(data: pl.DataFrame | pl.LazyFrame) -> Iterator[dict]:
+    """
+    Record which checks a data frame has passed, so these only need doing once.
+
+    Within this context, columns found to have no negative values by 'check_for_negative_values', the time steps
+    found by 'get_data_timesteps', run tables from 'get_run_table' and annual statistics from 'get_annual_statistics'
+    are remembered and not recomputed. The record is keyed by the data frame object, not its values, so callers must not
+    change the data frame in place (e.g. by 'df[col] = ...' or 'insert_column') within the context, or the record no
+    longer describes it. Methods returning a new data frame (e.g. 'with_columns') are safe. The record stays valid until
+    the context exits (contexts can be nested or entered from several threads).
+
+    Parameters
+    ----------
+    data :
+        Data frame to validate.
+
+    Returns
+    -------
+    record :
+        Record of the data frame (see 'get_validated_frame_record').
+
+    """
+    with _VALIDATED_FRAMES_LOCK:
+        record = get_validated_frame_record(data)
+        if record is None:
+            # keep reference to data, so its id cannot be reused while it is being validated
+            record = {
+                "data": data,
+                "n_users": 0,
+                "non_negative_cols": set(),
+                "timesteps": None,
+                "run_tables": {},
+                "annual_statistics": {},
+                "collected_data": None,
+                "collect_lock": threading.Lock(),
+            }
+            _VALIDATED_FRAMES[id(data)] = record
+        record["n_users"] += 1
+    try:
+        yield record
+    finally:
+        with _VALIDATED_FRAMES_LOCK:
+            record["n_users"] -= 1
+            if record["n_users"] == 0:
+                del _VALIDATED_FRAMES[id(data)]
+                if record["collected_data"] is not None:
+                    del _VALIDATED_FRAMES[id(record["collected_data"])]
@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""Local ETCCDI climatology of a rain gauge, looked up once per gauge and shared between the QC checks that need it."""
+
+import contextlib
+import json
+import os
+import threading
+
+import numpy as np
+import polars as pl
+import xarray as xr
+
+from rainfallqc.utils import data_readers, data_utils, neighbourhood_utils, spatial_utils
+
+# Variable of each ETCCDI index with the local value used by QC checks (after preparing the index data)
+ETCCDI_LOCAL_VARS = {"R99p": "R99p", "PRCPTOT": "PRCPTOT", "Rx1day": "Rx1day", "CDD": "CDD_days", "SDII": "SDII_mean"}
+
+ETCCDI_FIELDS_INDEX_FILE = "index.json"
+ETCCDI_FIELDS_FORMAT_VERSION = 1
+
+
+class GaugeClimatology:
+    """
+    Local ETCCDI climatology of a rain gauge.
+
+    Each value is looked up the first time it is needed and then remembered, so one climatology can be given to all
+    the checks of a gauge (i.e. QC8, QC9 and QC11-QC15) instead of each check loading ETCCDI data and searching for the
+    nearest grid cell with data:
+
+    >>> climatology = GaugeClimatology(gauge_lat=50.0, gauge_lon=8.0)
+    >>> climatology.get_etccdi_value("R99p")
+
+    For a whole gauge network, the values of all gauges can be looked up at once with 'get_etccdi_reference_table' and
+    given to each climatology (see 'get_gauge_climatology_from_reference_table'), so no ETCCDI data is loaded by checks.
+
+    """
+
+    def __init__(self, gauge_lat: int | float, gauge_lon: int | float, etccdi_values: dict = None):
+        """
+        Make climatology of a rain gauge (nothing is loaded until it is needed).
+
+        Parameters
+        ----------
+        gauge_lat :
+            latitude of the rain gauge
+        gauge_lon :
+            longitude of the rain gauge
+        etccdi_values :
+            Local values of ETCCDI indices already known, by index in ETCCDI_LOCAL_VARS (default: None)
+
+        """
+        self.gauge_lat = gauge_lat
+        self.gauge_lon = gauge_lon
+        self.etccdi_values = dict(etccdi_values or {})
+        self._etccdi_values = dict(self.etccdi_values)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Represent climatology by its gauge and given values, so results of checks using it can be cached."""
+        if self.etccdi_values:
+            return (
+                f"GaugeClimatology(gauge_lat={self.gauge_lat!r}, gauge_lon={self.gauge_lon!r}, "
+                f"etccdi_values={dict(sorted(self.etccdi_values.items()))!r})"
+            )
+        return f"GaugeClimatology(gauge_lat={self.gauge_lat!r}, gauge_lon={self.gauge_lon!r})"
+
+    def __getstate__(self) -> dict:
+        """Pickle without the lock, so the climatology can be sent to worker processes."""
+        return {key: val for key, val in self.__dict__.items() if key != "_lock"}
+
+    def __setstate__(self, state: dict) -> None:
+        """Unpickle and make a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_etccdi_value(self, etccdi_var: str) -> float:
+        """
+        Get the local value of an ETCCDI index at the nearest grid cell with data.
+
+        Parameters
+        ----------
+        etccdi_var :
+            ETCCDI index, one of ETCCDI_LOCAL_VARS i.e. 'R99p', 'PRCPTOT', 'Rx1day', 'CDD' (in days) or 'SDII' (mean)
+
+        Returns
+        -------
+        etccdi_val :
+            Maximum value of the index at the nearest grid cell with data
+
+        Raises
+        ------
+        ValueError :
+            If the ETCCDI index is not known.
+
+        """
+        if etccdi_var not in ETCCDI_LOCAL_VARS:
+            raise ValueError(f"ETCCDI variable '{etccdi_var}' is not known. Use one of {list(ETCCDI_LOCAL_VARS)}")
+        # Only one thread looks up each value, others wait for it and then reuse it
+        with self._lock:
+            if etccdi_var not in self._etccdi_values:
+                self._etccdi_values[etccdi_var] = self._lookup_etccdi_value(etccdi_var)
+            return self._etccdi_values[etccdi_var]
+
+    def _lookup_etccdi_value(self, etccdi_var: str) -> float:
+        """Get value of ETCCDI index reference field at the nearest grid cell with data."""
+        nearby_etccdi_fields = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
+            load_etccdi_reference_fields(),
+            etccdi_name=f"{etccdi_var}_has_values",
+            gauge_lat=self.gauge_lat,
+            gauge_lon=self.gauge_lon,
+            grid_index=get_etccdi_grid_index(etccdi_var),
+        )
+        return float(nearby_etccdi_fields[ETCCDI_LOCAL_VARS[etccdi_var]])
+
+
+def get_etccdi_reference_table(
+    metadata: pl.DataFrame,
+    max_distance_km: int | float = 500,
+    station_id_col: str = neighbourhood_utils.STATION_ID_COL,
+    lat_col: str = "latitude",
+    lon_col: str = "longitude",
+) -> pl.DataFrame:
+    """
+    Get local ETCCDI values of every gauge in a network, as used by the QC checks (see 'GaugeClimatology').
+
+    The nearest grid cell with data to all gauges is found in one query of the grid index of each ETCCDI index. The
+    table can be saved with 'write_parquet' and reused for later runs of the network.
+
+    Parameters
+    ----------
+    metadata :
+        Metadata of gauge network with station ID, latitude and longitude (i.e. 'GaugeNetworkReader.metadata')
+    max_distance_km :
+        Maximum distance in km to search for a grid cell with data (default 500 km)
+    station_id_col :
+        Column with station IDs (default: 'station_id')
+    lat_col :
+        Column with latitudes of gauges (default: 'latitude')
+    lon_col :
+        Column with longitudes of gauges (default: 'longitude')
+
+    Returns
+    -------
+    etccdi_reference_table :
+        One row per station with the local value of each ETCCDI index (i.e. 'R99p', 'CDD_days', 'SDII_mean') and the
+        distance to the grid cell it came from (i.e. 'R99p_distance_km'). Both are null where there is no grid cell with
+        data within max_distance_km
+
+    """
+    # 1. Get gauge coordinates and ETCCDI reference fields
+    etccdi_fields = load_etccdi_reference_fields()
+    etccdi_reference_table = metadata.select(
+        pl.col(station_id_col), pl.col(lat_col).cast(pl.Float64), pl.col(lon_col).cast(pl.Float64)
+    )
+    gauge_lat = etccdi_reference_table[lat_col].to_numpy()
+    gauge_lon = etccdi_reference_table[lon_col].to_numpy()
+
+    for etccdi_var, local_var in ETCCDI_LOCAL_VARS.items():
+        # 2. Get nearest grid cell with data to each gauge
+        nearest_lat, nearest_lon, distance_km = get_etccdi_grid_index(etccdi_var).query(
+            gauge_lat, gauge_lon, max_distance_km=max_distance_km
+        )
+
+        # 3. Get values of the reference field at the nearest cells
+        has_cell = ~np.isnan(nearest_lat)
+        local_values = np.full(gauge_lat.shape, np.nan)
+        local_values[has_cell] = (
+            etccdi_fields[local_var]
+            .sel(lat=xr.DataArray(nearest_lat[has_cell]), lon=xr.DataArray(nearest_lon[has_cell]))
+            .values
+        )
+
+        etccdi_reference_table = etccdi_reference_table.with_columns(
+            pl.Series(local_var, local_values).fill_nan(None),
+            pl.Series(f"{local_var}_distance_km", distance_km).fill_nan(None),
+        )
+    return etccdi_reference_table
+
+
+def get_gauge_climatology_from_reference_table(
+    etccdi_reference_table: pl.DataFrame,
+    station_id: str,
+    station_id_col: str = neighbourhood_utils.STATION_ID_COL,
+    lat_col: str = "latitude",
+    lon_col: str = "longitude",
+) -> GaugeClimatology:
+    """
+    Get climatology of a gauge with the values from an ETCCDI reference table.
+
+    Parameters
+    ----------
+    etccdi_reference_table :
+        Table from 'get_etccdi_reference_table'
+    station_id :
+        Station ID of gauge
+    station_id_col :
+        Column with station IDs (default: 'station_id')
+    lat_col :
+        Column with latitudes of gauges (default: 'latitude')
+    lon_col :
+        Column with longitudes of gauges (default: 'longitude')
+
+    Returns
+    -------
+    climatology :
+        Climatology of gauge (values missing from the table are looked up when needed, so raise their usual errors)
+
+    Raises
+    ------
+    ValueError :
+        If the station is not in the table.
+
+    """
+    gauge_row = etccdi_reference_table.filter(pl.col(station_id_col) == station_id)
+    if gauge_row.height != 1:
+        raise ValueError(
+            f"Station '{station_id}' should be in ETCCDI reference table once, not {gauge_row.height} times"
+        )
+    etccdi_values = {
+        etccdi_var: gauge_row[local_var].item()
+        for etccdi_var, local_var in ETCCDI_LOCAL_VARS.items()
+        if local_var in gauge_row.columns and gauge_row[local_var].item() is not None
+    }
+    return GaugeClimatology(gauge_row[lat_col].item(), gauge_row[lon_col].item(), etccdi_values=etccdi_values)
+
+
+def load_etccdi_local_var_data(etccdi_var: str, path_to_etccdi: str = None) -> xr.Dataset:
+    """
+    Load ETCCDI data with the variable used by QC checks (i.e. 'CDD_days' for CDD and 'SDII_mean' for SDII).
+
+    The variables made from the whole time series of ETCCDI data are kept in memory with the data in
+    'data_readers.ETCCDI_CACHE', so they are only computed once per process.
+
+    Parameters
+    ----------
+    etccdi_var :
+        ETCCDI index, one of ETCCDI_LOCAL_VARS
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_data :
+        ETCCDI data with the variable in ETCCDI_LOCAL_VARS
+
+    """
+    if etccdi_var == "CDD":
+        return data_readers.ETCCDI_CACHE.get_or_load(
+            ("CDD_days", etccdi_var, path_to_etccdi),
+            lambda: compute_dry_spell_days(data_readers.load_etccdi_data(etccdi_var, path_to_etccdi)),
+        )
+    if etccdi_var == "SDII":
+        return data_readers.ETCCDI_CACHE.get_or_load(
+            ("SDII_mean", etccdi_var, path_to_etccdi),
+            lambda: spatial_utils.compute_spatial_mean_xr(
+                data_readers.load_etccdi_data(etccdi_var, path_to_etccdi), var_name="SDII"
+            ),
+        )
+    return data_readers.load_etccdi_data(etccdi_var, path_to_etccdi)
+
+
+def get_etccdi_grid_index(etccdi_var: str, path_to_etccdi: str = None) -> neighbourhood_utils.ETCCDIGridIndex:
+    """
+    Get spatial index of the ETCCDI grid cells with values of an index, built once per process.
+
+    Parameters
+    ----------
+    etccdi_var :
+        ETCCDI index, one of ETCCDI_LOCAL_VARS
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    grid_index :
+        Spatial index of grid cells with any non-nan values of etccdi_var (kept in 'data_readers.ETCCDI_CACHE')
+
+    """
+    return data_readers.ETCCDI_CACHE.get_or_load(
+        ("grid_index", etccdi_var, path_to_etccdi),
+        lambda: neighbourhood_utils.ETCCDIGridIndex(
+            load_etccdi_reference_fields(path_to_etccdi=path_to_etccdi), f"{etccdi_var}_has_values"
+        ),
+    )
+
+
+def load_etccdi_reference_fields(fields_dir: str = None, path_to_etccdi: str = None) -> xr.Dataset:
+    """
+    Load the 2D reference fields of ETCCDI indices used by the QC checks.
+
+    Fields are read (memory-mapped) from .npy files in fields_dir, or the 'etccdi_fields' directory of the
+    RAINFALLQC_CACHE_DIR environment variable. If they are not there or were made from different ETCCDI files, they
+    are computed from the ETCCDI NetCDF files and saved there (see 'build_etccdi_reference_fields'). Without a
+    directory, they are computed in memory. Fields are kept in 'data_readers.ETCCDI_CACHE', so are loaded once per
+    process.
+
+    Parameters
+    ----------
+    fields_dir :
+        Directory of reference fields (default: 'etccdi_fields' in RAINFALLQC_CACHE_DIR, if set)
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_fields :
+        Reference fields, see 'compute_etccdi_reference_fields'
+
+    """
+    if fields_dir is None and os.environ.get(data_readers.CACHE_DIR_ENV_VAR):
+        fields_dir = os.path.join(os.environ[data_readers.CACHE_DIR_ENV_VAR], "etccdi_fields")
+    if fields_dir is None:
+        return data_readers.ETCCDI_CACHE.get_or_load(
+            ("reference_fields", None, path_to_etccdi), lambda: compute_etccdi_reference_fields(path_to_etccdi)
+        )
+    return data_readers.ETCCDI_CACHE.get_or_load(
+        ("reference_fields", fields_dir, path_to_etccdi),
+        lambda: _read_or_build_etccdi_reference_fields(fields_dir, path_to_etccdi),
+    )
+
+
+def compute_etccdi_reference_fields(path_to_etccdi: str = None) -> xr.Dataset:
+    """
+    Compute the 2D reference fields of ETCCDI indices from the ETCCDI NetCDF files.
+
+    Parameters
+    ----------
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_fields :
+        Maximum over time of each variable in ETCCDI_LOCAL_VARS (i.e. 'R99p', 'CDD_days', 'SDII_mean') with lat and lon
+        dimensions, and whether each grid cell has any values of each ETCCDI index (i.e. 'R99p_has_values')
+
+    """
+    etccdi_fields = {}
+    for etccdi_var, local_var in ETCCDI_LOCAL_VARS.items():
+        etccdi_data = load_etccdi_local_var_data(etccdi_var, path_to_etccdi)
+        # Maximum local value and whether each grid cell has any values, over all other dimensions (i.e. time)
+        local_values = etccdi_data[local_var]
+        has_values = etccdi_data[etccdi_var].notnull()
+        local_max = local_values.max(dim=[dim for dim in local_values.dims if dim not in ("lat", "lon")])
+        has_any_values = has_values.any(dim=[dim for dim in has_values.dims if dim not in ("lat", "lon")])
+        etccdi_fields[local_var] = local_max.transpose("lat", "lon")
+        etccdi_fields[f"{etccdi_var}_has_values"] = has_any_values.transpose("lat", "lon")
+    return xr.Dataset(etccdi_fields)
+
+
+def build_etccdi_reference_fields(fields_dir: str, path_to_etccdi: str = None) -> xr.Dataset:
+    """
+    Compute the 2D reference fields of ETCCDI indices and save them as .npy files with a JSON index.
+
+    Parameters
+    ----------
+    fields_dir :
+        Directory to save reference fields in (made if it does not exist).
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_fields :
+        Reference fields, see 'compute_etccdi_reference_fields'
+
+    """
+    etccdi_fields = compute_etccdi_reference_fields(path_to_etccdi)
+    os.makedirs(fields_dir, exist_ok=True)
+
+    # 1. Remove old index first, so fields are not read while they are being replaced
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(fields_dir, ETCCDI_FIELDS_INDEX_FILE))
+
+    # 2. Save coordinates and fields
+    fields_index = {
+        "format_version": ETCCDI_FIELDS_FORMAT_VERSION,
+        "source": get_etccdi_source_signature(path_to_etccdi),
+        "coords": {},
+        "fields": {},
+    }
+    for section, arrays in [("coords", etccdi_fields.coords), ("fields", etccdi_fields.data_vars)]:
+        for name, array in arrays.items():
+            fields_index[section][name] = f"{name}.npy"
+            data_readers.write_file_atomically(
+                fields_dir, f"{name}.npy", lambda file, array=array: np.save(file, array.values)
+            )
+
+    # 3. Save index last, so only complete fields are read
+    data_readers.write_file_atomically(
+        fields_dir, ETCCDI_FIELDS_INDEX_FILE, lambda file: file.write(json.dumps(fields_index, indent=2).encode())
+    )
+    return etccdi_fields
+
+
+def read_etccdi_reference_fields(fields_dir: str, path_to_etccdi: str = None) -> xr.Dataset | None:
+    """
+    Read the 2D reference fields of ETCCDI indices saved by 'build_etccdi_reference_fields' (memory-mapped).
+
+    Parameters
+    ----------
+    fields_dir :
+        Directory of reference fields.
+    path_to_etccdi :
+        path to ETCCDI data the fields should be made from (default is location of data in tests)
+
+    Returns
+    -------
+    etccdi_fields :
+        Reference fields (None if not in fields_dir, or made from different ETCCDI files or by another version)
+
+    """
+    try:
+        with open(os.path.join(fields_dir, ETCCDI_FIELDS_INDEX_FILE), encoding="utf-8") as index_file:
+            fields_index = json.load(index_file)
+    except FileNotFoundError:
+        return None
+    if fields_index.get("format_version") != ETCCDI_FIELDS_FORMAT_VERSION or fields_index.get(
+        "source"
+    ) != get_etccdi_source_signature(path_to_etccdi):
+        return None
+
+    coords = {
+        name: np.load(os.path.join(fields_dir, file_name), mmap_mode="r")
+        for name, file_name in fields_index["coords"].items()
+    }
+    return xr.Dataset(
+        {
+            name: (("lat", "lon"), np.load(os.path.join(fields_dir, file_name), mmap_mode="r"))
+            for name, file_name in fields_index["fields"].items()
+        },
+        coords=coords,
+    )
+
+
+def get_etccdi_source_signature(path_to_etccdi: str = None) -> dict:
+    """
+    Get the size and modification time of the ETCCDI NetCDF files, so reference fields made from other files are found.
+
+    Parameters
+    ----------
+    path_to_etccdi :
+        path to ETCCDI data (default is location of data in tests)
+
+    Returns
+    -------
+    source_signature :
+        File name, size and modification time (in ns) of the file of each ETCCDI index
+
+    """
+    source_signature = {}
+    for etccdi_var in ETCCDI_LOCAL_VARS:
+        etccdi_data_path = data_readers.get_etccdi_data_path(etccdi_var, path_to_etccdi)
+        file_stat = os.stat(etccdi_data_path)
+        source_signature[etccdi_var] = [os.path.basename(etccdi_data_path), file_stat.st_size, file_stat.st_mtime_ns]
+    return source_signature
+
+
+def _read_or_build_etccdi_reference_fields(fields_dir: str, path_to_etccdi: str) -> xr.Dataset:
+    """Read reference fields from fields_dir, or build them there if they are missing or out of date."""
+    etccdi_fields = read_etccdi_reference_fields(fields_dir, path_to_etccdi)
+    if etccdi_fields is None:
+        etccdi_fields = build_etccdi_reference_fields(fields_dir, path_to_etccdi)
+    return etccdi_fields
+
+
+def compute_dry_spell_days(dry_spell_data: xr.Dataset) -> xr.Dataset:
+    """
+    Compute dry spells in days from ETCCDI Consecutive Dry Days data.
+
+    Parameters
+    ----------
+    dry_spell_data :
+        ETCCDI CDD index data
+
+    Returns
+    -------
+    dry_spell_days :
+        ETCCDI CDD index data with `CDD_days` variable
+
+    """
+    # Convert CDD from seconds to days
+    dry_spell_days = data_utils.convert_datarray_seconds_to_days(dry_spell_data["CDD"])
+
+    # Mask out non-land data
+    dry_spell_days[dry_spell_days < 0.0] = np.nan
+
+    # Remove errors from data where more than 366 days are dry
+    dry_spell_days[dry_spell_days > 366] = np.nan  # remove errors
+
+    # Remove invalid data
+    dry_spell_days = np.ma.masked_invalid(dry_spell_days)
+
+    # Make CDD days variable
+    dry_spell_data["CDD_days"] = (("lat", "lon"), np.ma.max(dry_spell_days, axis=0))
+
+    return dry_spell_data
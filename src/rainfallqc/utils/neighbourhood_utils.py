@@ -6,6 +6,7 @@ import datetime
 import geopy.distance
 import numpy as np
 import polars as pl
+import scipy.spatial
 import xarray as xr
 
 from rainfallqc.utils import spatial_utils
@@ -13,6 +14,7 @@ from rainfallqc.utils import spatial_utils
 STATION_ID_COL = "station_id"
 START_DATETIME_COL = "start_datetime"
 END_DATETIME_COL = "end_datetime"
+GEODESIC_SEARCH_MARGIN = 0.01  # maximum fraction that geodesic and great circle distances between gauges differ by
 
 
 def get_target_neighbour_non_zero_minima(
@@ -401,12 +403,269 @@ def get_n_closest_neighbours(
         return sorted_close_neighbours.filter(pl.col("distance") <= nth_distance)
 
 
+def compute_geodesic_km_distances(
+    lat_1: np.ndarray, lon_1: np.ndarray, lat_2: np.ndarray, lon_2: np.ndarray
+) -> np.ndarray:
+    """
+    Compute geodesic distances (on the WGS-84 ellipsoid) in kilometres between pairs of points.
+
+    Parameters
+    ----------
+    lat_1 :
+        Latitudes of first points
+    lon_1 :
+        Longitudes of first points
+    lat_2 :
+        Latitudes of second points
+    lon_2 :
+        Longitudes of second points
+
+    Returns
+    -------
+    distances_km :
+        Geodesic distance between each pair of points in km
+
+    """
+    return np.array(
+        [
+            geopy.distance.geodesic((point_1_lat, point_1_lon), (point_2_lat, point_2_lon)).kilometers
+            for point_1_lat, point_1_lon, point_2_lat, point_2_lon in zip(lat_1, lon_1, lat_2, lon_2, strict=True)
+        ],
+        dtype=np.float64,
+    )
+
+
+def _refine_to_geodesic_km_distances(
+    neighbour_graph: pl.DataFrame, gauge_lat: np.ndarray, gauge_lon: np.ndarray, n_closest: int
+) -> pl.DataFrame:
+    """Replace great circle distances with geodesic distances for the pairs that could be within n closest."""
+    # 1. Remove pairs further than n-th closest neighbour could be (i.e. the distances can differ by the margin)
+    nth_max_distance_km = (
+        pl.col("distance_km").filter(pl.col("distance_km") != 0).bottom_k(n_closest).max()
+        * (1 + GEODESIC_SEARCH_MARGIN)
+    ).over("target_idx")
+    neighbour_graph = neighbour_graph.filter(
+        pl.col("distance_km") * (1 - GEODESIC_SEARCH_MARGIN) <= nth_max_distance_km
+    ).with_columns(
+        gauge_1=pl.min_horizontal("target_idx", "neighbour_idx"),
+        gauge_2=pl.max_horizontal("target_idx", "neighbour_idx"),
+    )
+
+    # 2. Compute geodesic distance of each pair once
+    pairs = neighbour_graph.select("gauge_1", "gauge_2").unique()
+    gauge_1, gauge_2 = pairs["gauge_1"].to_numpy(), pairs["gauge_2"].to_numpy()
+    pairs = pairs.with_columns(
+        geodesic_km=compute_geodesic_km_distances(
+            gauge_lat[gauge_1], gauge_lon[gauge_1], gauge_lat[gauge_2], gauge_lon[gauge_2]
+        )
+    )
+    return (
+        neighbour_graph.join(pairs, on=["gauge_1", "gauge_2"], how="left")
+        .with_columns(distance_km=pl.col("geodesic_km"))
+        .select("target_idx", "neighbour_idx", "distance_km")
+    )
+
+
+def get_neighbour_graph(
+    gauge_network_metadata: pl.DataFrame,
+    distance_threshold: int | float,
+    n_closest: int,
+    min_overlap_days: int,
+    exact_distances: bool = True,
+    station_id_col: str = STATION_ID_COL,
+    start_datetime_col: str = START_DATETIME_COL,
+    end_datetime_col: str = END_DATETIME_COL,
+) -> pl.DataFrame:
+    """
+    Get nearest n time-overlapping neighbouring gauges of every gauge in a network.
+
+    Gives the same neighbours for each gauge as 'get_ids_of_n_nearest_overlapping_neighbouring_gauges', but all pairs
+    of gauges within the distance threshold are found in one query of a spatial index (k-d tree on the unit sphere),
+    then their distances, ranks and overlapping days are computed for all pairs at once.
+
+    Parameters
+    ----------
+    gauge_network_metadata :
+        Metadata for gauge network. Each gauge must have 'longitude' and 'latitude'.
+    distance_threshold :
+        Threshold for maximum distance considered (in km)
+    n_closest :
+        Number of closest neighbours.
+    min_overlap_days :
+        Minimum overlap between target and neighbouring gauges
+    exact_distances :
+        Whether to use geodesic distances on the WGS-84 ellipsoid, as in 'compute_km_distances_from_target_id',
+        instead of great circle distances (default True)
+    station_id_col :
+        Column name for station ID in gauge_network_metadata (default 'station_id')
+    start_datetime_col  :
+        Column name for start datetime in gauge_network_metadata (default 'start_datetime')
+    end_datetime_col  :
+        Column name for end datetime in gauge_network_metadata (default 'end_datetime')
+
+    Returns
+    -------
+    neighbour_graph :
+        Neighbours of each target gauge with columns 'target_id', 'neighbour_id', 'distance_km' and 'overlap_days'
+
+    """
+    # 1. Get gauges with coordinates
+    gauge_lat = gauge_network_metadata["latitude"].cast(pl.Float64).to_numpy()
+    gauge_lon = gauge_network_metadata["longitude"].cast(pl.Float64).to_numpy()
+    has_coords = np.flatnonzero(np.isfinite(gauge_lat) & np.isfinite(gauge_lon))
+
+    # 2. Find all pairs of gauges within distance threshold (as straight-line distance on the unit sphere)
+    search_distance_km = distance_threshold * (1 + GEODESIC_SEARCH_MARGIN) if exact_distances else distance_threshold
+    max_chord_length = 2 * np.sin(min(search_distance_km / spatial_utils.EARTH_RADIUS_KM, np.pi) / 2)
+    tree = scipy.spatial.cKDTree(
+        spatial_utils.convert_lat_lon_to_unit_vectors(gauge_lat[has_coords], gauge_lon[has_coords])
+    )
+    pairs = has_coords[tree.query_pairs(r=max_chord_length, output_type="ndarray")].reshape(-1, 2)
+
+    # 3. Compute great circle distances of each pair (in both directions)
+    target_idx = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    neighbour_idx = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    neighbour_graph = pl.DataFrame(
+        {
+            "target_idx": target_idx,
+            "neighbour_idx": neighbour_idx,
+            "distance_km": spatial_utils.haversine(
+                gauge_lon[target_idx], gauge_lat[target_idx], gauge_lon[neighbour_idx], gauge_lat[neighbour_idx]
+            ),
+        }
+    ).filter(pl.col("distance_km") <= search_distance_km)
+
+    # 4. Refine distances of pairs that could be within n closest to geodesic distances
+    if exact_distances:
+        neighbour_graph = _refine_to_geodesic_km_distances(neighbour_graph, gauge_lat, gauge_lon, n_closest)
+
+    # 5. Get n closest neighbours of each target within distance threshold (including ties at n-th distance)
+    neighbour_graph = neighbour_graph.filter(
+        (pl.col("distance_km") <= distance_threshold) & (pl.col("distance_km") != 0)
+    ).filter(pl.col("distance_km").rank("min").over("target_idx") <= n_closest)
+
+    # 6. Compute overlap days between each target and neighbour
+    target_idx = neighbour_graph["target_idx"]
+    neighbour_idx = neighbour_graph["neighbour_idx"]
+    overlap = pl.min_horizontal(
+        gauge_network_metadata[end_datetime_col].gather(target_idx),
+        gauge_network_metadata[end_datetime_col].gather(neighbour_idx),
+    ) - pl.max_horizontal(
+        gauge_network_metadata[start_datetime_col].gather(target_idx),
+        gauge_network_metadata[start_datetime_col].gather(neighbour_idx),
+    )
+    neighbour_graph = neighbour_graph.with_columns(
+        target_id=gauge_network_metadata[station_id_col].gather(target_idx),
+        neighbour_id=gauge_network_metadata[station_id_col].gather(neighbour_idx),
+        overlap_days=overlap.dt.total_days().clip(lower_bound=0),
+    )
+
+    # 7. Subset based on min overlap days
+    return (
+        neighbour_graph.filter(pl.col("overlap_days") >= min_overlap_days)
+        .sort("target_idx", "distance_km")
+        .select("target_id", "neighbour_id", "distance_km", "overlap_days")
+    )
+
+
+class ETCCDIGridIndex:
+    """
+    Spatial index (k-d tree) of the ETCCDI grid cells with any non-nan values of a variable.
+
+    The index is built once for a variable, then the nearest cell with values to one or many gauges is found in a
+    single query instead of checking cells one at a time in order of distance.
+
+    """
+
+    def __init__(self, etccdi_data: xr.Dataset, etccdi_name: str):
+        """
+        Build index of grid cells with any non-nan values.
+
+        Parameters
+        ----------
+        etccdi_data :
+            ETCCDI data with given variable (with lat and lon dimensions)
+        etccdi_name :
+            ETCCDI variable name to check for non-nan values (or a boolean variable, True where cells have values)
+
+        """
+        # 1. Find grid cells with any non-nan values (over time)
+        etccdi_var = etccdi_data[etccdi_name]
+        other_dims = [dim for dim in etccdi_var.dims if dim not in ("lat", "lon")]
+        has_values = etccdi_var if etccdi_var.dtype == bool else etccdi_var.notnull()
+        has_values = has_values.any(dim=other_dims).transpose("lat", "lon").values
+
+        # 2. Get their coordinates
+        cell_lat, cell_lon = np.meshgrid(etccdi_data["lat"].values, etccdi_data["lon"].values, indexing="ij")
+        self.lat = cell_lat[has_values].astype(np.float64)
+        self.lon = cell_lon[has_values].astype(np.float64)
+
+        # 3. Build k-d tree on the unit sphere
+        self._tree = scipy.spatial.cKDTree(spatial_utils.convert_lat_lon_to_unit_vectors(self.lat, self.lon))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the arrays held by the index in bytes (coordinates, and the unit vectors and indices of the tree)."""
+        return self.lat.nbytes + self.lon.nbytes + self._tree.data.nbytes + self._tree.indices.nbytes
+
+    def query(
+        self, gauge_lat: np.ndarray | float, gauge_lon: np.ndarray | float, max_distance_km: int | float = 500
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the nearest grid cell with non-nan values to each gauge.
+
+        Parameters
+        ----------
+        gauge_lat :
+            latitudes of the rain gauges
+        gauge_lon :
+            longitudes of the rain gauges
+        max_distance_km :
+            Maximum distance in km to search for a non-nan value (default 500 km)
+
+        Returns
+        -------
+        nearest_lat :
+            Latitude of the nearest grid cell to each gauge (NaN if none within max_distance_km)
+        nearest_lon :
+            Longitude of the nearest grid cell to each gauge (NaN if none within max_distance_km)
+        distance_km :
+            Great circle distance to the nearest grid cell (NaN if none within max_distance_km)
+
+        """
+        gauge_lat = np.atleast_1d(np.asarray(gauge_lat, dtype=np.float64))
+        gauge_lon = np.atleast_1d(np.asarray(gauge_lon, dtype=np.float64))
+        if self.lat.size == 0:
+            no_cells = np.full(gauge_lat.shape, np.nan)
+            return no_cells, no_cells.copy(), no_cells.copy()
+
+        # 1. Query nearest grid cell on the unit sphere (for gauges with valid coordinates)
+        has_coords = np.isfinite(gauge_lat) & np.isfinite(gauge_lon)
+        nearest_idx = np.zeros(gauge_lat.shape, dtype=np.int64)
+        if has_coords.any():
+            _, nearest_idx[has_coords] = self._tree.query(
+                spatial_utils.convert_lat_lon_to_unit_vectors(gauge_lat[has_coords], gauge_lon[has_coords]), k=1
+            )
+        nearest_lat = self.lat[nearest_idx]
+        nearest_lon = self.lon[nearest_idx]
+
+        # 2. Remove cells further than the maximum distance (measured along the great circle, as in 'haversine')
+        distance_km = spatial_utils.haversine(nearest_lon, nearest_lat, gauge_lon, gauge_lat)
+        too_far = ~(has_coords & (distance_km <= max_distance_km))
+        return (
+            np.where(too_far, np.nan, nearest_lat),
+            np.where(too_far, np.nan, nearest_lon),
+            np.where(too_far, np.nan, distance_km),
+        )
+
+
 def get_nearest_non_nan_etccdi_val_to_gauge(
     etccdi_data: xr.Dataset,
     etccdi_name: str,
     gauge_lat: int | float,
     gauge_lon: int | float,
     max_distance_km: int | float = 500,
+    grid_index: ETCCDIGridIndex = None,
 ) -> xr.Dataset:
     """
     Get the value at the nearest non-nan ETCCDI grid cell to the gauge coordinates.
@@ -423,6 +682,8 @@ def get_nearest_non_nan_etccdi_val_to_gauge(
         longitude of the rain gauge
     max_distance_km :
         Maximum distance in km to search for a non-nan value (default 500 km)
+    grid_index :
+        Spatial index of the grid cells of etccdi_data with non-nan values (default: built from etccdi_data)
 
     Returns
     -------
@@ -430,9 +691,7 @@ def get_nearest_non_nan_etccdi_val_to_gauge(
         ETCCDI data at the nearest grid cell with non-nan values
 
     """
-    # 1. Stack lat/lon into a single dimension
-    stacked = etccdi_data.stack(points=("lat", "lon"))
-
+    # 1. Check gauge coordinates are single values
     try:
         if isinstance(gauge_lat, pl.Series) and gauge_lat.len() == 1:
             gauge_lat = gauge_lat.item()
@@ -447,25 +706,13 @@ def get_nearest_non_nan_etccdi_val_to_gauge(
     except TypeError as te:
         raise TypeError("Gauge longitude must be convertible to float.") from te
 
-    # 2. Compute haversine distance to each point
-    dists = spatial_utils.haversine(stacked["lon"], stacked["lat"], gauge_lon, gauge_lat)
-
-    # 3. Sort by distance
-    sorted_idx = dists.argsort()
-
-    # Loop through points in ascending distance order
-    for idx in sorted_idx.values:
-        dist_km = dists.isel(points=idx).item()
-        if dist_km <= max_distance_km:
-            if not np.isnan(stacked[etccdi_name].isel(points=idx)).all():
-                sel_lon = stacked["lon"].isel(points=idx).item()
-                sel_lat = stacked["lat"].isel(points=idx).item()
-                return etccdi_data.sel(lon=sel_lon, lat=sel_lat)
-        else:
-            # Because sorted by distance, if we've exceeded max distance, we can break early
-            break
-
-    raise ValueError(
-        f"""No non-NaN point found within {max_distance_km} km of ({gauge_lat}, {gauge_lon}).
+    # 2. Get nearest grid cell with non-nan values
+    if grid_index is None:
+        grid_index = ETCCDIGridIndex(etccdi_data, etccdi_name)
+    nearest_lat, nearest_lon, _ = grid_index.query(gauge_lat, gauge_lon, max_distance_km=max_distance_km)
+    if np.isnan(nearest_lat[0]):
+        raise ValueError(
+            f"""No non-NaN point found within {max_distance_km} km of ({gauge_lat}, {gauge_lon}).
         Assuming EPSG:4326 coordinates."""
-    )
+        )
+    return etccdi_data.sel(lon=nearest_lon[0], lat=nearest_lat[0])
@@ -42,6 +42,31 @@ def compute_spatial_mean_xr(data: xr.Dataset, var_name: str) -> xr.Dataset:
     return data
 
 
+def convert_lat_lon_to_unit_vectors(lat: np.ndarray | float, lon: np.ndarray | float) -> np.ndarray:
+    """
+    Convert latitudes and longitudes (in degrees) to 3D points on the unit sphere.
+
+    Nearest points by straight-line distance between these are also nearest by great circle distance, so they can be
+    used in a spatial index such as a k-d tree.
+
+    Parameters
+    ----------
+    lat :
+        Latitudes in degrees
+    lon :
+        Longitudes in degrees
+
+    Returns
+    -------
+    unit_vectors :
+        Array of x, y, z coordinates with shape (n_points, 3)
+
+    """
+    lat = np.radians(np.atleast_1d(np.asarray(lat, dtype=np.float64)))
+    lon = np.radians(np.atleast_1d(np.asarray(lon, dtype=np.float64)))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
 def haversine(lon1: xr.DataArray, lat1: xr.DataArray, lon2: np.ndarray | float, lat2: np.ndarray | float) -> float:
     """
     Great circle distance (km) between two points on Earth.
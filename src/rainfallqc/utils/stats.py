@@ -76,7 +76,7 @@ def dry_spell_fraction(rain_daily: pl.DataFrame, target_gauge_col: str, dry_peri
     return rain_daily_dry_day["dry_spell_fraction"]
 
 
-def factor_diff(data: pl.DataFrame, target_col: str, other_col: str) -> pl.DataFrame:
+def factor_diff(data: pl.DataFrame | pl.LazyFrame, target_col: str, other_col: str) -> pl.DataFrame | pl.LazyFrame:
     """
     Compute factor diff for polars.
 
@@ -226,7 +226,9 @@ def pettitt_test(arr: pl.Series | np.ndarray) -> (int | float, int | float):
 
     Calculated following Pettitt (1979): https://www.jstor.org/stable/2346729?seq=4#metadata_info_tab_contents.
 
-    TAKEN FROM: https://stackoverflow.com/questions/58537876/how-to-run-standard-normal-homogeneity-test-for-a-time-series-data.
+    The statistic at each split point, the sum of sign(x_i - x_j) over all pairs with x_i before and x_j after the
+    split, is computed from the cumulative sum of the ranks of the values (with ties given their average rank), so the
+    test takes O(n log n) time rather than comparing every pair.
 
     Parameters
     ----------
@@ -247,12 +249,9 @@ def pettitt_test(arr: pl.Series | np.ndarray) -> (int | float, int | float):
     n = len(arr)
     K = np.zeros(n)
 
-    # Compute rank matrix difference in a vectorized way
-    for t in range(n):
-        left = arr[:t]
-        right = arr[t:]
-        if left.size > 0 and right.size > 0:
-            K[t] = np.sum(np.sign(left[:, None] - right[None, :]))
+    # Statistic for first t values against the rest is 2 * (sum of their ranks) - t * (n + 1)
+    ranks = scipy.stats.rankdata(arr)
+    K[1:] = 2 * np.cumsum(ranks)[:-1] - np.arange(1, n) * (n + 1)
 
     tau = int(np.argmax(np.abs(K)))
     U = np.max(np.abs(K))
@@ -282,3 +281,36 @@ def simple_precip_intensity_index(data: pl.DataFrame, target_gauge_col: str, wet
     data_rain_sum = data.filter(pl.col(target_gauge_col) >= wet_threshold).fill_nan(0.0).sum()[target_gauge_col][0]
     data_wet_day_count = data.filter(pl.col(target_gauge_col) >= wet_threshold).drop_nans().count()[target_gauge_col][0]
     return data_rain_sum / float(data_wet_day_count)
+
+
+def ttest_1samp_from_sums(count: np.ndarray, sum_diff: np.ndarray, sum_sq_diff: np.ndarray) -> np.ndarray:
+    """
+    Two-sided one-sample t-test of many samples at once from sums of their differences to the population mean.
+
+    Gives the same p-values as 'scipy.stats.ttest_1samp' on each sample, without needing the values of the samples.
+
+    Parameters
+    ----------
+    count :
+        Number of values in each sample
+    sum_diff :
+        Sum of (value - population mean) of each sample
+    sum_sq_diff :
+        Sum of (value - population mean) squared of each sample
+
+    Returns
+    -------
+    p_values :
+        p-value of each sample (NaN for samples with fewer than 2 values)
+
+    """
+    count = np.asarray(count, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1. Sample mean and variance (with Bessel's correction) of the differences
+        mean_diff = np.asarray(sum_diff, dtype=float) / count
+        sample_var = np.maximum(np.asarray(sum_sq_diff, dtype=float) - count * mean_diff**2, 0.0) / (count - 1)
+
+        # 2. t statistic and p-value from t-distribution with n - 1 degrees of freedom
+        t_stat = mean_diff / np.sqrt(sample_var / count)
+        p_values = 2 * scipy.stats.t.sf(np.abs(t_stat), count - 1)
+    return np.where(count >= 2, p_values, np.nan)
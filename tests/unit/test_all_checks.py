@@ -2,7 +2,11 @@
 
 """Tests all QC checks."""
 
+import polars as pl
+import pytest
+
 from rainfallqc.core import all_qc_checks
+from rainfallqc.utils import data_utils
 
 
 def test_all_qc_checks():
@@ -14,3 +18,57 @@ def test_all_qc_checks():
         assert func.__name__ == name, f"QC check function name '{func.__name__}' does not match registry name '{name}'."
         assert func.__doc__ is not None, f"QC check '{name}' does not have a docstring."
     all_qc_checks.qc_check(name="func")  # Ensure decorator can be called
+
+
+def test_get_call_plan():
+    def func(data, target_gauge_col, percentile=95, **kwargs):
+        return data
+
+    call_plan = all_qc_checks.get_call_plan(func)
+    assert call_plan["param_names"] == ("data", "target_gauge_col", "percentile")
+    assert call_plan["defaults"] == {"percentile": 95}
+    assert call_plan["accepts_var_kwargs"]
+    assert all_qc_checks.get_call_plan(func) is call_plan  # only inspected once
+    qc1_call_plan = all_qc_checks.QC_CHECKS["check_years_where_nth_percentile_is_zero"].call_plan
+    assert qc1_call_plan["param_names"] == ("data", "target_gauge_col", "percentile", "annual_statistics")
+
+    full_kwargs = all_qc_checks.get_full_kwargs(call_plan, "data", "rain_mm", other=1)
+    assert full_kwargs == {"data": "data", "target_gauge_col": "rain_mm", "percentile": 95, "other": 1}
+    with pytest.raises(TypeError):
+        all_qc_checks.get_full_kwargs(call_plan, "data", "rain_mm", 5, 6)
+
+
+def test_qc_check_with_lazyframe():
+    @all_qc_checks.qc_check("eager_only_check", require_non_negative=True)
+    def eager_only_check(data, target_gauge_col):
+        assert isinstance(data, pl.DataFrame)
+        return data.select("time", (pl.col(target_gauge_col) > 1).alias("flag"))
+
+    data = pl.DataFrame({"time": [1, 2, 3], "rain_mm": [0.0, 2.0, 0.5]})
+    result = eager_only_check(data.lazy(), target_gauge_col="rain_mm")
+    assert isinstance(result, pl.LazyFrame)
+    assert result.collect()["flag"].to_list() == [False, True, False]
+    assert not eager_only_check.supports_lazy
+    with pytest.raises(ValueError):
+        eager_only_check(data.with_columns(-pl.col("rain_mm")).lazy(), target_gauge_col="rain_mm")
+
+    # LazyFrame is collected once for all checks within 'validated_frame', and shares its record
+    check_data = []
+
+    @all_qc_checks.qc_check("collected_data_check")
+    def collected_data_check(data, target_gauge_col):
+        check_data.append(data)
+        return data
+
+    lazy_data = data.lazy()
+    with data_utils.validated_frame(lazy_data) as record:
+        eager_only_check(lazy_data, target_gauge_col="rain_mm")
+        collected_data = record["collected_data"]
+        collected_data_check(lazy_data, target_gauge_col="rain_mm")
+        collected_data_check(lazy_data, target_gauge_col="rain_mm")
+        assert check_data[0] is collected_data and check_data[1] is collected_data
+        assert data_utils.get_validated_frame_record(collected_data) is record
+        assert record["non_negative_cols"] == {"rain_mm"}
+    assert data_utils.get_validated_frame_record(collected_data) is None
+    all_qc_checks.QC_CHECKS.pop("eager_only_check")
+    all_qc_checks.QC_CHECKS.pop("collected_data_check")
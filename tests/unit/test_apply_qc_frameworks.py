@@ -2,12 +2,17 @@
 
 """Tests for applying QC frameworks."""
 
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import polars as pl
 import pytest
 
-from rainfallqc import gauge_checks
+from rainfallqc import comparison_checks, gauge_checks
+from rainfallqc.core import result_cache
 from rainfallqc.qc_frameworks import apply_qc_framework, inbuilt_qc_frameworks
+from rainfallqc.utils import data_readers, data_utils, gauge_climatology
 
 TARGET_GPCC_ID = "tw_2483"
 TARGET_GSDR_ID = "DE_00310"
@@ -215,6 +220,402 @@ def test_apply_custom_framework(daily_gpcc_network):
     assert len(result["QC7_pnt1"]) == 0
 
 
+def test_run_qc_framework_concurrently(daily_gpcc_network):
+    qc_methods_to_run = ["QC1", "QC7", "QC22", "QC23"]
+    qc_kwargs = {
+        "QC1": {"percentile": 5},
+        "QC7": {"expected_min_val": 0.1},
+        "shared": {"target_gauge_col": f"rain_mm_{TARGET_GPCC_ID}", "nearest_neighbour": "rain_mm_tw_310"},
+    }
+    expected = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    result = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        max_workers=2,
+    )
+    assert list(result.keys()) == qc_methods_to_run
+    assert result == expected
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = apply_qc_framework.run_qc_framework(
+            daily_gpcc_network,
+            qc_framework="IntenseQC",
+            qc_methods_to_run=qc_methods_to_run,
+            qc_kwargs=qc_kwargs,
+            executor=executor,
+        )
+    assert result == expected
+
+    with pytest.raises(ValueError):
+        apply_qc_framework.run_qc_framework(
+            daily_gpcc_network,
+            qc_framework="IntenseQC",
+            qc_methods_to_run=qc_methods_to_run,
+            qc_kwargs={**qc_kwargs, "shared": {**qc_kwargs["shared"], "target_gauge_col": None}},
+            max_workers=2,
+        )
+
+
+def test_run_qc_framework_columnar(daily_gpcc_network):
+    qc_methods_to_run = ["QC1", "QC7", "QC10", "QC22"]
+    qc_kwargs = {
+        "QC1": {"percentile": 5},
+        "QC7": {"expected_min_val": 0.1},
+        "shared": {
+            "target_gauge_col": f"rain_mm_{TARGET_GPCC_ID}",
+            "nearest_neighbour": "rain_mm_tw_310",
+            "time_res": "daily",
+        },
+    }
+    expected = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    qc_flags, qc_summary = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        output_format="columnar",
+    )
+    assert qc_flags.columns == ["time", "world_record_check"]
+    assert qc_flags.equals(expected["QC10"])
+    assert qc_summary.columns == ["percentiles_zero", "min_val_change", "affinity_index"]
+    assert len(qc_summary) == 1
+    assert qc_summary["percentiles_zero"].item().to_list() == expected["QC1"]
+    assert qc_summary["affinity_index"].item() == expected["QC22"]
+
+    qc_flags, _ = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        output_format="columnar",
+        compact_flags=True,
+    )
+    assert qc_flags["world_record_check"].dtype == pl.Int8
+    assert qc_flags["world_record_check"].null_count() == expected["QC10"]["world_record_check"].is_nan().sum()
+
+    with pytest.raises(ValueError):
+        apply_qc_framework.run_qc_framework(
+            daily_gpcc_network,
+            qc_framework="IntenseQC",
+            qc_methods_to_run=qc_methods_to_run,
+            qc_kwargs=qc_kwargs,
+            output_format="wrong",
+        )
+
+
+def test_run_qc_framework_with_result_cache(daily_gpcc_network, tmp_path):
+    qc_methods_to_run = ["QC1", "QC7", "QC10", "QC22"]
+    qc_kwargs = {
+        "QC1": {"percentile": 5},
+        "QC7": {"expected_min_val": 0.1},
+        "shared": {
+            "target_gauge_col": f"rain_mm_{TARGET_GPCC_ID}",
+            "nearest_neighbour": "rain_mm_tw_310",
+            "time_res": "daily",
+        },
+    }
+    expected = apply_qc_framework.run_qc_framework(
+        daily_gpcc_network, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    qc_result_cache = result_cache.QCResultCache(tmp_path)
+    for max_workers in [None, 2]:  # computed, then read from cache (by methods run on threads)
+        result = apply_qc_framework.run_qc_framework(
+            daily_gpcc_network,
+            qc_framework="IntenseQC",
+            qc_methods_to_run=qc_methods_to_run,
+            qc_kwargs=qc_kwargs,
+            qc_result_cache=qc_result_cache,
+            max_workers=max_workers,
+        )
+        assert len(qc_result_cache.get_cached_results()) == len(qc_methods_to_run)
+        assert result["QC1"] == expected["QC1"]
+        assert result["QC7"] == expected["QC7"]
+        assert result["QC10"].equals(expected["QC10"])
+        assert result["QC22"] == expected["QC22"]
+
+
+def test_convert_qc_results_to_columnar(daily_gpcc_network):
+    data = daily_gpcc_network.select("time")
+    qc10_flags = data.with_columns(pl.lit(0.0).alias("world_record_check"))
+    qc_results = {
+        "QC6": 1,
+        "QC10": qc10_flags,
+        "QC10_other": qc10_flags.tail(10),  # different time axis
+    }
+    qc_flags, qc_summary = apply_qc_framework.convert_qc_results_to_columnar(data, qc_results)
+    assert qc_flags.columns == ["time", "QC10_world_record_check", "QC10_other_world_record_check"]
+    assert qc_flags["time"].equals(data["time"])
+    assert qc_flags["QC10_other_world_record_check"].null_count() == len(data) - 10
+    assert qc_summary.to_dicts() == [{"breakpoints": 1}]
+
+    with pytest.raises(ValueError):
+        apply_qc_framework.convert_qc_results_to_columnar(data, {"QC1": {"a": 1}})
+
+
+def test_run_qc_framework_on_network(daily_gpcc_network):
+    gpcc_obj = data_readers.GPCCNetworkReader(path_to_gpcc_dir="./tests/data/GPCC/", time_res="tw")
+    qc_kwargs = {"QC1": {"percentile": 5}}
+    result = dict(
+        apply_qc_framework.run_qc_framework_on_network(
+            gpcc_obj,
+            qc_framework="IntenseQC",
+            target_ids=["310", "2483", "999"],
+            qc_methods_to_run=["QC1", "QC9", "QC22", "QC23"],
+            qc_kwargs=qc_kwargs,
+            distance_threshold=50,
+            n_closest=10,
+            min_overlap_days=500,
+            load_data_kwargs={"target_gauge_col": "rain_mm"},
+            max_workers=2,
+            etccdi_reference_table=gauge_climatology.get_etccdi_reference_table(gpcc_obj.metadata),
+        )
+    )
+    assert sorted(result.keys()) == ["2483", "310", "999"]
+    assert isinstance(result["999"], Exception)  # gauge not in network does not stop the others
+    assert result["310"]["QC1"] == gauge_checks.check_years_where_nth_percentile_is_zero(
+        daily_gpcc_network, target_gauge_col="rain_mm_tw_310", percentile=5
+    )
+    target_metadata = gpcc_obj.metadata.filter(pl.col("station_id") == "310")
+    assert result["310"]["QC9"] == comparison_checks.check_annual_exceedance_etccdi_prcptot(
+        daily_gpcc_network,
+        target_gauge_col="rain_mm_tw_310",
+        gauge_lat=target_metadata["latitude"].item(),
+        gauge_lon=target_metadata["longitude"].item(),
+    )
+    assert round(result["310"]["QC22"], 2) == 0.97  # affinity index with nearest neighbour tw_2483
+
+
+def test_plan_shared_products():
+    qc_framework = inbuilt_qc_frameworks.INBUILT_QC_FRAMEWORKS["intenseqc"]
+    shared_kwargs = {"target_gauge_col": "rain", "time_res": "hourly", "gauge_lat": 50.0, "gauge_lon": 8.0}
+    method_kwargs = {
+        "QC13": {**shared_kwargs},
+        "QC14": {**shared_kwargs},
+        "QC15": {**shared_kwargs, "accumulation_threshold": 10.0},
+        "QC17": {**shared_kwargs},
+        "QC19": {**shared_kwargs},
+        "QC20": {**shared_kwargs, "monthly_neighbour_data": pl.DataFrame()},
+    }
+    product_plan = apply_qc_framework.plan_shared_products(qc_framework, list(method_kwargs), method_kwargs)
+    planned_products = {planned["product"]: planned["used_by"] for planned in product_plan.values()}
+    assert planned_products == {
+        "climatology": ["QC13", "QC14"],  # gives the SDII, not needed by QC15 as accumulation threshold is given
+        "gauge_dry_spell_lengths": ["QC14"],
+        "daily_neighbour_data": ["QC17", "QC19"],  # computed once
+    }
+
+    # different kwargs means different products
+    method_kwargs["QC19"]["hour_offset"] = 7
+    product_plan = apply_qc_framework.plan_shared_products(qc_framework, ["QC17", "QC19"], method_kwargs)
+    assert len(product_plan) == 2
+
+    # products missing arguments are not planned
+    del method_kwargs["QC17"]["time_res"]
+    product_plan = apply_qc_framework.plan_shared_products(qc_framework, ["QC17", "QC19"], method_kwargs)
+    assert [planned["used_by"] for planned in product_plan.values()] == [["QC19"]]
+
+
+def test_compute_shared_products(hourly_gsdr_network):
+    qc_framework = inbuilt_qc_frameworks.INBUILT_QC_FRAMEWORKS["intenseqc"]
+    method_kwargs = {
+        "QC17": {"target_gauge_col": f"rain_mm_{TARGET_GSDR_ID}", "time_res": "hourly"},
+        "QC19": {"target_gauge_col": f"rain_mm_{TARGET_GSDR_ID}", "time_res": "hourly"},
+    }
+    product_plan = apply_qc_framework.plan_shared_products(qc_framework, ["QC17", "QC19"], method_kwargs)
+    method_products = apply_qc_framework.compute_shared_products(hourly_gsdr_network, product_plan)
+    daily_neighbour_data = method_products["QC17"]["daily_neighbour_data"]
+    assert daily_neighbour_data is method_products["QC19"]["daily_neighbour_data"]
+    assert daily_neighbour_data.columns == hourly_gsdr_network.columns
+
+    # products that cannot be made for the kwargs of a method are not given to it, other errors are raised
+    method_kwargs["QC17"]["time_res"] = "daily"
+    product_plan = apply_qc_framework.plan_shared_products(qc_framework, ["QC17", "QC19"], method_kwargs)
+    method_products = apply_qc_framework.compute_shared_products(hourly_gsdr_network, product_plan)
+    assert list(method_products) == ["QC19"]
+    shared_products = {"daily_neighbour_data": {**inbuilt_qc_frameworks.SHARED_PRODUCTS["daily_neighbour_data"]}}
+    shared_products["daily_neighbour_data"]["errors"] = ()
+    with pytest.raises(AssertionError):
+        apply_qc_framework.compute_shared_products(hourly_gsdr_network, product_plan, shared_products)
+
+
+def test_rulebase_framework_declares_checks_as_intenseqc():
+    intense_qc = inbuilt_qc_frameworks.INBUILT_QC_FRAMEWORKS["intenseqc"]
+    for qc_method, entry in inbuilt_qc_frameworks.INBUILT_QC_FRAMEWORKS["intenseqc_rulebase_only"].items():
+        assert entry == intense_qc[qc_method], qc_method
+
+
+def test_compute_annual_statistics(hourly_gsdr_data):
+    qc_framework = inbuilt_qc_frameworks.INBUILT_QC_FRAMEWORKS["intenseqc"]
+    method_kwargs = {
+        "QC1": {"target_gauge_col": "rain_mm", "percentile": 5},
+        "QC2": {"target_gauge_col": "rain_mm", "k": 5},
+        "QC7": {"target_gauge_col": "rain_mm", "expected_min_val": 0.1},
+        "QC8": {"target_gauge_col": "rain_mm"},
+        "QC9": {"target_gauge_col": "rain_mm"},
+    }
+    method_products = apply_qc_framework.compute_annual_statistics(
+        hourly_gsdr_data, qc_framework, list(method_kwargs), method_kwargs
+    )
+    assert list(method_products) == ["QC1", "QC2", "QC8", "QC9"]
+    annual_statistics = method_products["QC1"]["annual_statistics"]
+    assert annual_statistics.columns[-3:] == ["percentile_5", "kth_largest_5", "sum_above_percentile_99"]
+    assert all(products["annual_statistics"] is annual_statistics for products in method_products.values())
+    # checks read the statistics they are given
+    assert gauge_checks.check_years_where_annual_kth_largest_value_is_zero(
+        hourly_gsdr_data, "rain_mm", k=5, annual_statistics=annual_statistics
+    ) == gauge_checks.check_years_where_annual_kth_largest_value_is_zero(hourly_gsdr_data, "rain_mm", k=5)
+
+    # statistics are not computed for methods given them or for columns not in data
+    method_kwargs["QC1"]["annual_statistics"] = annual_statistics
+    method_kwargs["QC2"]["target_gauge_col"] = "missing_col"
+    method_products = apply_qc_framework.compute_annual_statistics(
+        hourly_gsdr_data, qc_framework, list(method_kwargs), method_kwargs
+    )
+    assert list(method_products) == ["QC8", "QC9"]
+    assert method_products["QC8"]["annual_statistics"].columns[-1] == "sum_above_percentile_99"
+
+
+def test_run_qc_framework_in_chunks(hourly_gsdr_network, gsdr_metadata):
+    qc_methods_to_run = ["QC1", "QC13", "QC14", "QC17", "QC19", "QC20"]
+    qc_kwargs = {
+        "QC1": {"percentile": 5},
+        "shared": {
+            "target_gauge_col": f"rain_mm_{TARGET_GSDR_ID}",
+            "gauge_lat": gsdr_metadata["latitude"],
+            "gauge_lon": gsdr_metadata["longitude"],
+            "time_res": "hourly",
+            "wet_threshold": 1.0,
+            "min_n_neighbours": 2,
+            "list_of_nearest_stations": hourly_gsdr_network.columns[2:],
+        },
+    }
+    result = apply_qc_framework.run_qc_framework(
+        hourly_gsdr_network, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    chunked_result = apply_qc_framework.run_qc_framework_in_chunks(
+        hourly_gsdr_network.lazy(),
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        chunk_every="1y",
+    )
+    assert list(chunked_result.keys()) == qc_methods_to_run
+    assert chunked_result["QC1"] == result["QC1"]  # run on the whole record
+    for qc_method in qc_methods_to_run[1:]:
+        assert chunked_result[qc_method].equals(result[qc_method])
+    assert result["QC17"]["wet_spell_flag_hourly"].max() == 3  # flags to stitch together
+
+
+def test_run_qc_framework_in_chunks_with_durations(hourly_gsdr_network, gsdr_metadata):
+    # 24 hours of 100 mm crossing the start of 2010
+    target_gauge_col = f"rain_mm_{TARGET_GSDR_ID}"
+    event_start = datetime.datetime(2009, 12, 31, 12)
+    data = hourly_gsdr_network.with_columns(
+        pl.when(pl.col("time").is_between(event_start, event_start + datetime.timedelta(hours=23)))
+        .then(100.0)
+        .otherwise(pl.col(target_gauge_col))
+        .alias(target_gauge_col)
+    )
+    qc_methods_to_run = ["QC10", "QC11"]
+    qc_kwargs = {
+        "shared": {
+            "target_gauge_col": target_gauge_col,
+            "gauge_lat": gsdr_metadata["latitude"],
+            "gauge_lon": gsdr_metadata["longitude"],
+            "time_res": "hourly",
+            "durations": ["1h", "1d"],
+        },
+    }
+    result = apply_qc_framework.run_qc_framework(
+        data, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    chunked_result = apply_qc_framework.run_qc_framework_in_chunks(
+        data, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs, chunk_every="1y"
+    )
+    for qc_method in qc_methods_to_run:
+        assert chunked_result[qc_method].equals(result[qc_method])
+    # flags spread back over the 1d windows before the event, in the previous block
+    assert result["QC11"].filter(pl.col("time") == datetime.datetime(2009, 12, 31, 7))["rx1day_check"].item() > 0
+
+
+def test_update_qc_framework_results(hourly_gsdr_network, gsdr_metadata):
+    qc_methods_to_run = ["QC1", "QC13", "QC14", "QC15", "QC17", "QC19", "QC20"]
+    qc_kwargs = {
+        "QC1": {"percentile": 5},
+        "shared": {
+            "target_gauge_col": f"rain_mm_{TARGET_GSDR_ID}",
+            "gauge_lat": gsdr_metadata["latitude"],
+            "gauge_lon": gsdr_metadata["longitude"],
+            "time_res": "hourly",
+            "smallest_measurable_rainfall_amount": 0.1,
+            "wet_threshold": 1.0,
+            "min_n_neighbours": 2,
+            "list_of_nearest_stations": hourly_gsdr_network.columns[2:],
+        },
+    }
+    # previous run on data until the middle of 2009
+    previous_data = hourly_gsdr_network.filter(pl.col("time") < datetime.datetime(2009, 6, 15, 12))
+    whole_record_kwargs = apply_qc_framework.get_whole_record_kwargs(
+        previous_data, qc_framework="IntenseQC", qc_methods_to_run=qc_methods_to_run, qc_kwargs=qc_kwargs
+    )
+    assert sorted(whole_record_kwargs) == ["QC13", "QC14", "QC17", "QC20"]
+    assert "wet_day_statistics" in whole_record_kwargs["QC17"]
+    previous_result = apply_qc_framework.run_qc_framework_in_chunks(
+        previous_data,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        whole_record_kwargs=whole_record_kwargs,
+    )
+
+    # update with new data is the same as a run on all data with the previous whole record kwargs
+    result = apply_qc_framework.update_qc_framework_results(
+        hourly_gsdr_network,
+        previous_result,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=qc_kwargs,
+        whole_record_kwargs=whole_record_kwargs,
+    )
+    expected_qc_kwargs = {**qc_kwargs}
+    for qc_method, kwargs in whole_record_kwargs.items():
+        expected_qc_kwargs[qc_method] = {**qc_kwargs.get(qc_method, {}), **kwargs}
+    expected_result = apply_qc_framework.run_qc_framework(
+        hourly_gsdr_network,
+        qc_framework="IntenseQC",
+        qc_methods_to_run=qc_methods_to_run,
+        qc_kwargs=expected_qc_kwargs,
+    )
+    assert result["QC1"] == expected_result["QC1"]
+    for qc_method in qc_methods_to_run[1:]:
+        assert result[qc_method].equals(expected_result[qc_method])
+
+
+def test_get_chunk_bounds(daily_gpcc_network):
+    chunk_bounds = apply_qc_framework.get_chunk_bounds(daily_gpcc_network, chunk_every="1y")
+    assert len(chunk_bounds) == daily_gpcc_network["time"].dt.year().n_unique()
+    chunk_start, chunk_end = chunk_bounds[0]
+    assert chunk_start == datetime.datetime(daily_gpcc_network["time"].min().year, 1, 1)
+    assert chunk_end == chunk_start.replace(year=chunk_start.year + 1)
+
+
+def test_get_gauge_cols_by_station_id():
+    network_data = pl.DataFrame({"time": [1, 2], "rain_mm_E_10": [0.0, 1.0], "rain_mm_10": [0.0, 1.0]})
+    # station IDs ending with another station ID get their own column
+    assert apply_qc_framework.get_gauge_cols_by_station_id(network_data, ["E_10", "10"]) == {
+        "E_10": "rain_mm_E_10",
+        "10": "rain_mm_10",
+    }
+    with pytest.raises(ValueError):
+        apply_qc_framework.get_gauge_cols_by_station_id(network_data, ["E_10"])
+
+
 def test_get_qc_name_from_qc_key():
     assert inbuilt_qc_frameworks.get_qc_name_from_qc_key("QC2") == "k-largest_zero"
     assert inbuilt_qc_frameworks.get_qc_name_from_qc_key("test") is None
@@ -34,6 +34,11 @@ def test_check_daily_exceedance_of_rainfall_world_record(daily_gsdr_data):
         daily_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="daily"
     )
     assert len(result.filter(pl.col("world_record_check") == 0)) == 1759
+    result_lazy = comparison_checks.check_exceedance_of_rainfall_world_record(
+        daily_gsdr_data.lazy(), target_gauge_col=DEFAULT_RAIN_COL, time_res="daily"
+    )
+    assert isinstance(result_lazy, pl.LazyFrame)
+    assert result_lazy.collect(engine="streaming").equals(result)
 
 
 def test_check_hourly_exceedance_of_rainfall_world_record(hourly_gsdr_data):
@@ -43,6 +48,24 @@ def test_check_hourly_exceedance_of_rainfall_world_record(hourly_gsdr_data):
     assert len(result.filter(pl.col("world_record_check") == 4)) == 5
 
 
+def test_check_exceedance_of_rainfall_world_record_over_durations(hourly_gsdr_data):
+    result = comparison_checks.check_exceedance_of_rainfall_world_record(
+        hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="hourly", durations=["1h"]
+    )
+    expected = comparison_checks.check_exceedance_of_rainfall_world_record(
+        hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="hourly"
+    )
+    assert result.fill_nan(None).equals(expected.fill_nan(None))
+    result = comparison_checks.check_exceedance_of_rainfall_world_record(
+        hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="hourly", durations=["1h", "1d"]
+    )
+    assert len(result.filter(pl.col("world_record_check") == 4)) > 5  # every hour of days above the daily record
+    with pytest.raises(ValueError):
+        comparison_checks.check_exceedance_of_rainfall_world_record(
+            hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="hourly", durations=["3h"]
+        )
+
+
 def test_check_hourly_exceedance_etccdi_rx1day(hourly_gsdr_data, gsdr_metadata):
     result = comparison_checks.check_hourly_exceedance_etccdi_rx1day(
         hourly_gsdr_data,
@@ -54,6 +77,27 @@ def test_check_hourly_exceedance_etccdi_rx1day(hourly_gsdr_data, gsdr_metadata):
     assert len(result.filter(pl.col("rx1day_check") == 1)) == 6
 
 
+def test_check_15min_exceedance_etccdi_rx1day_over_durations(min15_gsdr_data, gsdr_metadata):
+    result = comparison_checks.check_hourly_exceedance_etccdi_rx1day(
+        min15_gsdr_data,
+        target_gauge_col=DEFAULT_RAIN_COL,
+        gauge_lat=gsdr_metadata["latitude"],
+        gauge_lon=gsdr_metadata["longitude"],
+        durations=["15m", "24h"],
+    )
+    assert len(result) == len(min15_gsdr_data)
+    # rolling 24-hour totals flag at least the time steps flagged on their own
+    result_15m = comparison_checks.check_hourly_exceedance_etccdi_rx1day(
+        min15_gsdr_data,
+        target_gauge_col=DEFAULT_RAIN_COL,
+        gauge_lat=gsdr_metadata["latitude"],
+        gauge_lon=gsdr_metadata["longitude"],
+        durations=["15m"],
+    )
+    assert (result["rx1day_check"].fill_nan(0) >= result_15m["rx1day_check"].fill_nan(0)).all()
+    assert len(result.filter(pl.col("rx1day_check") > 0)) > len(result_15m.filter(pl.col("rx1day_check") > 0))
+
+
 @pytest.mark.parametrize(
     "vals,max_ref_val,expected", [(1.5, 1, 4), (1.33, 1, 3), (1.2, 1, 2), (1.1, 1, 1), (0.9, 1, 0)]
 )
@@ -37,6 +37,26 @@ def test_load_userpath_etccdi_data():
     data_readers.load_etccdi_data(etccdi_var="PRCPTOT", path_to_etccdi="./src/rainfallqc/data/ETCCDI/")
 
 
+def test_etccdi_cache():
+    data_readers.clear_etccdi_cache()
+    etccdi_r99p = data_readers.load_etccdi_data(etccdi_var="R99p")
+    etccdi_r99p["R99p_days"] = etccdi_r99p["R99p"]  # variables added to loaded data are not cached
+    cached_etccdi_r99p = data_readers.load_etccdi_data(etccdi_var="R99p")
+    assert list(cached_etccdi_r99p.data_vars) == ["R99p"]
+    assert cached_etccdi_r99p["R99p"].values is etccdi_r99p["R99p"].values  # not read again
+    assert cached_etccdi_r99p.equals(data_readers.load_etccdi_data(etccdi_var="R99p", use_cache=False))
+
+    # least recently used data is removed when over maximum size
+    etccdi_cache = data_readers.ETCCDICache(max_size_bytes=int(1.5 * etccdi_r99p.nbytes))
+    etccdi_cache.get_or_load(("data", "R99p", None), lambda: etccdi_r99p)
+    etccdi_cache.get_or_load(("data", "PRCPTOT", None), lambda: data_readers.read_etccdi_data("PRCPTOT"))
+    assert list(etccdi_cache._datasets) == [("data", "PRCPTOT", None)]
+    assert etccdi_cache.get_size_bytes() <= etccdi_cache.max_size_bytes
+
+    data_readers.clear_etccdi_cache()
+    assert data_readers.ETCCDI_CACHE.get_size_bytes() == 0
+
+
 def test_load_gsdr_gauge_network_metadata():
     result = data_readers.load_gsdr_gauge_network_metadata(path_to_gsdr_dir="./tests/data/GSDR/")
     assert len(result.columns) == 21
@@ -133,6 +153,40 @@ def test_gsdr_network_nearest_neighbours():
     assert sorted(list(result)) == ["DE_02483", "DE_02718", "DE_06303"]
 
 
+def test_gsdr_network_neighbour_graph(tmp_path, monkeypatch):
+    gsdr_obj = data_readers.GSDRNetworkReader(path_to_gsdr_dir="./tests/data/GSDR/")
+    neighbour_graph = gsdr_obj.get_neighbour_graph(
+        distance_threshold=30, n_closest=3, min_overlap_days=1000, neighbour_graph_dir=str(tmp_path)
+    )
+    neighbour_graph_key = gsdr_obj.get_neighbour_graph_key(distance_threshold=30, n_closest=3, min_overlap_days=1000)
+    assert len(neighbour_graph_key) == 64  # full SHA-256 hex digest
+    assert (tmp_path / f"neighbour_graph_{neighbour_graph_key}.parquet").exists()
+    assert neighbour_graph_key != gsdr_obj.get_neighbour_graph_key(
+        distance_threshold=30, n_closest=4, min_overlap_days=1000
+    )
+
+    # saved neighbour graph is read by a new reader (in the cache directory)
+    monkeypatch.setenv(data_readers.CACHE_DIR_ENV_VAR, str(tmp_path))
+    gsdr_obj = data_readers.GSDRNetworkReader(path_to_gsdr_dir="./tests/data/GSDR/")
+    (tmp_path / "neighbour_graphs").mkdir()
+    (tmp_path / f"neighbour_graph_{neighbour_graph_key}.parquet").rename(
+        tmp_path / "neighbour_graphs" / f"neighbour_graph_{neighbour_graph_key}.parquet"
+    )
+    monkeypatch.setattr(data_readers.neighbourhood_utils, "get_neighbour_graph", None)
+    assert gsdr_obj.get_neighbour_graph(distance_threshold=30, n_closest=3, min_overlap_days=1000).equals(
+        neighbour_graph
+    )
+    result = gsdr_obj.get_nearest_overlapping_neighbours_to_target(
+        target_id="DE_03215", distance_threshold=30, n_closest=3, min_overlap_days=1000
+    )
+    assert result == {"DE_02483", "DE_02718", "DE_06303"}
+
+    with pytest.raises(ValueError):
+        gsdr_obj.get_nearest_overlapping_neighbours_to_target(
+            target_id="does_not_exist", distance_threshold=30, n_closest=3, min_overlap_days=1000
+        )
+
+
 def test_gsdr_network_load_network_data():
     gsdr_obj = data_readers.GSDRNetworkReader(path_to_gsdr_dir="./tests/data/GSDR/")
     result = gsdr_obj.load_network_data(
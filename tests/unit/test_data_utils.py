@@ -13,6 +13,15 @@ from rainfallqc.utils import data_utils
 DEFAULT_RAIN_COL = "rain_mm"
 
 
+def test_back_propagate_daily_data_flags():
+    time_vals = pl.datetime_range(datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 10), "1d", eager=True)
+    data = pl.DataFrame({"time": time_vals, "flag": [0.0, 0, np.nan, 1, 0, 3, 0, 0, 2, np.nan]})
+    result = data_utils.back_propagate_daily_data_flags(data, flag_column="flag", num_days=2)
+    assert result["flag"].to_list()[:9] == [0, 1, 1, 3, 3, 3, 2, 2, 2]
+    assert np.isnan(result["flag"][9])
+    assert data_utils.back_propagate_daily_data_flags(data, flag_column="flag", num_days=0).equals(data)
+
+
 def test_calculate_dry_spell_fraction(daily_gsdr_data, daily_gpcc_data):
     result = data_utils.calculate_dry_spell_fraction(
         daily_gsdr_data[DEFAULT_RAIN_COL], target_gauge_col=DEFAULT_RAIN_COL, dry_period_days=15
@@ -48,6 +57,20 @@ def test_check_for_negative_values(daily_gsdr_data):
     assert result is True
 
 
+def test_convert_flags_to_compact_dtype(daily_gsdr_data):
+    flags = daily_gsdr_data.select("time").head(4)
+    flags = flags.with_columns(
+        pl.Series("flag", [0.0, np.nan, 3.0, None]),
+        pl.Series("not_flag", [0.5, 1.0, 2.0, 3.0]),
+        pl.Series("int_flag", [-1, 0, 1, 2], dtype=pl.Int32),
+    )
+    result = data_utils.convert_flags_to_compact_dtype(flags)
+    assert result.schema == {"time": flags["time"].dtype, "flag": pl.Int8, "not_flag": pl.Float64, "int_flag": pl.Int8}
+    assert result["flag"].to_list() == [0, None, 3, None]
+    result = data_utils.convert_flags_to_compact_dtype(flags, flag_cols=["int_flag"])
+    assert result["flag"].dtype == pl.Float64
+
+
 def test_convert_daily_data_to_monthly(daily_gsdr_data, daily_gpcc_data, hourly_gsdr_data):
     result = data_utils.convert_daily_data_to_monthly(daily_gsdr_data, rain_cols=[DEFAULT_RAIN_COL])
     assert round(np.nanmean(result[DEFAULT_RAIN_COL]), 1) == 278.0
@@ -55,6 +78,9 @@ def test_convert_daily_data_to_monthly(daily_gsdr_data, daily_gpcc_data, hourly_
     data_time_steps = data_utils.get_data_timesteps(result)
     data_time_steps_str = [data_utils.format_timedelta_duration(td) for td in data_time_steps]
     assert data_time_steps_str == ["28d", "29d", "30d", "31d"]
+    result_lazy = data_utils.convert_daily_data_to_monthly(daily_gsdr_data.lazy(), rain_cols=[DEFAULT_RAIN_COL])
+    assert isinstance(result_lazy, pl.LazyFrame)
+    np.testing.assert_allclose(result_lazy.collect()[DEFAULT_RAIN_COL], result[DEFAULT_RAIN_COL])
 
     result = data_utils.convert_daily_data_to_monthly(
         daily_gpcc_data, rain_cols=[DEFAULT_RAIN_COL], perc_for_valid_month=99
@@ -113,6 +139,74 @@ def test_get_dry_spells(hourly_gsdr_data):
     assert "is_dry" in result
 
 
+def test_get_rolling_totals():
+    start, end = datetime.datetime(2000, 12, 31, 20), datetime.datetime(2001, 1, 1, 3)
+    time_vals = pl.datetime_range(start, end, "1h", eager=True)
+    data = pl.DataFrame({"time": time_vals, DEFAULT_RAIN_COL: [1.0, 2.0, 0.0, 4.0, np.nan, 1.0, 0.0, 2.0]})
+    rolling_totals = data_utils.get_rolling_totals(data, DEFAULT_RAIN_COL, ["1h", "3h"])
+    assert rolling_totals.columns == ["time", f"{DEFAULT_RAIN_COL}_1h", f"{DEFAULT_RAIN_COL}_3h"]
+    np.testing.assert_array_equal(rolling_totals[f"{DEFAULT_RAIN_COL}_1h"], data[DEFAULT_RAIN_COL])
+    np.testing.assert_array_equal(
+        rolling_totals[f"{DEFAULT_RAIN_COL}_3h"], [np.nan, np.nan, 3.0, 6.0, np.nan, np.nan, np.nan, 3.0]
+    )
+    annual_max_totals = data_utils.get_annual_max_rolling_totals(data.lazy(), DEFAULT_RAIN_COL, ["3h"])
+    assert annual_max_totals[f"{DEFAULT_RAIN_COL}_3h"].to_list() == [6.0, 3.0]
+
+    with pytest.raises(ValueError):
+        data_utils.get_rolling_totals(data, DEFAULT_RAIN_COL, ["90m"])
+    with pytest.raises(ValueError):
+        data_utils.convert_duration_str_to_timedelta("1y")
+    assert data_utils.convert_duration_str_to_timedelta("daily") == datetime.timedelta(days=1)
+
+
+def test_get_run_table(hourly_gsdr_data):
+    time_vals = pl.datetime_range(datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 8), "1h", eager=True)[:8]
+    data = pl.DataFrame({"time": time_vals, DEFAULT_RAIN_COL: [0.0, 0.0, 1.0, np.nan, None, 2.0, 2.0, 0.0]})
+    run_table = data_utils.get_run_table(data, target_gauge_col=DEFAULT_RAIN_COL)
+    assert run_table["start_idx"].to_list() == [0, 2, 3, 5, 7]
+    assert run_table["run_len"].to_list() == [2, 1, 2, 2, 1]
+    assert run_table["end"].to_list() == time_vals.gather([1, 2, 4, 6, 7]).to_list()
+    assert run_table["is_missing"].to_list() == [False, False, True, False, False]
+    assert run_table["is_dry"].to_list() == [True, False, False, False, True]
+    expanded = data_utils.expand_run_table(run_table, ["value", "is_dry"])
+    assert expanded["value"].fill_nan(None).equals(data[DEFAULT_RAIN_COL].fill_nan(None).alias("value"))
+
+    with data_utils.validated_frame(hourly_gsdr_data):
+        run_table = data_utils.get_run_table(hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL)
+        assert data_utils.get_run_table(hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL) is run_table
+    assert run_table["run_len"].sum() == len(hourly_gsdr_data)
+
+
+def test_get_annual_statistics(hourly_gsdr_data):
+    time_vals = [datetime.datetime(2000, 1, day) for day in [1, 2, 3, 4]] + [datetime.datetime(2001, 1, 1)]
+    data = pl.DataFrame({"time": time_vals, DEFAULT_RAIN_COL: [0.0, 0.2, np.nan, 3.0, 0.0]})
+    annual_statistics = data_utils.get_annual_statistics(
+        data, DEFAULT_RAIN_COL, percentiles=[50], k_largest=[2], sum_above_percentiles=[50]
+    )
+    assert annual_statistics["year"].to_list() == [2000, 2001]
+    assert annual_statistics["n_missing"].to_list() == [1, 0]
+    assert annual_statistics["missing_fraction"].to_list() == [0.25, 0.0]
+    assert annual_statistics["min_non_zero"].to_list() == [0.2, None]
+    assert annual_statistics["kth_largest_2"].to_list() == [3.0, 0.0]
+    assert annual_statistics["sum_above_percentile_50"].to_list() == [3.0, None]
+
+    # only statistics not in the given table are computed
+    given_statistics = annual_statistics.with_columns(kth_largest_2=pl.lit(-1.0))
+    annual_statistics = data_utils.get_annual_statistics(
+        data, DEFAULT_RAIN_COL, k_largest=[2, 1], annual_statistics=given_statistics
+    )
+    assert annual_statistics["kth_largest_2"].to_list() == [-1.0, -1.0]
+    assert annual_statistics["kth_largest_1"].equals(
+        data_utils.get_annual_statistics(data, DEFAULT_RAIN_COL, k_largest=[1])["kth_largest_1"]
+    )
+
+    with data_utils.validated_frame(hourly_gsdr_data) as record:
+        data_utils.get_annual_statistics(hourly_gsdr_data, DEFAULT_RAIN_COL, percentiles=[5])
+        annual_statistics = data_utils.get_annual_statistics(hourly_gsdr_data, DEFAULT_RAIN_COL, k_largest=[5])
+        assert record["annual_statistics"][DEFAULT_RAIN_COL].columns[-2:] == ["percentile_5", "kth_largest_5"]
+    assert annual_statistics["n_time_steps"].sum() == len(hourly_gsdr_data)
+
+
 def test_get_data_timesteps(hourly_gsdr_data, inconsistent_timestep_data):
     result = data_utils.get_data_timesteps(hourly_gsdr_data)
     assert len(result) == 1
@@ -120,6 +214,8 @@ def test_get_data_timesteps(hourly_gsdr_data, inconsistent_timestep_data):
     result = data_utils.get_data_timesteps(inconsistent_timestep_data)
     assert len(result) == 3
     assert result[0] == datetime.timedelta(seconds=60)
+    result = data_utils.get_data_timesteps(hourly_gsdr_data.lazy())
+    assert result.to_list() == [datetime.timedelta(seconds=3600)]
 
 
 def test_format_timedelta_duration():
@@ -170,3 +266,37 @@ def test_offset_data_by_time(hourly_gsdr_data):
         hourly_gsdr_data, target_col=DEFAULT_RAIN_COL, offset_in_time=0, time_res="hourly"
     )
     assert result["rain_mm"][0] == 0.9
+
+
+def test_paint_intervals():
+    time_vals = pl.datetime_range(datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 10), "1d", eager=True)
+    data = pl.DataFrame({"time": time_vals, "flag": np.zeros(10)})
+    intervals = pl.DataFrame(
+        {
+            "start": [datetime.datetime(2000, 1, 2), datetime.datetime(2000, 1, 3), datetime.datetime(1999, 1, 1)],
+            "end": [datetime.datetime(2000, 1, 5), datetime.datetime(2000, 1, 3, 12), datetime.datetime(2000, 1, 1)],
+            "value": [1, 4, 2],
+        }
+    )
+    result = data_utils.paint_intervals(data, intervals, data_col="flag")
+    assert result["flag"].to_list() == [2, 1, 4, 1, 1, 0, 0, 0, 0, 0]
+    assert result["flag"].dtype == pl.Float64
+    result = data_utils.paint_intervals(data, intervals.with_columns(priority=pl.Series([2, 1, 0])), data_col="flag")
+    assert result["flag"].to_list() == [2, 1, 1, 1, 1, 0, 0, 0, 0, 0]
+    assert data_utils.paint_intervals(data, intervals.clear(), data_col="flag").equals(data)
+
+
+def test_validated_frame(hourly_gsdr_data):
+    assert data_utils.get_validated_frame_record(hourly_gsdr_data) is None
+    with data_utils.validated_frame(hourly_gsdr_data) as record:
+        assert data_utils.check_for_negative_values(hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL) is False
+        assert record["non_negative_cols"] == {DEFAULT_RAIN_COL}
+        timesteps = data_utils.get_data_timesteps(hourly_gsdr_data)
+        assert data_utils.get_data_timesteps(hourly_gsdr_data) is timesteps
+        with data_utils.validated_frame(hourly_gsdr_data) as nested_record:
+            assert nested_record is record
+        # other data frames are not affected
+        hourly_gsdr_data_with_neg = hourly_gsdr_data.with_columns(pl.col(DEFAULT_RAIN_COL) * -1)
+        assert data_utils.check_for_negative_values(hourly_gsdr_data_with_neg, target_gauge_col=DEFAULT_RAIN_COL)
+        assert data_utils.get_validated_frame_record(hourly_gsdr_data) is record
+    assert data_utils.get_validated_frame_record(hourly_gsdr_data) is None
@@ -17,6 +17,10 @@ def test_get_years_where_nth_percentile_is_zero(daily_gsdr_data):
     )
     assert len(years_95th) == 0
     numpy.testing.assert_array_equal(years_35th, [2006, 2007, 2008, 2009, 2010])
+    years_35th_lazy = gauge_checks.check_years_where_nth_percentile_is_zero(
+        daily_gsdr_data.lazy(), target_gauge_col=DEFAULT_RAIN_COL, percentile=35
+    )
+    assert years_35th_lazy == years_35th
     
     with pytest.raises(AssertionError):
         gauge_checks.check_years_where_nth_percentile_is_zero(daily_gsdr_data, DEFAULT_RAIN_COL, percentile=.95)
@@ -50,6 +54,15 @@ def test_check_hour_of_day_bias(hourly_gsdr_data):
     assert hour_bias_true == 0
 
 
+def test_check_temporal_bias_several_granularities(hourly_gsdr_data):
+    assert gauge_checks.check_temporal_bias(hourly_gsdr_data, DEFAULT_RAIN_COL, time_granularity="month") == 1
+    assert gauge_checks.check_temporal_bias(hourly_gsdr_data, DEFAULT_RAIN_COL, time_granularity=["hour"]) == 0
+    hour_and_weekday_bias = gauge_checks.check_temporal_bias(
+        hourly_gsdr_data.lazy(), target_gauge_col=DEFAULT_RAIN_COL, time_granularity=["hour", "weekday"]
+    )
+    assert hour_and_weekday_bias == 1
+
+
 def test_check_wrong_time_gran(daily_gsdr_data):
     with pytest.raises(ValueError):
         gauge_checks.check_temporal_bias(daily_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_granularity="wrong")
@@ -70,8 +83,27 @@ def test_breakpoints(daily_gsdr_data, daily_gsdr_data_w_breakpoint):
     assert flag == 1
 
 
+def test_breakpoints_aggregated(daily_gsdr_data_w_breakpoint):
+    flag = gauge_checks.check_breakpoints(
+        daily_gsdr_data_w_breakpoint, target_gauge_col=DEFAULT_RAIN_COL, p_threshold=0.05, aggregation="monthly"
+    )
+    assert flag == 1
+    flag = gauge_checks.check_breakpoints(
+        daily_gsdr_data_w_breakpoint, target_gauge_col=DEFAULT_RAIN_COL, aggregation="annual"
+    )
+    assert flag == 0  # too few years for a significant breakpoint
+    with pytest.raises(ValueError):
+        gauge_checks.check_breakpoints(
+            daily_gsdr_data_w_breakpoint, target_gauge_col=DEFAULT_RAIN_COL, aggregation="1y"
+        )
+
+
 def test_min_val_change(hourly_gsdr_data):
     yr_list = gauge_checks.check_min_val_change(
         hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, expected_min_val=0.1
     )
     numpy.testing.assert_array_equal(yr_list, [2006, 2010])
+    yr_list_lazy = gauge_checks.check_min_val_change(
+        hourly_gsdr_data.lazy(), target_gauge_col=DEFAULT_RAIN_COL, expected_min_val=0.1
+    )
+    assert yr_list_lazy == yr_list
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Tests for the local ETCCDI climatology of rain gauges."""
+
+import pickle
+
+import numpy as np
+import polars as pl
+import pytest
+
+from rainfallqc.checks import comparison_checks, timeseries_checks
+from rainfallqc.utils import data_readers, gauge_climatology, neighbourhood_utils
+
+DEFAULT_RAIN_COL = "rain_mm"
+
+
+def test_get_etccdi_value(gsdr_metadata):
+    climatology = gauge_climatology.GaugeClimatology(gsdr_metadata["latitude"], gsdr_metadata["longitude"])
+    etccdi_r99p = data_readers.load_etccdi_data(etccdi_var="R99p")
+    nearby_etccdi_r99p = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
+        etccdi_r99p, etccdi_name="R99p", gauge_lat=gsdr_metadata["latitude"], gauge_lon=gsdr_metadata["longitude"]
+    )
+    assert climatology.get_etccdi_value("R99p") == float(np.max(nearby_etccdi_r99p["R99p"]))
+    assert climatology.get_etccdi_value("SDII") == timeseries_checks.get_local_etccdi_sdii_mean(
+        gsdr_metadata["latitude"], gsdr_metadata["longitude"]
+    )
+    assert set(climatology._etccdi_values) == {"R99p", "SDII"}
+
+    with pytest.raises(ValueError):
+        climatology.get_etccdi_value("R95p")
+
+
+def test_gauge_climatology_is_picklable(gsdr_metadata):
+    climatology = gauge_climatology.GaugeClimatology(gsdr_metadata["latitude"], gsdr_metadata["longitude"])
+    cdd_days = climatology.get_etccdi_value("CDD")
+    unpickled_climatology = pickle.loads(pickle.dumps(climatology))
+    assert repr(unpickled_climatology) == repr(climatology)
+    assert unpickled_climatology.get_etccdi_value("CDD") == cdd_days
+    # CDD in days is only computed once per process
+    assert ("CDD_days", "CDD", None) in data_readers.ETCCDI_CACHE._datasets
+
+
+def test_checks_share_gauge_climatology(hourly_gsdr_data, gsdr_metadata):
+    climatology = gauge_climatology.GaugeClimatology(gsdr_metadata["latitude"], gsdr_metadata["longitude"])
+    result = timeseries_checks.check_dry_period_cdd(
+        hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, time_res="hourly", climatology=climatology
+    )
+    assert len(result.filter(result["dry_spell_flag"] == 4)) == 2200
+
+    result = comparison_checks.check_annual_exceedance_etccdi_r99p(
+        hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, climatology=climatology
+    )
+    assert result == comparison_checks.check_annual_exceedance_etccdi_r99p(
+        hourly_gsdr_data,
+        target_gauge_col=DEFAULT_RAIN_COL,
+        gauge_lat=gsdr_metadata["latitude"],
+        gauge_lon=gsdr_metadata["longitude"],
+    )
+    assert set(climatology._etccdi_values) == {"CDD", "R99p"}
+
+
+def test_get_etccdi_reference_table(tmp_path):
+    metadata = pl.DataFrame(
+        {"station_id": ["A", "B", "C"], "latitude": [51.1803, 50.0, 0.0], "longitude": [8.4891, 10.0, -30.0]}
+    )
+    etccdi_reference_table = gauge_climatology.get_etccdi_reference_table(metadata)
+    assert etccdi_reference_table.columns[3:5] == ["R99p", "R99p_distance_km"]
+    assert etccdi_reference_table.row(2, named=True)["CDD_days"] is None  # no grid cell within 500 km
+
+    # saved and loaded from Parquet
+    etccdi_reference_table.write_parquet(tmp_path / "etccdi_reference_table.parquet")
+    etccdi_reference_table = pl.read_parquet(tmp_path / "etccdi_reference_table.parquet")
+
+    # values are the same as those looked up for each gauge
+    for station_id, gauge_lat, gauge_lon in metadata.rows()[:2]:
+        climatology = gauge_climatology.get_gauge_climatology_from_reference_table(etccdi_reference_table, station_id)
+        assert set(climatology.etccdi_values) == set(gauge_climatology.ETCCDI_LOCAL_VARS)
+        for etccdi_var in gauge_climatology.ETCCDI_LOCAL_VARS:
+            assert climatology.get_etccdi_value(etccdi_var) == gauge_climatology.GaugeClimatology(
+                gauge_lat, gauge_lon
+            ).get_etccdi_value(etccdi_var)
+
+    with pytest.raises(ValueError):
+        gauge_climatology.get_gauge_climatology_from_reference_table(etccdi_reference_table, "D")
+
+
+def test_etccdi_reference_fields(tmp_path, monkeypatch):
+    etccdi_fields = gauge_climatology.build_etccdi_reference_fields(str(tmp_path))
+    assert etccdi_fields["CDD_days"].dims == ("lat", "lon")
+    read_etccdi_fields = gauge_climatology.read_etccdi_reference_fields(str(tmp_path))
+    assert read_etccdi_fields.equals(etccdi_fields)
+    assert isinstance(read_etccdi_fields["R99p"].data, np.memmap)
+
+    # fields made from other ETCCDI files are not read
+    monkeypatch.setattr(gauge_climatology, "get_etccdi_source_signature", lambda path_to_etccdi: {})
+    assert gauge_climatology.read_etccdi_reference_fields(str(tmp_path)) is None
+    monkeypatch.undo()
+
+    # fields are built in the cache directory on first use
+    monkeypatch.setenv(data_readers.CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+    data_readers.clear_etccdi_cache()
+    assert gauge_climatology.load_etccdi_reference_fields().equals(etccdi_fields)
+    assert (tmp_path / "cache" / "etccdi_fields" / gauge_climatology.ETCCDI_FIELDS_INDEX_FILE).exists()
+    data_readers.clear_etccdi_cache()
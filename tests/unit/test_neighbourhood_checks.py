@@ -135,6 +135,29 @@ def test_check_wet_neighbour_15min(mins15_gsdr_network):
     assert len(result.filter(pl.col("wet_spell_flag_15m") == 1)) == 288
 
 
+def test_check_wet_neighbour_with_whole_record_statistics(daily_gsdr_network):
+    target_gauge_col = f"{DEFAULT_RAIN_COL}_DE_00310"
+    all_neighbour_cols = daily_gsdr_network.columns[1:]  # exclude time
+    wet_day_statistics = neighbourhood_checks.get_neighbour_wet_day_statistics(
+        daily_gsdr_network.lazy(), target_gauge_col, all_neighbour_cols, wet_threshold=0.5
+    )
+    assert target_gauge_col not in wet_day_statistics
+    assert sorted(wet_day_statistics[all_neighbour_cols[-1]]["expon_percentiles"]) == [0.95, 0.99, 0.999]
+
+    check_kwargs = {
+        "target_gauge_col": target_gauge_col,
+        "list_of_nearest_stations": all_neighbour_cols,
+        "wet_threshold": 0.5,
+        "min_n_neighbours": 3,
+    }
+    result = neighbourhood_checks.check_wet_neighbours_daily(daily_gsdr_network, **check_kwargs)
+    # with whole record statistics, part of the record gets the same flags as the whole record
+    result_part = neighbourhood_checks.check_wet_neighbours_daily(
+        daily_gsdr_network[:500], wet_day_statistics=wet_day_statistics, **check_kwargs
+    )
+    assert result_part.equals(result[:500])
+
+
 def test_dry_neighbour_check_daily_gsdr(daily_gsdr_network):
     all_neighbour_cols = daily_gsdr_network.columns[1:]  # exclude time
 
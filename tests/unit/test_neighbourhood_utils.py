@@ -101,6 +101,32 @@ def test_get_ids_of_n_nearest_overlapping_neighbouring_gauges(gsdr_gauge_network
     assert len(result) == 9
 
 
+def test_get_neighbour_graph(gsdr_gauge_network):
+    result = neighbourhood_utils.get_neighbour_graph(
+        gsdr_gauge_network, distance_threshold=50, n_closest=10, min_overlap_days=500
+    )
+    assert result.columns == ["target_id", "neighbour_id", "distance_km", "overlap_days"]
+    target_neighbours = result.filter(pl.col("target_id") == "DE_00310")
+    assert round(target_neighbours.filter(pl.col("neighbour_id") == "DE_02483")["distance_km"][0], 2) == 13.13
+    assert target_neighbours.filter(pl.col("neighbour_id") == "DE_02483")["overlap_days"][0] == 1825
+
+    # same neighbours as found for each target gauge
+    for exact_distances in [True, False]:
+        result = neighbourhood_utils.get_neighbour_graph(
+            gsdr_gauge_network,
+            distance_threshold=50,
+            n_closest=3,
+            min_overlap_days=1500,
+            exact_distances=exact_distances,
+        )
+        for target_id in gsdr_gauge_network["station_id"]:
+            assert set(result.filter(pl.col("target_id") == target_id)["neighbour_id"]) == set(
+                neighbourhood_utils.get_ids_of_n_nearest_overlapping_neighbouring_gauges(
+                    gsdr_gauge_network, target_id=target_id, distance_threshold=50, n_closest=3, min_overlap_days=1500
+                )
+            )
+
+
 def test_get_target_neighbour_non_zero_minima(gauge_comparison_data):
     result = neighbourhood_utils.get_target_neighbour_non_zero_minima(
         gauge_comparison_data, target_col="gauge1", other_col="gauge2", default_minima=0.1
@@ -161,3 +187,20 @@ def test_get_nearest_non_nan_etccdi_val_to_gauge():
         neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
             etccdi_r99p, etccdi_name="R99p", gauge_lat=np.array([50.0, 51.1]), gauge_lon=10.0
         )
+
+
+def test_etccdi_grid_index():
+    etccdi_r99p = data_readers.load_etccdi_data(etccdi_var="R99p")
+    grid_index = neighbourhood_utils.ETCCDIGridIndex(etccdi_r99p, etccdi_name="R99p")
+    nearest_lat, nearest_lon, distance_km = grid_index.query(
+        [50.0, 52.14, 0.0, np.nan], [10.0, 0.25, -30.0, 10.0], max_distance_km=500
+    )
+    for gauge_lat, gauge_lon, lat, lon in zip([50.0, 52.14], [10.0, 0.25], nearest_lat, nearest_lon, strict=False):
+        result = neighbourhood_utils.get_nearest_non_nan_etccdi_val_to_gauge(
+            etccdi_r99p, etccdi_name="R99p", gauge_lat=gauge_lat, gauge_lon=gauge_lon, grid_index=grid_index
+        )
+        assert (float(result["lat"]), float(result["lon"])) == (lat, lon)
+    assert distance_km[0] < 90  # same as 'max_distance_km' test above
+    assert np.isnan(nearest_lat[2:]).all()  # middle of Atlantic and no gauge coordinates
+    # coordinates (2 x float64), unit vectors (3 x float64) and tree indices (intp) of each cell
+    assert grid_index.nbytes == grid_index.lat.size * (5 * 8 + np.dtype(np.intp).itemsize)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Tests for on-disk cache of QC check results."""
+
+import concurrent.futures
+import os
+
+import polars as pl
+
+from rainfallqc.core import all_qc_checks, result_cache
+
+
+def test_qc_result_cache(tmp_path):
+    n_calls = []
+
+    @all_qc_checks.qc_check("counted_check")
+    def counted_check(data, target_gauge_col, threshold=1.0):
+        n_calls.append(threshold)
+        return data.select("time", (pl.col(target_gauge_col) > threshold).alias("flag"))
+
+    data = pl.DataFrame({"time": [1, 2, 3], "rain_mm": [0.0, 2.0, 0.5], "other_mm": [1.0, 1.0, 1.0]})
+    qc_result_cache = result_cache.QCResultCache(tmp_path / "cache")
+    with qc_result_cache:
+        result = counted_check(data, target_gauge_col="rain_mm")
+        assert counted_check(data, "rain_mm").equals(result)  # same bound arguments
+        assert counted_check(data.with_columns(other_mm=pl.lit(5.0)), "rain_mm").equals(result)  # unused column
+        assert n_calls == [1.0]
+        counted_check(data, target_gauge_col="rain_mm", threshold=0.1)
+        counted_check(data.with_columns(rain_mm=pl.col("rain_mm") * 2), target_gauge_col="rain_mm")
+        assert n_calls == [1.0, 0.1, 1.0]
+        lazy_result = counted_check(data.lazy(), target_gauge_col="rain_mm")
+        assert isinstance(lazy_result, pl.LazyFrame)
+        assert lazy_result.collect().equals(result)
+    assert result_cache.get_active_result_cache() is None
+    counted_check(data, target_gauge_col="rain_mm")
+    assert len(n_calls) == 4
+    all_qc_checks.QC_CHECKS.pop("counted_check")
+
+    # Scalar results and eviction of least recently used results
+    key_1 = qc_result_cache.make_key("check", data, {"threshold": 1.0})
+    key_2 = qc_result_cache.make_key("check", data, {"threshold": 2.0})
+    assert key_1 != key_2
+    qc_result_cache.clear()
+    assert qc_result_cache.get_size_bytes() == 0
+    qc_result_cache.save(key_1, [2006, 2007])
+    assert qc_result_cache.load(key_1) == (True, [2006, 2007])
+    result_size = os.path.getsize(qc_result_cache.get_result_path(key_1, result_cache.VALUE_SUFFIX))
+    assert qc_result_cache.get_size_bytes() == result_size
+    qc_result_cache.max_size_bytes = qc_result_cache.get_size_bytes()
+    qc_result_cache.save(key_2, 0.5)
+    assert not qc_result_cache.load(key_1)[0]
+    assert qc_result_cache.load(key_2) == (True, 0.5)
+
+    # size is scanned when cache is reopened
+    reopened_result_cache = result_cache.QCResultCache(tmp_path / "cache")
+    assert reopened_result_cache.get_size_bytes() == qc_result_cache.get_size_bytes()
+
+
+def test_qc_result_cache_is_only_active_in_its_thread(tmp_path):
+    with result_cache.QCResultCache(tmp_path / "cache") as qc_result_cache:
+        assert result_cache.get_active_result_cache() is qc_result_cache
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(result_cache.get_active_result_cache).result() is None
+        with result_cache.QCResultCache(tmp_path / "other_cache") as other_result_cache:
+            assert result_cache.get_active_result_cache() is other_result_cache
+        assert result_cache.get_active_result_cache() is qc_result_cache
+    assert result_cache.get_active_result_cache() is None
+
+
+def test_make_fingerprintable():
+    fingerprintable = result_cache.make_fingerprintable({"a": (1, float("nan")), 0.5: pl.DataFrame({"x": [1]})})
+    assert fingerprintable["'a'"] == ["tuple", [1, "nan"]]
+    assert "frame" in fingerprintable["0.5"]
+    assert result_cache.make_fingerprintable([1]) != result_cache.make_fingerprintable((1,))
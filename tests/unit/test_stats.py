@@ -2,8 +2,10 @@
 
 """Test statistics."""
 
+import numpy as np
 import polars as pl
 import pytest
+import scipy.stats
 
 from rainfallqc.utils import data_utils, stats
 
@@ -23,6 +25,14 @@ def test_pettitt_test_pl(example_array):
     assert round(p, 2) == 0.03
 
 
+def test_pettitt_test_with_ties():
+    arr = np.array([1.0, 0.0, 0.0, 2.0, 1.0, 3.0, 3.0, 5.0, 4.0, 3.0])
+    tau, p = stats.pettitt_test(arr)
+    pairwise_K = [np.sign(arr[:t, None] - arr[None, t:]).sum() for t in range(len(arr))]
+    assert tau == np.argmax(np.abs(pairwise_K))
+    assert p == 2 * np.exp((-6 * np.max(np.abs(pairwise_K)) ** 2) / (len(arr) ** 3 + len(arr) ** 2))
+
+
 def test_simple_precip_intensity_index(hourly_gsdr_data):
     result = stats.simple_precip_intensity_index(hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, wet_threshold=1.0)
     assert round(result, 1) == 8.5
@@ -59,3 +69,16 @@ def test_dry_spell_fraction(hourly_gsdr_data):
     assert result.max() == 1.0
     with pytest.raises(AssertionError):
         stats.dry_spell_fraction(hourly_gsdr_data, target_gauge_col=DEFAULT_RAIN_COL, dry_period_days=15)
+
+
+def test_ttest_1samp_from_sums():
+    samples = [np.array([0.0, 1.5, 2.0, 0.2]), np.array([3.0, 3.0, 3.0]), np.array([1.0, 1.0]), np.array([4.0])]
+    popmean = 1.0
+    p_values = stats.ttest_1samp_from_sums(
+        [len(sample) for sample in samples],
+        [(sample - popmean).sum() for sample in samples],
+        [((sample - popmean) ** 2).sum() for sample in samples],
+    )
+    np.testing.assert_allclose(p_values[0], scipy.stats.ttest_1samp(samples[0], popmean).pvalue)
+    assert p_values[1] == 0.0  # no variance and different mean
+    assert np.isnan(p_values[2]) and np.isnan(p_values[3])
@@ -249,6 +249,36 @@ def test_flag_streaks_exceeding_wet_day_rainfall_threshold(hourly_gsdr_data, gsd
     assert len(result.filter(pl.col("streak_flag1") > 0)) == 71
 
 
+def test_get_streaks_above_threshold(hourly_gsdr_data):
+    with pytest.warns(DeprecationWarning):
+        result = timeseries_checks.get_streaks_above_threshold(
+            hourly_gsdr_data, DEFAULT_RAIN_COL, streak_length=6, value_threshold=6
+        )
+    assert result.columns == ["streak_id", "streak_len", "rain_amount"]
+    assert (result["streak_len"] >= 6).all() and (result["rain_amount"] > 6).all()
+    streak_data = timeseries_checks.get_streaks_of_repeated_values(hourly_gsdr_data, DEFAULT_RAIN_COL)
+    first_streak = streak_data.filter(pl.col("streak_id") == result["streak_id"][0])
+    assert len(first_streak) == result["streak_len"][0]
+
+
+def test_flag_accumulation_periods():
+    rain_vals = [0.0, 5.0, 0.0, 0.0, 0.0, 20.0, 0.0, np.nan, 0.0, 20.0, 0.0, 0.0, 0.0, 0.0, 20.0]
+    data = pl.DataFrame({DEFAULT_RAIN_COL: rain_vals})
+    result = timeseries_checks.flag_accumulation_periods(
+        data, DEFAULT_RAIN_COL, accumulation_threshold=10.0, accumulation_period_in_hours=96, time_res="1d"
+    )
+    # period ending on the last time step is not flagged
+    assert result.tolist() == [0, 0, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    result = timeseries_checks.flag_accumulation_periods(
+        data, DEFAULT_RAIN_COL, accumulation_threshold=10.0, accumulation_period_in_hours=2, time_res="15m"
+    )
+    assert result.sum() == 0
+    with pytest.raises(ValueError):
+        timeseries_checks.flag_accumulation_periods(
+            data, DEFAULT_RAIN_COL, accumulation_threshold=10.0, accumulation_period_in_hours=36, time_res="1d"
+        )
+
+
 def test_flag_n_hours_accumulation_based_on_threshold(hourly_gsdr_data):
     test_data = pl.Series([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 200])
     result = timeseries_checks.flag_n_hours_accumulation_based_on_threshold(